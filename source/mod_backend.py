@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+import re
+
+from collections import deque
+
+# ------------------------------------------------------------------------------------------------------------
+# Backend events
+
+BACKEND_EVENT_READY = "ready"
+BACKEND_EVENT_ERROR = "error"
+BACKEND_EVENT_XRUN  = "xrun"
+
+# Event lines, matched at the start of each line so plugin names or URIs containing these words don't count.
+# Group names are the events, see BackendOutputParser.dispatchText().
+BACKEND_EVENT_PATTERN = re.compile(
+    r"^[ \t]*(?:(?P<%s>mod-host ready!|mod-host is running\.)[ \t\r]*$|"
+    r"(?P<%s>(?i:error)\b[^\n]*)|"
+    r"(?P<%s>(?i:(?:jack )?xrun)\b[^\n]*))" % (BACKEND_EVENT_READY, BACKEND_EVENT_ERROR, BACKEND_EVENT_XRUN),
+    re.MULTILINE)
+
+# Lowercase text each BACKEND_EVENT_PATTERN match contains, lines are only matched where one is found.
+# Finding these in a whole batch is much faster than running the pattern over it.
+BACKEND_EVENT_HINTS = ("mod-host", "error", "xrun")
+
+# Any ANSI escape sequence (colors, cursor movement, etc)
+ANSI_ESCAPE_PATTERN = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]")
+
+# Partial lines longer than this are split, so a misbehaving backend can't grow memory forever
+BACKEND_MAX_LINE_LENGTH = 64*1024
+
+# Amount of backend output kept in memory for the log window
+BACKEND_LOG_SIZE = 4*1024*1024
+
+# ------------------------------------------------------------------------------------------------------------
+# Backend Output Parser
+#
+# Incremental line reader for the backend output.
+# Partial lines are kept until the rest arrives, escapes are stripped in a single pass over each read.
+
+class BackendOutputParser(object):
+    def __init__(self):
+        self.fPartial  = b""
+        self.fHandlers = {}
+
+    def reset(self):
+        self.fPartial = b""
+
+    def setHandler(self, event, callback):
+        self.fHandlers[event] = callback
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Feed raw output, returns the list of complete (non-empty) lines
+    def feed(self, data):
+        return self.splitText(self.feedText(data))
+
+    # Get whatever is left, used when the backend finishes
+    def flush(self):
+        data, self.fPartial = self.fPartial, b""
+        return self.splitText(self.cleanText(data))
+
+    # Feed raw output, returns the complete lines as a single text
+    def feedText(self, data):
+        data = self.fPartial + data
+        end  = data.rfind(b"\n")
+
+        if end < 0:
+            if len(data) < BACKEND_MAX_LINE_LENGTH:
+                self.fPartial = data
+                return ""
+            end = len(data)
+
+        self.fPartial = data[end+1:]
+        return self.cleanText(data[:end])
+
+    def cleanText(self, data):
+        text = str(data, encoding="utf-8", errors="ignore")
+
+        if "\x1b" in text:
+            text = ANSI_ESCAPE_PATTERN.sub("", text)
+
+        return text
+
+    # Lines are kept as they are, except for CR line endings. Empty lines are dropped.
+    def splitText(self, text):
+        if "\r" in text:
+            text = text.replace("\r", "")
+
+        return list(filter(None, text.split("\n")))
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Call the handlers for all recognised events in @a lines
+    def dispatch(self, lines):
+        if lines:
+            self.dispatchText("\n".join(lines))
+
+    def dispatchText(self, text):
+        if not text or not self.fHandlers:
+            return
+
+        lower   = text.lower()
+        matches = {}
+
+        # a few characters change length when lowercased, positions would be off
+        if len(lower) != len(text):
+            for match in BACKEND_EVENT_PATTERN.finditer(text):
+                matches[match.start()] = match
+            lower = ""
+
+        for hint in BACKEND_EVENT_HINTS:
+            pos = lower.find(hint)
+
+            while pos >= 0:
+                start = text.rfind("\n", 0, pos) + 1
+                end   = text.find("\n", pos)
+
+                if start not in matches:
+                    match = BACKEND_EVENT_PATTERN.match(text, start)
+                    if match is not None:
+                        matches[start] = match
+
+                if end < 0:
+                    break
+
+                pos = lower.find(hint, end)
+
+        # most batches have no events at all
+        if not matches:
+            return
+
+        for start in sorted(matches):
+            match   = matches[start]
+            handler = self.fHandlers.get(match.lastgroup)
+
+            if handler is not None:
+                handler(match.group(0).strip())
+
+    # Feed and dispatch, returns the complete lines
+    def process(self, data):
+        text = self.feedText(data)
+        self.dispatchText(text)
+        return self.splitText(text)
+
+# ------------------------------------------------------------------------------------------------------------
+# Backend Log Buffer
+#
+# Keeps the most recent backend output lines, up to a fixed amount of characters.
+# Each line gets a sequence number so readers can fetch only what is new since their last read.
+
+class BackendLogBuffer(object):
+    def __init__(self, maxSize=BACKEND_LOG_SIZE):
+        self.fMaxSize = maxSize
+        self.fLines   = deque()
+        self.fSize    = 0
+        self.fLastSeq = 0
+
+    def clear(self):
+        self.fLines.clear()
+        self.fSize = 0
+
+    def lastSeq(self):
+        return self.fLastSeq
+
+    # Sequence number of the oldest line still in the buffer
+    def firstSeq(self):
+        return self.fLastSeq - len(self.fLines) + 1
+
+    def append(self, lines):
+        for line in lines:
+            self.fLines.append(line)
+            self.fSize += len(line)
+
+        self.fLastSeq += len(lines)
+
+        while self.fSize > self.fMaxSize and self.fLines:
+            self.fSize -= len(self.fLines.popleft())
+
+    # Get lines newer than @a seq, returns (lines, lastSeq, dropped)
+    # dropped is the number of lines that were overwritten before they could be read
+    def linesSince(self, seq):
+        count = self.fLastSeq - seq
+
+        if count <= 0:
+            return ([], self.fLastSeq, 0)
+
+        dropped = max(0, count - len(self.fLines))
+        count  -= dropped
+
+        if count == len(self.fLines):
+            lines = list(self.fLines)
+        else:
+            # walk back from the newest line, only what's needed
+            lines = [self.fLines[-i] for i in range(count, 0, -1)]
+
+        return (lines, self.fLastSeq, dropped)
+
+# ------------------------------------------------------------------------------------------------------------
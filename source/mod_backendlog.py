@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSlot
+    from PyQt4.QtGui import QFont
+    from PyQt4.QtGui import QCheckBox, QDialog, QHBoxLayout, QLabel, QLineEdit, QPlainTextEdit, QPushButton, QVBoxLayout
+else:
+    from PyQt5.QtCore import pyqtSlot
+    from PyQt5.QtGui import QFont
+    from PyQt5.QtWidgets import QCheckBox, QDialog, QHBoxLayout, QLabel, QLineEdit, QPlainTextEdit, QPushButton, QVBoxLayout
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Idle)
+
+from mod_idle import IDLE_PRIORITY_LOW
+
+# ------------------------------------------------------------------------------------------------------------
+# Log window settings
+
+# Lines shown at once, older ones are removed by the text widget
+BACKEND_LOG_MAX_BLOCKS = 5000
+
+# How often new lines are fetched from the buffer, in ms
+BACKEND_LOG_UPDATE_INTERVAL = 250
+
+# ------------------------------------------------------------------------------------------------------------
+# Backend Log Window
+#
+# Shows the contents of a BackendLogBuffer.
+# New lines are appended in batches by an idle task that only exists while the window is visible,
+# so a backend printing thousands of lines per second costs at most one text update per interval.
+
+class BackendLogWindow(QDialog):
+    def __init__(self, parent, logBuffer, idleScheduler):
+        QDialog.__init__(self, parent)
+
+        self.fBuffer  = logBuffer
+        self.fIdle    = idleScheduler
+        self.fLastSeq = 0
+        self.fFilter  = ""
+
+        # lines up to this one were cleared from the view, the buffer keeps them for other readers
+        self.fClearSeq = 0
+
+        # ----------------------------------------------------------------------------------------------------
+        # Set up GUI
+
+        self.setWindowTitle(self.tr("Backend Log"))
+        self.resize(800, 500)
+
+        self.ui_text = QPlainTextEdit(self)
+        self.ui_text.setReadOnly(True)
+        self.ui_text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.ui_text.setMaximumBlockCount(BACKEND_LOG_MAX_BLOCKS)
+        self.ui_text.setUndoRedoEnabled(False)
+
+        font = QFont("Monospace")
+        font.setStyleHint(QFont.TypeWriter)
+        self.ui_text.setFont(font)
+
+        self.ui_filter = QLineEdit(self)
+        self.ui_filter.setPlaceholderText(self.tr("Filter"))
+
+        self.ui_pause = QCheckBox(self.tr("Pause"), self)
+
+        self.ui_status = QLabel(self)
+
+        self.ui_clear = QPushButton(self.tr("Clear"), self)
+        self.ui_close = QPushButton(self.tr("Close"), self)
+
+        bottomLayout = QHBoxLayout()
+        bottomLayout.addWidget(self.ui_filter)
+        bottomLayout.addWidget(self.ui_pause)
+        bottomLayout.addWidget(self.ui_status, 1)
+        bottomLayout.addWidget(self.ui_clear)
+        bottomLayout.addWidget(self.ui_close)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.ui_text)
+        layout.addLayout(bottomLayout)
+
+        # ----------------------------------------------------------------------------------------------------
+        # Set-up connections
+
+        self.ui_filter.textChanged.connect(self.slot_filterChanged)
+        self.ui_pause.toggled.connect(self.slot_pauseToggled)
+        self.ui_clear.clicked.connect(self.slot_clear)
+        self.ui_close.clicked.connect(self.close)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    @pyqtSlot()
+    def slot_update(self):
+        lines, self.fLastSeq, dropped = self.fBuffer.linesSince(self.fLastSeq)
+
+        if self.fFilter:
+            lines = [line for line in lines if self.fFilter in line.lower()]
+
+        if dropped > 0:
+            self.ui_status.setText(self.tr("%i lines skipped") % dropped)
+
+        if not lines:
+            return
+
+        # only the last lines would survive the block limit anyway
+        if len(lines) > BACKEND_LOG_MAX_BLOCKS:
+            lines = lines[-BACKEND_LOG_MAX_BLOCKS:]
+
+        scrollBar = self.ui_text.verticalScrollBar()
+        atBottom  = scrollBar.value() == scrollBar.maximum()
+
+        self.ui_text.appendPlainText("\n".join(lines))
+
+        if atBottom:
+            scrollBar.setValue(scrollBar.maximum())
+
+    @pyqtSlot(str)
+    def slot_filterChanged(self, text):
+        self.fFilter = text.strip().lower()
+        self.reload()
+
+    @pyqtSlot(bool)
+    def slot_pauseToggled(self, paused):
+        if paused:
+            self.stopUpdates()
+        elif self.isVisible():
+            self.startUpdates()
+
+    @pyqtSlot()
+    def slot_clear(self):
+        self.fClearSeq = self.fBuffer.lastSeq()
+        self.reload()
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def startUpdates(self):
+        self.fIdle.addPeriodic("backend log", self.slot_update, BACKEND_LOG_UPDATE_INTERVAL, IDLE_PRIORITY_LOW, True)
+
+    def stopUpdates(self):
+        self.fIdle.remove("backend log")
+
+    # Show everything still in the buffer again (since the last clear), used when the filter changes
+    def reload(self):
+        self.ui_text.clear()
+        self.ui_status.clear()
+        self.fLastSeq = max(self.fBuffer.firstSeq() - 1, self.fClearSeq)
+        self.slot_update()
+
+    # --------------------------------------------------------------------------------------------------------
+    # Qt events
+
+    def showEvent(self, event):
+        QDialog.showEvent(self, event)
+
+        # catch up with what was missed while hidden
+        if not self.ui_pause.isChecked():
+            self.startUpdates()
+
+    def hideEvent(self, event):
+        self.stopUpdates()
+        QDialog.hideEvent(self, event)
+
+# ------------------------------------------------------------------------------------------------------------
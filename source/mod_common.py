@@ -16,39 +16,104 @@
 #
 # For a full copy of the GNU General Public License see the LICENSE file.
 
+using_Qt4 = False
+
 # ------------------------------------------------------------------------------------------------------------
-# Generate a random port number between 9000 and 18000
+# Imports (Global)
 
-from random import random
+import os
+import re
+import socket
+import sys
 
-_PORT = str(8998 + int(random()*9000))
-using_Qt4 = False
+if using_Qt4:
+    from PyQt4.QtCore import QDir, QSettings
+else:
+    from PyQt5.QtCore import QDir, QSettings
+
+# ------------------------------------------------------------------------------------------------------------
+# Instance name, set with "--instance NAME"
+#
+# Each named instance has its own data dir and settings, so several of them can run on the same machine.
+# The arguments are removed from sys.argv so they are not mistaken for a pedalboard to load.
+
+def _takeInstanceArg():
+    for i, arg in enumerate(sys.argv):
+        if arg.startswith("--instance="):
+            del sys.argv[i]
+            return arg.split("=", 1)[1]
+
+        if arg == "--instance" and i+1 < len(sys.argv):
+            name = sys.argv[i+1]
+            del sys.argv[i:i+2]
+            return name
+
+    return os.getenv("MOD_APP_INSTANCE", "")
+
+INSTANCE = re.sub(r"[^A-Za-z0-9_-]", "_", _takeInstanceArg())
+
+# Application name used for settings
+if INSTANCE:
+    APP_NAME = "MOD-App-%s" % INSTANCE
+else:
+    APP_NAME = "MOD-App"
+
+# ------------------------------------------------------------------------------------------------------------
+# Port allocation
+#
+# Ports are handed out by the OS, so concurrent instances never get the same ones.
+# Their sockets stay bound until whoever uses the ports has them, so nobody else can take them meanwhile.
+
+# Reserve a block of @a blockSize consecutive ports, returns the first port and the sockets holding them.
+# Each port is bound exclusively, then opened up for address reuse: the sockets never listen, so a process
+# binding the ports with SO_REUSEADDR (like mod-host does) can still do so, but nobody else. See releasePorts().
+def reservePorts(blockSize=1):
+    while True:
+        sockets = []
+        port    = 0
+
+        try:
+            for i in range(blockSize):
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sockets.append(sock)
+                sock.bind(("127.0.0.1", port+i if port else 0))
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                port = sockets[0].getsockname()[1]
+
+        except OSError:
+            # the next ports in the block were not free, try elsewhere
+            releasePorts(sockets)
+            continue
+
+        return (port, sockets)
+
+def releasePorts(sockets):
+    for sock in sockets:
+        sock.close()
+
+# Pair of ports for a backend process (main and feedback), returns the ports and their reservation.
+# mod-ui connects to the feedback port right after the main one, so they are consecutive.
+def reserveBackendPorts():
+    port, sockets = reservePorts(2)
+    return ((port, port+1), sockets)
+
+# Webserver socket, bound to a port picked by the OS and handed to tornado as it is (see mod_server).
+# It only starts listening once the webserver runs, but the port is ours from here on.
+WEBSERVER_SOCKET = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+WEBSERVER_SOCKET.bind(("0.0.0.0", 0))
 
 # ------------------------------------------------------------------------------------------------------------
 # Mod-App Configuration
 
 config = {
     # Address used for the webserver
-    "addr": "http://127.0.0.1:%s" % _PORT,
+    "addr": "http://127.0.0.1:%i" % WEBSERVER_SOCKET.getsockname()[1],
     # Port used for the webserver
-    "port": _PORT,
+    "port": str(WEBSERVER_SOCKET.getsockname()[1]),
     # MOD-App version
     "version": "0.0.1"
 }
 
-del _PORT
-
-# ------------------------------------------------------------------------------------------------------------
-# Imports (Global)
-
-import os
-import sys
-
-if using_Qt4:
-    from PyQt4.QtCore import QDir, QSettings
-else:
-    from PyQt5.QtCore import QDir, QSettings
-
 # ------------------------------------------------------------------------------------------------------------
 # Set CWD
 
@@ -99,7 +164,15 @@ if USING_CUSTOM_MOD_UI:
 else:
     ROOT = "/usr/share/mod"
 
-DATA_DIR = os.path.expanduser("~/.local/share/mod-data/")
+if INSTANCE:
+    DATA_DIR = os.path.expanduser("~/.local/share/mod-data-%s/" % INSTANCE)
+else:
+    DATA_DIR = os.path.expanduser("~/.local/share/mod-data/")
+
+PEDALBOARD_INDEX_FILE = os.path.join(DATA_DIR, "pedalboards-index.json")
+THUMBNAILS_CACHE_DIR  = os.path.join(DATA_DIR, "thumbnails-cache")
+WEB_CACHE_DIR         = os.path.join(DATA_DIR, "web-cache")
+REMOTE_CACHE_DIR      = os.path.join(DATA_DIR, "remote-cache")
 
 os.environ['MOD_DEV_HMI']         = "1"
 os.environ['MOD_DEV_HOST']        = "0"
@@ -114,6 +187,32 @@ os.environ['MOD_HTML_DIR']           = os.path.join(ROOT, "html")
 
 os.environ['MOD_DEVICE_WEBSERVER_PORT'] = config["port"]
 
+# ------------------------------------------------------------------------------------------------------------
+# Pedalboard locations
+
+# Where mod-ui saves user pedalboards, same default as mod-ui itself
+PEDALBOARDS_DIR = os.path.expanduser(os.getenv("MOD_USER_PEDALBOARDS_DIR", "~/.pedalboards"))
+
+# lilv's search path when LV2_PATH is not set
+if MACOS:
+    LV2_DEFAULT_PATH = "~/.lv2:~/Library/Audio/Plug-Ins/LV2:/usr/local/lib/lv2:/usr/lib/lv2:/Library/Audio/Plug-Ins/LV2"
+elif WINDOWS:
+    LV2_DEFAULT_PATH = "%APPDATA%\\LV2;%COMMONPROGRAMFILES%\\LV2"
+else:
+    LV2_DEFAULT_PATH = "~/.lv2:/usr/lib/lv2:/usr/local/lib/lv2"
+
+# Directories holding pedalboard bundles, the user ones first.
+# Same places get_all_pedalboards() looks in: the user pedalboards plus everything lilv loads.
+def getPedalboardDirs():
+    dirs = [PEDALBOARDS_DIR]
+
+    for path in os.getenv("LV2_PATH", LV2_DEFAULT_PATH).split(os.pathsep):
+        path = os.path.expandvars(os.path.expanduser(path)) if path else ""
+        if path and path not in dirs:
+            dirs.append(path)
+
+    return dirs
+
 # ------------------------------------------------------------------------------------------------------------
 # Settings keys
 
@@ -124,11 +223,13 @@ MOD_KEY_MAIN_REFRESH_INTERVAL    = "Main/RefreshInterval"  # int
 # Host
 MOD_KEY_HOST_VERBOSE             = "Host/Verbose"          # bool
 MOD_KEY_HOST_PATH                = "Host/Path2"            # str
+MOD_KEY_HOST_READY_TIMEOUT       = "Host/ReadyTimeout"     # int
 
 # WebView
 MOD_KEY_WEBVIEW_INSPECTOR        = "WebView/Inspector"     # bool
 MOD_KEY_WEBVIEW_VERBOSE          = "WebView/Verbose"       # bool
 MOD_KEY_WEBVIEW_SHOW_INSPECTOR   = "WebView/ShowInspector" # bool
+MOD_KEY_WEBVIEW_IN_PROCESS       = "WebView/InProcess"     # bool
 
 # ------------------------------------------------------------------------------------------------------------
 # Settings defaults
@@ -144,16 +245,19 @@ MOD_DEFAULT_HOST_PATH             = os.path.join(os.path.dirname(__file__), "mod
 if not os.path.exists(MOD_DEFAULT_HOST_PATH):
     MOD_DEFAULT_HOST_PATH = "/usr/bin/mod-host"
 
+MOD_DEFAULT_HOST_READY_TIMEOUT    = 10000
+
 # WebView
 MOD_DEFAULT_WEBVIEW_INSPECTOR       = False
 MOD_DEFAULT_WEBVIEW_VERBOSE         = False
 MOD_DEFAULT_WEBVIEW_SHOW_INSPECTOR  = False
+MOD_DEFAULT_WEBVIEW_IN_PROCESS      = False
 
 # ------------------------------------------------------------------------------------------------------------
 # Set initial settings
 
 def setInitialSettings():
-    qsettings = QSettings("MOD", "MOD-App")
+    qsettings = QSettings("MOD", APP_NAME)
     webviewVerbose = qsettings.value(MOD_KEY_WEBVIEW_VERBOSE, MOD_DEFAULT_WEBVIEW_VERBOSE, type=bool)
     del qsettings
 
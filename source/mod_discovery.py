@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSignal, pyqtSlot, QObject, QTimer, QUrl
+    from PyQt4.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+else:
+    from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject, QTimer, QUrl
+    from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+import json
+
+from time import time
+
+# ------------------------------------------------------------------------------------------------------------
+# Discovery settings
+
+# Bluetooth PAN addresses probed, 192.168.50.1 up to this
+DISCOVERY_BT_COUNT = 8
+
+# Time (ms) each link gets to answer each probe request
+DISCOVERY_TIMEOUT = 2000
+
+# Data size used to rank links, a link's score is the estimated time to load this many bytes
+DISCOVERY_SCORE_BYTES = 1024*1024
+
+# ------------------------------------------------------------------------------------------------------------
+# Link Probe
+#
+# Measures one link: the round-trip time of a small request (mod-ui's /system/info), then the throughput
+# of loading the UI's index page. Any HTTP answer counts as reachable, even an error status.
+# @a link is the caller's link type (Bluetooth, LAN or USB), it is only passed along with the results.
+
+class LinkProbe(QObject):
+    # signals
+    finished = pyqtSignal(object) # self
+
+    def __init__(self, parent, manager, link, url):
+        QObject.__init__(self, parent)
+
+        self.fManager  = manager
+        self.fReply    = None
+        self.fCallback = None
+
+        # results
+        self.link       = link
+        self.url        = QUrl(url)
+        self.reachable  = False
+        self.rtt        = 0.0
+        self.throughput = 0.0
+        self.identity   = ""
+
+        self.fTimer = QTimer(self)
+        self.fTimer.setInterval(DISCOVERY_TIMEOUT)
+        self.fTimer.setSingleShot(True)
+        self.fTimer.timeout.connect(self.slot_timeout)
+
+    def start(self):
+        self.request("/system/info", self.slot_infoFinished)
+
+    def abort(self):
+        self.fTimer.stop()
+
+        if self.fReply is None:
+            return
+
+        reply, self.fReply = self.fReply, None
+        reply.finished.disconnect(self.fCallback)
+        reply.abort()
+        reply.deleteLater()
+
+    def toDict(self):
+        return {
+            'link':       self.link,
+            'url':        self.url.toString(),
+            'rtt':        self.rtt,
+            'throughput': self.throughput,
+            'identity':   self.identity,
+        }
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def request(self, path, callback):
+        url = QUrl(self.url)
+        url.setPath(path)
+
+        request = QNetworkRequest(url)
+        request.setAttribute(QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.AlwaysNetwork)
+        request.setAttribute(QNetworkRequest.CacheSaveControlAttribute, False)
+
+        # each request gets the whole timeout, a slow link still has time to load the index page
+        self.fStartTime = time()
+        self.fReply     = self.fManager.get(request)
+        self.fCallback  = callback
+        self.fReply.finished.connect(callback)
+        self.fTimer.start()
+
+    def takeReply(self):
+        self.fTimer.stop()
+        reply, self.fReply = self.fReply, None
+        reply.deleteLater()
+
+        # no status code means there was no HTTP answer at all
+        if reply.attribute(QNetworkRequest.HttpStatusCodeAttribute) is None:
+            return None
+
+        return bytes(reply.readAll())
+
+    def done(self):
+        self.fTimer.stop()
+        self.finished.emit(self)
+
+    @pyqtSlot()
+    def slot_infoFinished(self):
+        elapsed = time() - self.fStartTime
+        data    = self.takeReply()
+
+        if data is None:
+            self.done()
+            return
+
+        self.reachable = True
+        self.rtt       = elapsed
+
+        try:
+            info = json.loads(data.decode("utf-8", errors="replace"))
+        except ValueError:
+            info = None
+
+        if isinstance(info, dict):
+            for key in ("uid", "serial"):
+                if info.get(key):
+                    self.identity = str(info[key])
+                    break
+
+        self.request("/", self.slot_indexFinished)
+
+    @pyqtSlot()
+    def slot_indexFinished(self):
+        elapsed = time() - self.fStartTime
+        data    = self.takeReply()
+
+        # the index request started after the round-trip was measured, its transfer time is what's left
+        if data:
+            self.throughput = len(data) / max(elapsed - self.rtt, 0.001)
+
+        self.done()
+
+    @pyqtSlot()
+    def slot_timeout(self):
+        self.abort()
+        self.done()
+
+# ------------------------------------------------------------------------------------------------------------
+# Device Discovery
+#
+# Probes a list of candidate links all at once, reporting each reachable link as soon as it is measured.
+# Links to the same device (same identity, when the device reports one) can be compared with getBestLink().
+
+class DeviceDiscovery(QObject):
+    # signals
+    linkFound = pyqtSignal(object) # dict, see LinkProbe.toDict
+    finished  = pyqtSignal()
+
+    def __init__(self, parent):
+        QObject.__init__(self, parent)
+
+        self.fManager = QNetworkAccessManager(self)
+        self.fProbes  = []
+        self.fPending = 0
+        self.fResults = []
+
+    def isRunning(self):
+        return self.fPending > 0
+
+    def results(self):
+        return list(self.fResults)
+
+    # Probe each (link, url) in @a candidates, duplicates are probed once
+    def start(self, candidates):
+        self.abort()
+        self.fResults = []
+
+        seen = set()
+
+        for link, url in candidates:
+            url = QUrl(url)
+            key = url.toString()
+
+            if key in seen:
+                continue
+            seen.add(key)
+
+            probe = LinkProbe(self, self.fManager, link, url)
+            probe.finished.connect(self.slot_probeFinished)
+            self.fProbes.append(probe)
+
+        self.fPending = len(self.fProbes)
+
+        for probe in self.fProbes:
+            probe.start()
+
+        if self.fPending == 0:
+            self.finished.emit()
+
+    def abort(self):
+        for probe in self.fProbes:
+            probe.finished.disconnect(self.slot_probeFinished)
+            probe.abort()
+            probe.deleteLater()
+
+        self.fProbes  = []
+        self.fPending = 0
+
+    @pyqtSlot(object)
+    def slot_probeFinished(self, probe):
+        self.fPending -= 1
+
+        if probe.reachable:
+            result = probe.toDict()
+            self.fResults.append(result)
+            self.linkFound.emit(result)
+
+        if self.fPending == 0:
+            for probe in self.fProbes:
+                probe.deleteLater()
+            self.fProbes = []
+            self.finished.emit()
+
+# ------------------------------------------------------------------------------------------------------------
+# Pick the link to use from @a results (dicts, as given by LinkProbe.toDict).
+# Only links known to reach the same device are compared: the ones to @a identity when it was found,
+# else the ones sharing the identity of @a lastUrl (or just that link, for devices without one).
+# Failing that, a choice is only made when all links go to a single device, otherwise None is returned.
+
+# Estimated time (seconds) to load DISCOVERY_SCORE_BYTES over a link, lower is better
+def getLinkScore(result):
+    if result['throughput'] <= 0.0:
+        return result['rtt'] + 1000.0
+
+    return result['rtt'] + DISCOVERY_SCORE_BYTES / result['throughput']
+
+def getBestLink(results, identity="", lastUrl=""):
+    if identity:
+        sameDevice = [result for result in results if result['identity'] == identity]
+        if sameDevice:
+            return min(sameDevice, key=getLinkScore)
+
+    if lastUrl:
+        for result in results:
+            if QUrl(result['url']) != QUrl(lastUrl):
+                continue
+            if not result['identity']:
+                return result
+            return min((r for r in results if r['identity'] == result['identity']), key=getLinkScore)
+
+    # links without an identity can't be told apart, each counts as a device of its own
+    devices = set(result['identity'] or result['url'] for result in results)
+
+    if len(devices) != 1:
+        return None
+
+    return min(results, key=getLinkScore)
+
+# ------------------------------------------------------------------------------------------------------------
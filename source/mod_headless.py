@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Headless mode, runs the backend and webserver without any window
+#
+# Started with "mod-app --headless", the UI is then used from a regular browser.
+# Nothing in here may import Qt widgets or WebKit.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSignal, pyqtSlot, QCoreApplication, QObject, QSettings, QTimer
+else:
+    from PyQt5.QtCore import pyqtSignal, pyqtSlot, QCoreApplication, QObject, QSettings, QTimer
+
+from signal import signal, SIGINT, SIGTERM
+
+try:
+    from signal import SIGHUP, SIGUSR2
+    haveSIGHUP = True
+except:
+    haveSIGHUP = False
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Server)
+
+from mod_idle import SignalWakeup
+from mod_server import HostServer, SESSION
+from mod_trace import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Headless Host
+
+class HeadlessHost(QObject):
+    # signals
+    SIGTERM = pyqtSignal()
+    SIGHUP  = pyqtSignal()
+    SIGUSR2 = pyqtSignal()
+
+    def __init__(self):
+        traceAsyncBegin("startup")
+        QObject.__init__(self)
+
+        # exit code once everything has stopped
+        self.fExitCode = 0
+        self.fQuitting = False
+
+        # the old backend stops during a restart, that's not a reason to quit
+        self.fRestarting = False
+
+        # the webserver ran once, later starts (restarts) are not part of startup
+        self.fStartupFinished = False
+
+        self.fServer = HostServer(self)
+        self.loadSettings()
+
+        # python only handles signals when it gets to run, this wakes up the event loop for it
+        self.fSignalWakeup = SignalWakeup(self)
+
+        # ----------------------------------------------------------------------------------------------------
+        # Set-up connections
+
+        self.SIGTERM.connect(self.slot_handleSIGTERM)
+        self.SIGHUP.connect(self.slot_handleSIGHUP)
+        self.SIGUSR2.connect(self.slot_handleSIGUSR2)
+
+        self.fServer.backendStarted.connect(self.slot_backendStarted)
+        self.fServer.backendFinished.connect(self.slot_backendFinished)
+        self.fServer.restartFinished.connect(self.slot_restartFinished)
+        self.fServer.backendError.connect(self.slot_backendError)
+        self.fServer.webServerRunning.connect(self.slot_webServerRunning)
+        self.fServer.webServerFailed.connect(self.slot_webServerFailed)
+
+        SESSION.setupApp(self._pedal_changed_callback)
+
+    def _pedal_changed_callback(self, ok, bundlepath, title):
+        print("Pedalboard loaded:", title or bundlepath)
+
+    def start(self):
+        self.fServer.start()
+
+    # Stop everything and quit with @a exitCode
+    def quit(self, exitCode=0):
+        if self.fQuitting:
+            return
+
+        self.fQuitting = True
+        self.fExitCode = exitCode
+        self.fServer.stop(self.slot_stopped)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    @pyqtSlot()
+    def slot_webServerRunning(self):
+        if not self.fStartupFinished:
+            self.fStartupFinished = True
+            traceAsyncEnd("startup")
+
+        print("MOD-App is ready at", config["addr"])
+
+    @pyqtSlot(str)
+    def slot_webServerFailed(self, error):
+        print("Could not connect to host backend:", error)
+        self.quit(1)
+
+    @pyqtSlot()
+    def slot_backendStarted(self):
+        # a cold restart is past stopping the old backend, exits from now on are unexpected
+        self.fRestarting = False
+
+    @pyqtSlot(int, int)
+    def slot_backendFinished(self, exitCode, exitStatus):
+        if self.fQuitting or self.fRestarting:
+            return
+
+        # let the service manager decide what to do
+        print("Backend stopped unexpectedly with exit code", exitCode)
+        self.quit(1)
+
+    @pyqtSlot(int, str)
+    def slot_backendError(self, error, errorMessage):
+        print("Host backend error:", errorMessage)
+        self.quit(1)
+
+    @pyqtSlot()
+    def slot_restartFinished(self):
+        self.fRestarting = False
+
+    @pyqtSlot()
+    def slot_stopped(self):
+        dumpTrace()
+        QCoreApplication.instance().exit(self.fExitCode)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    @pyqtSlot()
+    def slot_handleSIGTERM(self):
+        print("Got SIGTERM -> Closing now")
+        self.quit(0)
+
+    @pyqtSlot()
+    def slot_handleSIGHUP(self):
+        print("Got SIGHUP -> Reloading settings and restarting backend")
+        self.loadSettings()
+        self.fRestarting = True
+        self.fServer.restart()
+
+    @pyqtSlot()
+    def slot_handleSIGUSR2(self):
+        print("Got SIGUSR2 -> Writing trace now")
+        dumpTrace()
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def loadSettings(self):
+        qsettings = QSettings()
+
+        self.fServer.setSettings({
+            MOD_KEY_HOST_VERBOSE:       qsettings.value(MOD_KEY_HOST_VERBOSE,       MOD_DEFAULT_HOST_VERBOSE,       type=bool),
+            MOD_KEY_HOST_PATH:          qsettings.value(MOD_KEY_HOST_PATH,          MOD_DEFAULT_HOST_PATH,          type=str),
+            MOD_KEY_HOST_READY_TIMEOUT: qsettings.value(MOD_KEY_HOST_READY_TIMEOUT, MOD_DEFAULT_HOST_READY_TIMEOUT, type=int),
+        })
+
+# ------------------------------------------------------------------------------------------------------------
+# Main
+
+def runHeadless():
+    app = QCoreApplication(sys.argv)
+    app.setApplicationName(APP_NAME)
+    app.setApplicationVersion(config["version"])
+    app.setOrganizationName("MOD")
+
+    host = HeadlessHost()
+
+    def signalHandler(sig, frame):
+        if sig in (SIGINT, SIGTERM):
+            host.SIGTERM.emit()
+        elif haveSIGHUP and sig == SIGHUP:
+            host.SIGHUP.emit()
+        elif haveSIGHUP and sig == SIGUSR2:
+            host.SIGUSR2.emit()
+
+    signal(SIGINT,  signalHandler)
+    signal(SIGTERM, signalHandler)
+
+    if haveSIGHUP:
+        signal(SIGHUP,  signalHandler)
+        signal(SIGUSR2, signalHandler)
+
+    QTimer.singleShot(0, host.start)
+
+    return app.exec_()
+
+# ------------------------------------------------------------------------------------------------------------
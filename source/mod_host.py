@@ -19,93 +19,49 @@
 # ------------------------------------------------------------------------------------------------------------
 # Imports (Custom)
 
-from mod_settings import *
+from mod_common import *
 
 # ------------------------------------------------------------------------------------------------------------
 # Imports (Global)
 
 if using_Qt4:
-    from PyQt4.QtCore import pyqtSignal, pyqtSlot, qCritical, qWarning, Qt, QFileInfo, QProcess, QSettings, QSize, QThread, QTimer, QUrl
-    from PyQt4.QtGui import QDesktopServices, QImage, QPainter, QPixmap
-    from PyQt4.QtGui import QAction, QApplication, QDialog, QFileDialog, QInputDialog, QLineEdit, QListWidgetItem
+    from PyQt4.QtCore import pyqtSignal, pyqtSlot, qCritical, qWarning, Qt, QFileInfo, QObject, QProcess, QSettings, QSize, QThread, QTimer, QUrl
+    from PyQt4.QtGui import QDesktopServices, QIcon, QImage, QPainter, QPixmap
+    from PyQt4.QtGui import QAction, QApplication, QDialog, QFileDialog, QInputDialog, QLineEdit
     from PyQt4.QtGui import QMainWindow, QMessageBox, QPlainTextEdit, QVBoxLayout
+    from PyQt4.QtNetwork import QNetworkAccessManager
     from PyQt4.QtWebKit import QWebSettings
     from PyQt4.QtWebKit import QWebInspector, QWebPage, QWebView
 else:
-    from PyQt5.QtCore import pyqtSignal, pyqtSlot, qCritical, qWarning, Qt, QFileInfo, QProcess, QSettings, QSize, QThread, QTimer, QUrl
-    from PyQt5.QtGui import QDesktopServices, QImage, QPainter, QPixmap
-    from PyQt5.QtWidgets import QAction, QApplication, QDialog, QFileDialog, QInputDialog, QLineEdit, QListWidgetItem
+    from PyQt5.QtCore import pyqtSignal, pyqtSlot, qCritical, qWarning, Qt, QFileInfo, QObject, QProcess, QSettings, QSize, QThread, QTimer, QUrl
+    from PyQt5.QtGui import QDesktopServices, QIcon, QImage, QPainter, QPixmap
+    from PyQt5.QtWidgets import QAction, QApplication, QDialog, QFileDialog, QInputDialog, QLineEdit
     from PyQt5.QtWidgets import QMainWindow, QMessageBox, QPlainTextEdit, QVBoxLayout
+    from PyQt5.QtNetwork import QNetworkAccessManager
     from PyQt5.QtWebKit import QWebSettings
     from PyQt5.QtWebKitWidgets import QWebInspector, QWebPage, QWebView
 
-from tornado.ioloop import IOLoop
-
 # ------------------------------------------------------------------------------------------------------------
 # Imports (UI)
 
 from ui_mod_host import Ui_HostWindow
-from ui_mod_pedalboard_open import Ui_PedalboardOpen
-from ui_mod_pedalboard_save import Ui_PedalboardSave
-
-# ------------------------------------------------------------------------------------------------------------
-# Import (WebServer)
-
-# need to set initial settings before importing MOD stuff
-setInitialSettings()
-
-from mod import webserver
-from mod.session import SESSION
-from modtools.utils import get_bundle_dirname, get_all_pedalboards, get_pedalboard_info
-
-# ------------------------------------------------------------------------------------------------------------
-# Imports (asyncio)
 
-try:
-    from asyncio import new_event_loop, set_event_loop
-    haveAsyncIO = True
-except:
-    haveAsyncIO = False
+# dialogs and other rarely used windows (settings, backend log) are imported where first used
 
 # ------------------------------------------------------------------------------------------------------------
-# WebServer Thread
-
-class WebServerThread(QThread):
-    # signals
-    running = pyqtSignal()
-
-    # globals
-    prepareWasCalled = False
-
-    def __init__(self, parent=None):
-        QThread.__init__(self, parent)
-        self.eventLoop = None
-
-    def checkReady(self):
-        if not SESSION.host.connected:
-            IOLoop.instance().call_later(0.25, self.checkReady)
-            return
-        self.running.emit()
-
-    def run(self):
-        if haveAsyncIO:
-            self.eventLoop = new_event_loop()
-            set_event_loop(self.eventLoop)
-
-        SESSION.host.init_host()
+# Imports (Server)
 
-        if not self.prepareWasCalled:
-            self.prepareWasCalled = True
-            webserver.prepare(True)
+# sets initial settings, needs to happen before importing other MOD stuff
+from mod_server import HostServer, SESSION, loadWebServer
 
-        self.checkReady()
-        webserver.start()
+from mod_idle import IdleScheduler
+from mod_pedalboards import PedalboardSearchIndex
+from mod_scanner import PedalboardScanThread, PedalboardWatcher, PEDALBOARDS_STATE_PARTIAL, PEDALBOARDS_STATE_READY
+from mod_trace import *
+from mod_webcache import WebDiskCache
 
-    def stopWait(self):
-        webserver.stop()
-        if self.eventLoop is not None:
-            self.eventLoop.call_soon_threadsafe(self.eventLoop.stop)
-        return self.wait(5000)
+# The in-process transport is only imported when MOD_KEY_WEBVIEW_IN_PROCESS is enabled, see createNetworkManager().
+# Startup time is measured up to the window being shown, see tests/check-import-time.py.
 
 # ------------------------------------------------------------------------------------------------------------
 # Host WebPage
@@ -146,10 +102,21 @@ class HostWindow(QMainWindow):
     # signals
     SIGTERM = pyqtSignal()
     SIGUSR1 = pyqtSignal()
+    SIGUSR2 = pyqtSignal()
+
+    # emitted whenever fPedalboards or fPedalboardsState changes, with the current PEDALBOARDS_STATE_*
+    pedalboardsChanged = pyqtSignal(int)
+
+    # emitted before pedalboardsChanged when the scanner found or removed pedalboards,
+    # with the new or changed bundles and the removed ones
+    pedalboardsUpdated = pyqtSignal(list, list)
 
     # --------------------------------------------------------------------------------------------------------
 
     def __init__(self):
+        traceAsyncBegin("startup")
+        traceBegin("HostWindow.__init__")
+
         QMainWindow.__init__(self)
         self.ui = Ui_HostWindow()
         self.ui.setupUi(self)
@@ -164,14 +131,14 @@ class HostWindow(QMainWindow):
         # Next bundle to load (done by startup arguments)
         self.fNextBundle = ""
 
+        # the UI was ready once, later page loads (refresh, restarts) are not part of startup
+        self.fStartupFinished = False
+
         # first attempt of auto-start backend doesn't show an error
         self.fFirstBackendInit = True
 
-        # need to call session reconnect after connecting the 1st time
-        self.fNeedsSessionReconnect = False
-
-        # Qt idle timer
-        self.fIdleTimerId = 0
+        # Periodic and deferred work, all run from a single timer that is only armed when needed
+        self.fIdleScheduler = IdleScheduler(self)
 
         # Qt web frame, used for evaluating javascript
         self.fWebFrame = None
@@ -179,20 +146,32 @@ class HostWindow(QMainWindow):
         # to be filled with key-value pairs of current settings
         self.fSavedSettings = {}
 
-        # List of pedalboards
-        self.fPedalboards = get_all_pedalboards()
+        # List of pedalboards, filled progressively by the scanner thread
+        # check fPedalboardsState before assuming the list is complete
+        self.fPedalboards      = []
+        self.fPedalboardsDict  = {}
+        self.fPedalboardsState = PEDALBOARDS_STATE_PARTIAL
+
+        # Search index over pedalboard names and plugins, kept in sync with fPedalboardsDict
+        self.fPedalboardSearch = PedalboardSearchIndex()
 
         # List of current-pedalboard presets
         self.fPresetMenuList = []
 
-        # Process that runs the backend
-        self.fProccessBackend = QProcess(self)
-        self.fProccessBackend.setProcessChannelMode(QProcess.MergedChannels)
-        self.fProccessBackend.setReadChannel(QProcess.StandardOutput)
-        self.fStoppingBackend = False
+        # Backend process and webserver
+        self.fServer = HostServer(self)
+        self.fBackendLogWindow = None
+        self.fClosing = False
 
-        # Thread for managing the webserver
-        self.fWebServerThread = WebServerThread(self)
+        # Thread for scanning pedalboards, also owns the plugin users index (see queryPluginUsers())
+        self.fPedalboardScanner = PedalboardScanThread(self)
+
+        # Watcher for pedalboard changes on disk, started after the first scan
+        self.fPedalboardWatcher = PedalboardWatcher(PEDALBOARDS_DIR, self)
+        self.fPedalboardWatcherStarted = False
+
+        # Pedalboard thumbnails, created on first use
+        self.fThumbnailService = None
 
         # ----------------------------------------------------------------------------------------------------
         # Set up GUI
@@ -201,14 +180,22 @@ class HostWindow(QMainWindow):
         self.ui.webview.setMinimumWidth(980)
         self.ui.swp_webview.layout().addWidget(self.ui.webview)
 
+        # requests to the webserver can skip TCP, see MOD_KEY_WEBVIEW_IN_PROCESS and createNetworkManager()
+        self.fInProcessTransport = QSettings().value(MOD_KEY_WEBVIEW_IN_PROCESS, MOD_DEFAULT_WEBVIEW_IN_PROCESS, type=bool)
+        self.fNetworkManager = self.createNetworkManager(self.fInProcessTransport)
+
+        # otherwise mod-ui files are cached on disk across reloads, restarts and port changes
+        self.fWebCache = WebDiskCache(None)
+        self.fWebCache.addOrigin(QUrl(config["addr"]), "mod-ui")
+        self.fWebCache.install(self.fNetworkManager) # takes ownership
+
         self.ui.webpage = HostWebPage(self)
+        self.ui.webpage.setNetworkAccessManager(self.fNetworkManager)
         self.ui.webpage.setViewportSize(QSize(980, 600))
         self.ui.webview.setPage(self.ui.webpage)
 
-        self.ui.webinspector = QWebInspector(None)
-        self.ui.webinspector.resize(800, 600)
-        self.ui.webinspector.setPage(self.ui.webpage)
-        self.ui.webinspector.setVisible(False)
+        # created on first use, see showWebInspector()
+        self.ui.webinspector = None
 
         self.ui.act_file_connect.setEnabled(False)
         self.ui.act_file_connect.setVisible(False)
@@ -265,19 +252,30 @@ class HostWindow(QMainWindow):
         # Connect actions to functions
 
         self.SIGUSR1.connect(self.slot_handleSIGUSR1)
+        self.SIGUSR2.connect(self.slot_handleSIGUSR2)
         self.SIGTERM.connect(self.slot_handleSIGTERM)
 
-        self.fProccessBackend.error.connect(self.slot_backendError)
-        self.fProccessBackend.started.connect(self.slot_backendStarted)
-        self.fProccessBackend.finished.connect(self.slot_backendFinished)
-        self.fProccessBackend.readyRead.connect(self.slot_backendRead)
+        self.fServer.backendStarted.connect(self.slot_backendStarted)
+        self.fServer.backendFinished.connect(self.slot_backendFinished)
+        self.fServer.backendError.connect(self.slot_backendError)
+        self.fServer.webServerRunning.connect(self.slot_webServerRunning)
+        self.fServer.webServerFailed.connect(self.slot_webServerFailed)
+        self.fServer.webServerFinished.connect(self.slot_webServerFinished)
+
+        self.fPedalboardScanner.pedalboardsFound.connect(self.slot_pedalboardsFound)
+        self.fPedalboardScanner.pedalboardsRemoved.connect(self.slot_pedalboardsRemoved)
+        self.fPedalboardScanner.pluginLabelsFound.connect(self.slot_pluginLabelsFound)
+        self.fPedalboardScanner.scanFinished.connect(self.slot_pedalboardsScanFinished)
 
-        self.fWebServerThread.running.connect(self.slot_webServerRunning)
-        self.fWebServerThread.finished.connect(self.slot_webServerFinished)
+        self.fPedalboardWatcher.bundlesChanged.connect(self.slot_pedalboardBundlesChanged)
 
         self.ui.act_file_refresh.triggered.connect(self.slot_fileRefresh)
         self.ui.act_file_inspect.triggered.connect(self.slot_fileInspect)
 
+        self.ui.act_pedalboard_open.triggered.connect(self.slot_pedalboardOpen)
+
+        self.ui.act_backend_dump.triggered.connect(self.slot_backendDump)
+
         self.ui.act_settings_configure.triggered.connect(self.slot_configure)
 
         self.ui.act_help_about.triggered.connect(self.slot_about)
@@ -299,14 +297,18 @@ class HostWindow(QMainWindow):
         self.setProperWindowTitle()
         SESSION.setupApp(self._pedal_changed_callback)
 
+        self.fPedalboardScanner.requestFullScan()
+
         if not "--no-autostart" in sys.argv:
             QTimer.singleShot(0, self.slot_backendStart)
 
         QTimer.singleShot(1, self.fixWebViewSize)
 
+        traceEnd("HostWindow.__init__")
+
     def __del__(self):
-        self.stopAndWaitForWebServer()
-        self.stopAndWaitForBackend()
+        self.fPedalboardScanner.stopWait()
+        self.fServer.stopWait()
 
     def _pedal_changed_callback(self, ok, bundlepath, title):
         #self.fCurrentBundle = bundlepath
@@ -328,19 +330,43 @@ class HostWindow(QMainWindow):
 
     @pyqtSlot()
     def slot_fileInspect(self):
-        self.ui.webinspector.show()
+        self.showWebInspector()
+
+    # --------------------------------------------------------------------------------------------------------
+    # Pedalboard (menu actions)
+
+    @pyqtSlot()
+    def slot_pedalboardOpen(self):
+        from mod_pedalboard_open import PedalboardOpenWindow
+
+        dialog = PedalboardOpenWindow(self, self.thumbnailService())
+        accepted = dialog.exec_()
+        bundle = dialog.getSelectedBundle() if accepted else ""
+
+        # parented to us, would otherwise stay around (with its model and thumbnails) until the app quits
+        dialog.deleteLater()
+
+        if bundle:
+            self.openPedalboard(bundle)
 
     # --------------------------------------------------------------------------------------------------------
     # Settings (menu actions)
 
     @pyqtSlot()
     def slot_configure(self):
+        from mod_settings import SettingsWindow
+
         dialog = SettingsWindow(self, True)
         if not dialog.exec_():
             return
 
+        oldCommand = self.fServer.getBackendCommand()
         self.loadSettings(False)
 
+        # apply new host settings right away, this does not interrupt the UI
+        if self.fServer.getBackendCommand() != oldCommand and self.fServer.canSwitchBackend():
+            self.fServer.restart()
+
     # --------------------------------------------------------------------------------------------------------
     # About (menu actions)
 
@@ -379,24 +405,18 @@ class HostWindow(QMainWindow):
         QMessageBox.information(self, self.tr("information"), table)
 
     @pyqtSlot()
-    def slot_backendStart(self):
-        if self.fProccessBackend.state() != QProcess.NotRunning:
-            print("slot_backendStart ignored")
-            return
+    def slot_backendDump(self):
+        if self.fBackendLogWindow is None:
+            from mod_backendlog import BackendLogWindow
+            self.fBackendLogWindow = BackendLogWindow(self, self.fServer.logBuffer(), self.fIdleScheduler)
 
-        print("slot_backendStart in progress...")
+        self.fBackendLogWindow.show()
+        self.fBackendLogWindow.raise_()
+        self.fBackendLogWindow.activateWindow()
 
-        hostPath = self.fSavedSettings[MOD_KEY_HOST_PATH]
-        if hostPath.endswith("ingen"):
-            hostPath = MOD_DEFAULT_HOST_PATH
-
-        hostArgs = ["-p", "5555", "-f", "5556"]
-        if self.fSavedSettings[MOD_KEY_HOST_VERBOSE]:
-            hostArgs.append("-v")
-        else:
-            hostArgs.append("-n")
-
-        self.fProccessBackend.start(hostPath, hostArgs)
+    @pyqtSlot()
+    def slot_backendStart(self):
+        self.fServer.start()
 
     @pyqtSlot()
     def slot_backendStop(self):
@@ -412,18 +432,11 @@ class HostWindow(QMainWindow):
             #self.host.set_engine_about_to_close()
             #self.host.remove_all_plugins()
 
-        # testing red color for server stopped
-        self.ui.webview.blockSignals(True)
-        self.ui.webview.setHtml("<html><body bgcolor='green'></body></html>")
-        self.ui.webview.blockSignals(False)
-
-        self.stopAndWaitForWebServer()
-        self.stopAndWaitForBackend()
+        self.stopBackend()
 
     @pyqtSlot()
     def slot_backendRestart(self):
-        self.slot_backendStop()
-        self.slot_backendStart()
+        self.fServer.restart()
 
     # --------------------------------------------------------------------------------------------------------
 
@@ -435,10 +448,9 @@ class HostWindow(QMainWindow):
         self.ui.w_buttons.setEnabled(False)
         self.ui.label_progress.setText(self.tr("Loading backend..."))
 
-    @pyqtSlot(int, QProcess.ExitStatus)
+    @pyqtSlot(int, int)
     def slot_backendFinished(self, exitCode, exitStatus):
         self.fFirstBackendInit = False
-        self.fStoppingBackend = False
         self.ui.act_backend_start.setEnabled(True)
         self.ui.act_backend_stop.setEnabled(False)
         self.ui.act_backend_restart.setEnabled(False)
@@ -446,22 +458,12 @@ class HostWindow(QMainWindow):
         self.ui.label_progress.setText("")
         self.ui.stackedwidget.setCurrentIndex(0)
 
-        # stop webserver
-        self.stopAndWaitForWebServer()
-
-    @pyqtSlot(QProcess.ProcessError)
-    def slot_backendError(self, error):
+    @pyqtSlot(int, str)
+    def slot_backendError(self, error, errorMessage):
         firstBackendInit = self.fFirstBackendInit
         self.fFirstBackendInit = False
 
-        # stop webserver
-        self.stopAndWaitForWebServer()
-
-        # crashed while stopping, ignore
-        if error == QProcess.Crashed and self.fStoppingBackend:
-            return
-
-        errorStr = self.tr("Could not start host backend.\n") + self.getProcessErrorAsString(error)
+        errorStr = self.tr("Could not start host backend.\n") + errorMessage
         qWarning(errorStr)
 
         # don't show error if this is the first time starting the host or using live-iso
@@ -471,47 +473,50 @@ class HostWindow(QMainWindow):
         # show the error message
         QMessageBox.critical(self, self.tr("Error"), errorStr)
 
-    @pyqtSlot()
-    def slot_backendRead(self):
-        #if self.fProccessBackend.state() != QProcess.Running:
-            #return
+    # --------------------------------------------------------------------------------------------------------
+    # Pedalboards
 
-        for line in str(self.fProccessBackend.readAllStandardOutput().trimmed(), encoding="utf-8", errors="ignore").strip().split("\n"):
-            line = line.replace("\x1b[0m","").replace("\x1b[0;31m","").replace("\x1b[0;33m","").strip()
-            if not line:
-                continue
+    @pyqtSlot(list)
+    def slot_pedalboardsFound(self, pedalboards):
+        for pedalboard in pedalboards:
+            self.fPedalboardsDict[pedalboard['bundle']] = pedalboard
+            self.fPedalboardSearch.update(pedalboard)
 
-            if self.fSavedSettings[MOD_KEY_HOST_VERBOSE]:
-                print("BACKEND:", line)
+            # found again means it changed, the thumbnail might have too
+            if self.fThumbnailService is not None and pedalboard['thumbnail']:
+                self.fThumbnailService.invalidate(pedalboard['thumbnail'])
 
-            if line == "mod-host ready!" or line == "mod-host is running.":
-                QTimer.singleShot(0, self.slot_backendStartPhase2)
-            #elif "Listening on socket " in line:
-                #QTimer.singleShot(1000, self.slot_ingenStarted)
-            ##elif "Activated Jack client " in line:
-                ##QTimer.singleShot(1000, self.fWebServerThread.start)
-            #elif "Failed to create UNIX socket" in line or "Could not activate Jack client" in line:
-                ## need to wait for ingen to create sockets so it can delete them on termination
-                #QTimer.singleShot(1000, self.slot_ingenStartError)
+        self.pedalboardsUpdated.emit([pedalboard['bundle'] for pedalboard in pedalboards], [])
+        self.updatePedalboardList()
 
-    @pyqtSlot()
-    def slot_backendStartPhase2(self):
-        if self.fProccessBackend.state() == QProcess.NotRunning:
-            return
+    @pyqtSlot(list)
+    def slot_pedalboardsRemoved(self, bundles):
+        for bundle in bundles:
+            self.fPedalboardsDict.pop(bundle, None)
+            self.fPedalboardSearch.remove(bundle)
 
-        if not self.fNeedsSessionReconnect:
-            # we'll need it for next time
-            self.fNeedsSessionReconnect = True
-        else:
-            # we need it now
-            SESSION.reconnectApp()
+        self.pedalboardsUpdated.emit([], bundles)
+        self.updatePedalboardList()
 
-        self.fWebServerThread.start()
+    @pyqtSlot(dict)
+    def slot_pluginLabelsFound(self, labels):
+        self.fPedalboardSearch.setPluginLabels(labels)
 
     @pyqtSlot()
-    def slot_backendStartError(self):
-        self.stopAndWaitForBackend()
-        self.slot_backendError(-2)
+    def slot_pedalboardsScanFinished(self):
+        self.fPedalboardsState = PEDALBOARDS_STATE_READY
+        self.pedalboardsChanged.emit(self.fPedalboardsState)
+
+        if not self.fPedalboardWatcherStarted:
+            self.fPedalboardWatcherStarted = True
+            self.fPedalboardWatcher.start()
+
+    @pyqtSlot(list)
+    def slot_pedalboardBundlesChanged(self, bundles):
+        # only the affected bundles get re-parsed, the list is outdated until then
+        self.fPedalboardsState = PEDALBOARDS_STATE_PARTIAL
+        self.pedalboardsChanged.emit(self.fPedalboardsState)
+        self.fPedalboardScanner.requestBundles(bundles)
 
     # --------------------------------------------------------------------------------------------------------
     # Web Server
@@ -522,9 +527,16 @@ class HostWindow(QMainWindow):
         self.ui.webview.loadProgress.connect(self.slot_webviewLoadProgress)
         self.ui.webview.loadFinished.connect(self.slot_webviewLoadFinished)
 
-        print("webserver running with URL:", config["addr"])
+        traceAsyncBegin("webview load")
         self.ui.webview.load(QUrl(config["addr"]))
 
+    @pyqtSlot(str)
+    def slot_webServerFailed(self, error):
+        errorStr = self.tr("Could not connect to host backend.\n") + error
+        qWarning(errorStr)
+
+        QMessageBox.critical(self, self.tr("Error"), errorStr)
+
     @pyqtSlot()
     def slot_webServerFinished(self):
         try:
@@ -534,7 +546,6 @@ class HostWindow(QMainWindow):
         except:
             pass
 
-        print("webserver finished")
         # testing red color for server finished
         self.ui.webview.blockSignals(True)
         self.ui.webview.setHtml("<html><body bgcolor='red'></body></html>")
@@ -547,6 +558,7 @@ class HostWindow(QMainWindow):
     def slot_webviewLoadStarted(self):
         self.ui.label_progress.setText(self.tr("Loading UI..."))
         print("load started")
+        traceInstant("webview load started")
 
     @pyqtSlot(int)
     def slot_webviewLoadProgress(self, progress):
@@ -566,6 +578,10 @@ class HostWindow(QMainWindow):
             self.ui.act_file_refresh.setEnabled(True)
             self.ui.act_file_inspect.setEnabled(True)
 
+            # enable pedalboard menu
+            self.ui.act_pedalboard_open.setEnabled(True)
+            self.ui.menu_Pedalboard.setEnabled(True)
+
             # for js evaulation
             self.fWebFrame = self.ui.webpage.currentFrame()
 
@@ -592,10 +608,10 @@ class HostWindow(QMainWindow):
             self.fWebFrame = None
 
             # stop backend&server
-            self.stopAndWaitForWebServer()
-            self.stopAndWaitForBackend()
+            self.fServer.stop()
 
         print("load finished")
+        traceAsyncEnd("webview load", { 'ok': ok })
 
     @pyqtSlot()
     def slot_webviewPostFinished(self):
@@ -609,6 +625,11 @@ class HostWindow(QMainWindow):
     @pyqtSlot()
     def slot_webviewPostFinished2(self):
         self.ui.stackedwidget.setCurrentIndex(1)
+        traceInstant("ui ready")
+
+        if not self.fStartupFinished:
+            self.fStartupFinished = True
+            traceAsyncEnd("startup")
 
     # --------------------------------------------------------------------------------------------------------
     # Settings
@@ -628,10 +649,12 @@ class HostWindow(QMainWindow):
             # Host
             MOD_KEY_HOST_VERBOSE:           qsettings.value(MOD_KEY_HOST_VERBOSE,           MOD_DEFAULT_HOST_VERBOSE,           type=bool),
             MOD_KEY_HOST_PATH:              qsettings.value(MOD_KEY_HOST_PATH,              MOD_DEFAULT_HOST_PATH,              type=str),
+            MOD_KEY_HOST_READY_TIMEOUT:     qsettings.value(MOD_KEY_HOST_READY_TIMEOUT,     MOD_DEFAULT_HOST_READY_TIMEOUT,     type=int),
             # WebView
             MOD_KEY_WEBVIEW_INSPECTOR:      qsettings.value(MOD_KEY_WEBVIEW_INSPECTOR,      MOD_DEFAULT_WEBVIEW_INSPECTOR,      type=bool),
             MOD_KEY_WEBVIEW_VERBOSE:        qsettings.value(MOD_KEY_WEBVIEW_VERBOSE,        MOD_DEFAULT_WEBVIEW_VERBOSE,        type=bool),
-            MOD_KEY_WEBVIEW_SHOW_INSPECTOR: qsettings.value(MOD_KEY_WEBVIEW_SHOW_INSPECTOR, MOD_DEFAULT_WEBVIEW_SHOW_INSPECTOR, type=bool)
+            MOD_KEY_WEBVIEW_SHOW_INSPECTOR: qsettings.value(MOD_KEY_WEBVIEW_SHOW_INSPECTOR, MOD_DEFAULT_WEBVIEW_SHOW_INSPECTOR, type=bool),
+            MOD_KEY_WEBVIEW_IN_PROCESS:     qsettings.value(MOD_KEY_WEBVIEW_IN_PROCESS,     MOD_DEFAULT_WEBVIEW_IN_PROCESS,     type=bool)
         }
 
         inspectorEnabled = self.fSavedSettings[MOD_KEY_WEBVIEW_INSPECTOR]
@@ -645,14 +668,17 @@ class HostWindow(QMainWindow):
                 self.setWindowState(self.windowState() | Qt.WindowMaximized)
 
             if inspectorEnabled and self.fSavedSettings[MOD_KEY_WEBVIEW_SHOW_INSPECTOR]:
-                QTimer.singleShot(1000, self.ui.webinspector.show)
+                QTimer.singleShot(1000, self.showWebInspector)
 
         self.ui.act_file_inspect.setVisible(inspectorEnabled)
 
-        if self.fIdleTimerId != 0:
-            self.killTimer(self.fIdleTimerId)
+        # used from the next (re)load on, turning it on needs a restart if the window started without it
+        if self.fInProcessTransport:
+            self.fNetworkManager.setInProcessEnabled(self.fSavedSettings[MOD_KEY_WEBVIEW_IN_PROCESS])
+
+        self.fIdleScheduler.setCoalescingWindow(self.fSavedSettings[MOD_KEY_MAIN_REFRESH_INTERVAL])
 
-        self.fIdleTimerId = self.startTimer(self.fSavedSettings[MOD_KEY_MAIN_REFRESH_INTERVAL])
+        self.fServer.setSettings(self.fSavedSettings)
 
     # --------------------------------------------------------------------------------------------------------
     # Misc
@@ -662,6 +688,16 @@ class HostWindow(QMainWindow):
         print("Got SIGUSR1 -> Saving project now")
         self.slot_pedalboardSave()
 
+    @pyqtSlot()
+    def slot_handleSIGUSR2(self):
+        print("Got SIGUSR2 -> Writing trace now")
+        dumpTrace()
+        self.fIdleScheduler.printStats()
+        print("web cache:", self.fWebCache.stats())
+
+        if self.fInProcessTransport:
+            print("in-process requests:", self.fNetworkManager.stats())
+
     @pyqtSlot()
     def slot_handleSIGTERM(self):
         print("Got SIGTERM -> Closing now")
@@ -671,25 +707,33 @@ class HostWindow(QMainWindow):
     # Qt events
 
     def closeEvent(self, event):
-        if self.fIdleTimerId != 0:
-            self.killTimer(self.fIdleTimerId)
-            self.fIdleTimerId = 0
+        if self.fServer.isActive():
+            # close again once everything has stopped, the GUI keeps painting in the meantime
+            event.ignore()
+
+            if not self.fClosing:
+                self.fClosing = True
+                self.ui.label_progress.setText(self.tr("Stopping backend..."))
+                self.ui.stackedwidget.setCurrentIndex(0)
+                self.stopBackend(self.close)
+            return
+
+        self.fIdleScheduler.removeAll()
 
         self.saveSettings()
-        self.slot_backendStop()
+        self.fPedalboardWatcher.stop()
+        self.fPedalboardScanner.stopWait()
+
+        if self.fThumbnailService is not None:
+            self.fThumbnailService.stopWait()
 
         QMainWindow.closeEvent(self, event)
+        dumpTrace()
 
         # Needed in case the web inspector is still alive
         #self.ui.webinspector.close()
         QApplication.instance().quit()
 
-    def timerEvent(self, event):
-        if event.timerId() == self.fIdleTimerId:
-            pass
-
-        QMainWindow.timerEvent(self, event)
-
     def resizeEvent(self, event):
         QMainWindow.resizeEvent(self, event)
         self.fixWebViewSize()
@@ -697,19 +741,6 @@ class HostWindow(QMainWindow):
     # --------------------------------------------------------------------------------------------------------
     # Internal stuff
 
-    def getProcessErrorAsString(self, error):
-        if error == -2:
-            return self.tr("Ingen failed to create UNIX socket.")
-        if error == QProcess.FailedToStart:
-            return self.tr("Process failed to start.")
-        if error == QProcess.Crashed:
-            return self.tr("Process crashed.")
-        if error == QProcess.Timedout:
-            return self.tr("Process timed out.")
-        if error == QProcess.WriteError:
-            return self.tr("Process write error.")
-        return self.tr("Unkown error.")
-
     def fixWebViewSize(self):
         if self.ui.stackedwidget.currentIndex() == 1:
             return
@@ -719,25 +750,54 @@ class HostWindow(QMainWindow):
         self.ui.webview.resize(size)
         self.ui.webpage.setViewportSize(size)
 
-    def stopAndWaitForBackend(self):
-        SESSION.host.close_jack()
+    @pyqtSlot()
+    def showWebInspector(self):
+        if self.ui.webinspector is None:
+            with traceSpan("QWebInspector"):
+                self.ui.webinspector = QWebInspector(None)
+                self.ui.webinspector.resize(800, 600)
+                self.ui.webinspector.setPage(self.ui.webpage)
 
-        if self.fProccessBackend.state() == QProcess.NotRunning:
-            return
+        self.ui.webinspector.show()
 
-        self.fStoppingBackend = True
-        self.fProccessBackend.terminate()
-        if not self.fProccessBackend.waitForFinished(2000):
-            qWarning("Backend failed top stop cleanly, forced kill")
-            self.fProccessBackend.kill()
+    def stopBackend(self, callback=None):
+        # testing red color for server stopped
+        self.ui.webview.blockSignals(True)
+        self.ui.webview.setHtml("<html><body bgcolor='green'></body></html>")
+        self.ui.webview.blockSignals(False)
+
+        self.fServer.stop(callback)
+
+    # Load @a bundle once the UI is ready
+    def openPedalboardLater(self, bundle):
+        self.fNextBundle = bundle
 
-    def stopAndWaitForWebServer(self):
-        if not self.fWebServerThread.isRunning():
+    def openPedalboard(self, bundle):
+        if self.fWebFrame is None:
+            self.openPedalboardLater(bundle)
             return
 
-        if not self.fWebServerThread.stopWait():
-            qWarning("WebServer Thread failed top stop cleanly, forced terminate")
-            self.fWebServerThread.terminate()
+        self.fWebFrame.evaluateJavaScript("desktop.loadPedalboard(\"%s\")" % bundle)
+
+    # QWebPage does not support changing its network manager once used, so the transport is picked at startup.
+    # mod_inprocess is only imported when it is going to be used.
+    def createNetworkManager(self, inProcess):
+        if not inProcess:
+            return QNetworkAccessManager(self)
+
+        from mod_inprocess import InProcessNetworkAccessManager
+        return InProcessNetworkAccessManager(self, QUrl(config["addr"]), lambda: loadWebServer().application)
+
+    def thumbnailService(self):
+        if self.fThumbnailService is None:
+            from mod_thumbnails import ThumbnailService
+            self.fThumbnailService = ThumbnailService(self)
+
+        return self.fThumbnailService
+
+    def updatePedalboardList(self):
+        self.fPedalboards = [self.fPedalboardsDict[bundle] for bundle in sorted(self.fPedalboardsDict)]
+        self.pedalboardsChanged.emit(self.fPedalboardsState)
 
     def setProperWindowTitle(self):
         title = "MOD Application"
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSlot, qWarning, QObject, QSocketNotifier, QTimer
+else:
+    from PyQt5.QtCore import pyqtSlot, qWarning, QObject, QSocketNotifier, QTimer
+
+import signal
+import socket
+
+from time import perf_counter
+from traceback import format_exc
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Tracing)
+
+from mod_trace import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Idle task priorities, tasks due at the same time run in this order
+
+IDLE_PRIORITY_HIGH   = 0
+IDLE_PRIORITY_NORMAL = 1
+IDLE_PRIORITY_LOW    = 2
+
+# Once a wakeup has run for this long (in seconds), the remaining non-high priority tasks wait for the next one
+IDLE_WAKEUP_BUDGET = 0.010
+
+# ------------------------------------------------------------------------------------------------------------
+# Idle Task
+
+class IdleTask(object):
+    def __init__(self, name, callback, interval, priority, nextRun):
+        self.name     = name
+        self.callback = callback
+        self.interval = interval # ms, 0 for deferred (one-shot) tasks
+        self.priority = priority
+        self.nextRun  = nextRun  # perf_counter() time
+
+        # stats
+        self.runs      = 0
+        self.totalTime = 0.0
+        self.maxTime   = 0.0
+
+    def stats(self):
+        return {
+            'name':     self.name,
+            'interval': self.interval,
+            'priority': self.priority,
+            'runs':     self.runs,
+            'total':    self.totalTime*1000.0,
+            'average':  self.totalTime*1000.0/self.runs if self.runs else 0.0,
+            'max':      self.maxTime*1000.0,
+        }
+
+# ------------------------------------------------------------------------------------------------------------
+# Idle Scheduler
+#
+# Runs periodic and deferred tasks from a single timer.
+# The timer is only armed for the next due task, so with nothing pending there are no wakeups at all.
+# Tasks due within the coalescing window of each other run in the same wakeup.
+
+class IdleScheduler(QObject):
+    def __init__(self, parent, window=MOD_DEFAULT_MAIN_REFRESH_INTERVAL):
+        QObject.__init__(self, parent)
+
+        self.fTasks   = {}
+        self.fWindow  = window/1000.0
+        self.fRunning = False
+        self.fWakeups = 0
+
+        self.fTimer = QTimer(self)
+        self.fTimer.setSingleShot(True)
+        self.fTimer.timeout.connect(self.slot_run)
+
+    # Tasks due less than @a window ms apart are run together
+    def setCoalescingWindow(self, window):
+        self.fWindow = max(0, window)/1000.0
+        self.reschedule()
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Run @a callback every @a interval ms, replaces any task with the same name
+    def addPeriodic(self, name, callback, interval, priority=IDLE_PRIORITY_NORMAL, runNow=False):
+        now  = perf_counter()
+        task = IdleTask(name, callback, max(1, interval), priority, now if runNow else now + interval/1000.0)
+
+        # keep the stats of a task that is only being changed
+        old = self.fTasks.get(name)
+        if old is not None:
+            task.runs, task.totalTime, task.maxTime = old.runs, old.totalTime, old.maxTime
+
+        self.fTasks[name] = task
+        self.reschedule()
+
+    # Run @a callback once, @a delay ms from now.
+    # If a deferred task with the same name is already pending, it runs at whichever time is earlier.
+    def callLater(self, name, callback, delay=0, priority=IDLE_PRIORITY_NORMAL):
+        nextRun = perf_counter() + delay/1000.0
+        task    = self.fTasks.get(name)
+
+        if task is not None and task.interval == 0:
+            task.callback = callback
+            task.priority = min(task.priority, priority)
+            task.nextRun  = min(task.nextRun, nextRun)
+        else:
+            self.fTasks[name] = IdleTask(name, callback, 0, priority, nextRun)
+
+        self.reschedule()
+
+    def remove(self, name):
+        if self.fTasks.pop(name, None) is not None:
+            self.reschedule()
+
+    def removeAll(self):
+        self.fTasks.clear()
+        self.fTimer.stop()
+
+    def isPending(self, name):
+        return name in self.fTasks
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Per-task execution times (in ms), most expensive first
+    def stats(self):
+        return sorted((task.stats() for task in self.fTasks.values()), key=lambda s: s['total'], reverse=True)
+
+    def wakeups(self):
+        return self.fWakeups
+
+    def printStats(self):
+        print("idle scheduler: %i wakeups, %i tasks" % (self.fWakeups, len(self.fTasks)))
+
+        for s in self.stats():
+            print("  %-24s every %6s ms, %6i runs, avg %7.3f ms, max %7.3f ms, total %9.1f ms" % (
+                  s['name'], s['interval'] or "-", s['runs'], s['average'], s['max'], s['total']))
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def reschedule(self):
+        # slot_run calls us once it's done
+        if self.fRunning:
+            return
+
+        if not self.fTasks:
+            self.fTimer.stop()
+            return
+
+        nextRun = min(task.nextRun for task in self.fTasks.values())
+        self.fTimer.start(max(0, int((nextRun - perf_counter())*1000.0 + 0.5)))
+
+    @pyqtSlot()
+    def slot_run(self):
+        self.fWakeups += 1
+        self.fRunning = True
+
+        start = perf_counter()
+        tasks = sorted((task for task in self.fTasks.values() if task.nextRun <= start + self.fWindow),
+                       key=lambda task: (task.priority, task.nextRun))
+
+        for task in tasks:
+            # removed by a previous task
+            if self.fTasks.get(task.name) is not task:
+                continue
+
+            now = perf_counter()
+
+            if now - start > IDLE_WAKEUP_BUDGET and task.priority != IDLE_PRIORITY_HIGH:
+                task.nextRun = now
+                continue
+
+            if task.interval == 0:
+                del self.fTasks[task.name]
+            else:
+                task.nextRun = now + task.interval/1000.0
+
+            with traceSpan("idle: " + task.name):
+                try:
+                    task.callback()
+                except Exception:
+                    qWarning("Idle task '%s' failed:\n%s" % (task.name, format_exc()))
+
+            elapsed = perf_counter() - now
+            task.runs      += 1
+            task.totalTime += elapsed
+            task.maxTime    = max(task.maxTime, elapsed)
+
+        self.fRunning = False
+        self.reschedule()
+
+# ------------------------------------------------------------------------------------------------------------
+# Signal Wakeup
+#
+# Python signal handlers only run when the interpreter gets control back, which doesn't happen
+# while Qt sleeps in its event loop. Instead of waking up periodically to check, the C-level handler
+# writes to a socket and a socket notifier wakes up the event loop.
+
+class SignalWakeup(QObject):
+    def __init__(self, parent):
+        QObject.__init__(self, parent)
+
+        self.fReader, self.fWriter = socket.socketpair()
+        self.fReader.setblocking(False)
+        self.fWriter.setblocking(False)
+
+        self.fOldWakeupFd = signal.set_wakeup_fd(self.fWriter.fileno())
+
+        self.fNotifier = QSocketNotifier(self.fReader.fileno(), QSocketNotifier.Read, self)
+        self.fNotifier.activated.connect(self.slot_wakeup)
+
+    def close(self):
+        if self.fNotifier is None:
+            return
+
+        signal.set_wakeup_fd(self.fOldWakeupFd)
+        self.fNotifier.setEnabled(False)
+        self.fNotifier = None
+        self.fReader.close()
+        self.fWriter.close()
+
+    @pyqtSlot(int)
+    def slot_wakeup(self, fd):
+        # the python handlers run as soon as we're here, only need to empty the socket
+        try:
+            while self.fReader.recv(64):
+                pass
+        except OSError:
+            pass
+
+# ------------------------------------------------------------------------------------------------------------
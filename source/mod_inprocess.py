@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# In-process transport between the webview and the tornado application
+#
+# Requests for the webserver origin are handed straight to the tornado application on its IOLoop thread,
+# instead of going through a loopback TCP connection and tornado's HTTP parser.
+# Response chunks are passed back to the GUI thread as they are, through queued signals.
+# WebSockets are not handled by QNetworkAccessManager and keep using TCP, as do external browsers.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSignal, pyqtSlot, QIODevice, QObject, QUrl
+    from PyQt4.QtNetwork import QNetworkAccessManager, QNetworkCookie, QNetworkReply, QNetworkRequest
+else:
+    from PyQt5.QtCore import pyqtSignal, pyqtSlot, QIODevice, QObject, QUrl
+    from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkCookie, QNetworkReply, QNetworkRequest
+
+from collections import deque
+from threading import Lock
+from time import time
+from tornado import gen, httputil
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+
+# ------------------------------------------------------------------------------------------------------------
+# HTTP method for each QNetworkAccessManager operation, custom verbs are taken from the request
+
+IN_PROCESS_METHODS = {
+    QNetworkAccessManager.HeadOperation:   "HEAD",
+    QNetworkAccessManager.GetOperation:    "GET",
+    QNetworkAccessManager.PutOperation:    "PUT",
+    QNetworkAccessManager.PostOperation:   "POST",
+    QNetworkAccessManager.DeleteOperation: "DELETE",
+}
+
+# ------------------------------------------------------------------------------------------------------------
+# QNetworkReply error for HTTP error statuses, the same Qt's own HTTP backend uses
+
+IN_PROCESS_HTTP_ERRORS = {
+    401: QNetworkReply.AuthenticationRequiredError,
+    403: QNetworkReply.ContentAccessDenied,
+    404: QNetworkReply.ContentNotFoundError,
+    405: QNetworkReply.ContentOperationNotPermittedError,
+    407: QNetworkReply.ProxyAuthenticationRequiredError,
+    410: QNetworkReply.ContentGoneError,
+    418: QNetworkReply.ProtocolInvalidOperationError,
+    500: QNetworkReply.InternalServerError,
+    501: QNetworkReply.OperationNotImplementedError,
+    503: QNetworkReply.ServiceUnavailableError,
+}
+
+# not available in Qt4
+if hasattr(QNetworkReply, "ContentConflictError"):
+    IN_PROCESS_HTTP_ERRORS[409] = QNetworkReply.ContentConflictError
+
+def getInProcessHttpError(code):
+    error = IN_PROCESS_HTTP_ERRORS.get(code)
+
+    if error is not None:
+        return error
+    if code < 500:
+        return QNetworkReply.UnknownContentError
+    return QNetworkReply.UnknownServerError
+
+# ------------------------------------------------------------------------------------------------------------
+# Tornado side, everything here runs on the IOLoop thread
+
+class InProcessContext(object):
+    def __init__(self):
+        self.remote_ip = "127.0.0.1"
+        self.protocol  = "http"
+        self.address   = ("127.0.0.1", 0)
+
+# Implements tornado's HTTPConnection interface, forwarding everything written to @a signals
+# The GUI thread calls detach() once the reply is done with, nothing is emitted after that.
+class InProcessConnection(object):
+    def __init__(self, signals):
+        self.context = InProcessContext()
+
+        self.fSignals       = signals
+        self.fSignalsLock   = Lock()
+        self.fCloseCallback = None
+        self.fFinished      = False
+
+    def detach(self):
+        with self.fSignalsLock:
+            self.fSignals = None
+
+    def set_close_callback(self, callback):
+        self.fCloseCallback = callback
+
+    def close(self):
+        if self.fFinished:
+            return
+
+        self.fFinished = True
+
+        if self.fCloseCallback is not None:
+            callback, self.fCloseCallback = self.fCloseCallback, None
+            callback()
+
+    def write_headers(self, start_line, headers, chunk=None, callback=None):
+        if not self.fFinished:
+            with self.fSignalsLock:
+                if self.fSignals is not None:
+                    self.fSignals.headersReceived.emit(start_line.code, start_line.reason or "", list(headers.get_all()))
+
+        return self.write(chunk, callback)
+
+    def write(self, chunk, callback=None):
+        if chunk and not self.fFinished:
+            with self.fSignalsLock:
+                if self.fSignals is not None:
+                    self.fSignals.dataReceived.emit(chunk)
+
+        # nothing to wait for, but tornado might expect the callback to be called later
+        if callback is not None:
+            IOLoop.current().add_callback(callback)
+            return None
+
+        future = Future()
+        future.set_result(None)
+        return future
+
+    def finish(self):
+        if self.fFinished:
+            return
+
+        self.fFinished      = True
+        self.fCloseCallback = None
+
+        with self.fSignalsLock:
+            if self.fSignals is not None:
+                self.fSignals.finished.emit()
+
+@gen.coroutine
+def dispatchInProcess(application, connection, method, uri, headers, body):
+    delegate = application.start_request(None, connection)
+
+    # streamed request bodies return futures here
+    result = delegate.headers_received(httputil.RequestStartLine(method, uri, "HTTP/1.1"), headers)
+    if result is not None:
+        yield result
+
+    if body:
+        result = delegate.data_received(body)
+        if result is not None:
+            yield result
+
+    delegate.finish()
+
+# ------------------------------------------------------------------------------------------------------------
+# Qt side
+
+# Relay between the connection and its reply, owned by the manager so it outlives the reply.
+# Released when the reply finishes or gets deleted, whichever comes first.
+class InProcessSignals(QObject):
+    headersReceived = pyqtSignal(int, str, object) # status code, reason and list of (name, value)
+    dataReceived    = pyqtSignal(object)           # bytes
+    finished        = pyqtSignal()
+
+    def __init__(self, parent):
+        QObject.__init__(self, parent)
+
+        self.fConnection = None
+
+    @pyqtSlot()
+    def slot_release(self):
+        if self.fConnection is not None:
+            self.fConnection.detach()
+            self.fConnection = None
+
+        self.deleteLater()
+
+class InProcessReply(QNetworkReply):
+    def __init__(self, manager, operation, request, method, body):
+        QNetworkReply.__init__(self, manager)
+
+        self.fManager   = manager
+        self.fStartTime = time()
+        self.fDone      = False
+        self.fHttpError = QNetworkReply.NoError
+
+        # response chunks not read yet, and how much of the first one was
+        self.fChunks    = deque()
+        self.fOffset    = 0
+        self.fAvailable = 0
+        self.fReceived  = 0
+
+        self.setRequest(request)
+        self.setUrl(request.url())
+        self.setOperation(operation)
+        self.open(QIODevice.ReadOnly | QIODevice.Unbuffered)
+
+        self.fSignals = InProcessSignals(manager)
+        self.fSignals.headersReceived.connect(self.slot_headersReceived)
+        self.fSignals.dataReceived.connect(self.slot_dataReceived)
+        self.fSignals.finished.connect(self.slot_finished)
+
+        self.fConnection = InProcessConnection(self.fSignals)
+        self.fSignals.fConnection = self.fConnection
+
+        # WebKit might delete the reply without aborting it first
+        self.destroyed.connect(self.fSignals.slot_release)
+
+        url = request.url()
+        uri = url.path(QUrl.FullyEncoded) or "/"
+
+        if url.hasQuery():
+            uri += "?" + url.query(QUrl.FullyEncoded)
+
+        headers = httputil.HTTPHeaders()
+        headers['Host'] = "%s:%i" % (url.host(), url.port(80))
+
+        for name in request.rawHeaderList():
+            headers.add(bytes(name).decode("latin-1"), bytes(request.rawHeader(name)).decode("latin-1"))
+
+        cookieJar = manager.cookieJar()
+        cookies   = cookieJar.cookiesForUrl(url) if cookieJar is not None else []
+
+        if cookies:
+            headers['Cookie'] = "; ".join(bytes(cookie.toRawForm(QNetworkCookie.NameAndValueOnly)).decode("latin-1") for cookie in cookies)
+
+        if body:
+            headers['Content-Length'] = str(len(body))
+
+        application = manager.application()
+        connection  = self.fConnection
+
+        self.fIOLoop = manager.ioloop()
+        self.fIOLoop.add_callback(lambda: dispatchInProcess(application, connection, method, uri, headers, body))
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def abort(self):
+        if self.fDone:
+            return
+
+        # let the handler know, like a closed TCP connection would
+        self.fIOLoop.add_callback(self.fConnection.close)
+
+        self.setError(QNetworkReply.OperationCanceledError, "Operation canceled")
+        self.error.emit(QNetworkReply.OperationCanceledError)
+        self.finish()
+
+    def isSequential(self):
+        return True
+
+    def bytesAvailable(self):
+        return self.fAvailable + QNetworkReply.bytesAvailable(self)
+
+    def readData(self, maxlen):
+        if not self.fChunks:
+            return b""
+
+        chunk = self.fChunks[0]
+
+        # the common case, a whole chunk is read at once and goes out untouched
+        if self.fOffset == 0 and len(chunk) <= maxlen:
+            self.fChunks.popleft()
+            self.fAvailable -= len(chunk)
+            return chunk
+
+        parts = []
+
+        while self.fChunks and maxlen > 0:
+            chunk = self.fChunks[0]
+            part  = chunk[self.fOffset:self.fOffset+maxlen]
+            parts.append(part)
+            maxlen          -= len(part)
+            self.fAvailable -= len(part)
+            self.fOffset    += len(part)
+
+            if self.fOffset >= len(chunk):
+                self.fChunks.popleft()
+                self.fOffset = 0
+
+        return b"".join(parts)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    @pyqtSlot(int, str, object)
+    def slot_headersReceived(self, code, reason, headers):
+        if self.fDone:
+            return
+
+        self.setAttribute(QNetworkRequest.HttpStatusCodeAttribute, code)
+        self.setAttribute(QNetworkRequest.HttpReasonPhraseAttribute, reason)
+
+        # the body is still readable, error() is emitted when it's all here
+        if code >= 400:
+            self.fHttpError = getInProcessHttpError(code)
+            self.setError(self.fHttpError, "Error transferring %s - server replied: %s" % (
+                          self.url().toString(), reason))
+
+        cookieJar = self.fManager.cookieJar()
+
+        for name, value in headers:
+            lname = name.lower()
+
+            if lname == "set-cookie":
+                if cookieJar is not None:
+                    cookieJar.setCookiesFromUrl(QNetworkCookie.parseCookies(value.encode("latin-1")), self.url())
+                continue
+
+            if lname == "location" and 300 <= code < 400:
+                self.setAttribute(QNetworkRequest.RedirectionTargetAttribute, QUrl(value))
+
+            self.setRawHeader(name.encode("latin-1"), value.encode("latin-1"))
+
+        self.metaDataChanged.emit()
+
+    @pyqtSlot(object)
+    def slot_dataReceived(self, chunk):
+        if self.fDone:
+            return
+
+        self.fChunks.append(chunk)
+        self.fAvailable += len(chunk)
+        self.fReceived  += len(chunk)
+
+        self.readyRead.emit()
+        self.downloadProgress.emit(self.fReceived, -1)
+
+    @pyqtSlot()
+    def slot_finished(self):
+        if self.fDone:
+            return
+
+        self.downloadProgress.emit(self.fReceived, self.fReceived)
+
+        if self.fHttpError != QNetworkReply.NoError:
+            self.error.emit(self.fHttpError)
+
+        self.finish()
+
+    def finish(self):
+        self.fDone = True
+        self.fSignals.slot_release()
+        self.fManager.requestFinished(self.operation(), time() - self.fStartTime, self.fReceived)
+
+        self.setFinished(True)
+        self.finished.emit()
+
+# ------------------------------------------------------------------------------------------------------------
+# In-process Network Access Manager
+#
+# Regular QNetworkAccessManager, except for requests to @a origin while the in-process mode is enabled.
+# @a application is a callable returning the tornado application, it is only called on the first request.
+# @a ioloop is a callable returning the IOLoop the application runs on, the global instance by default.
+
+class InProcessNetworkAccessManager(QNetworkAccessManager):
+    def __init__(self, parent, origin, application, ioloop=IOLoop.instance):
+        QNetworkAccessManager.__init__(self, parent)
+
+        origin = QUrl(origin)
+
+        self.fOrigin      = (origin.scheme(), origin.host(), origin.port())
+        self.fGetApp      = application
+        self.fGetIOLoop   = ioloop
+        self.fApplication = None
+        self.fEnabled     = False
+
+        # stats
+        self.fRequests = 0
+        self.fBytes    = 0
+        self.fTime     = 0.0
+
+    def setInProcessEnabled(self, enabled):
+        self.fEnabled = enabled
+
+    def isInProcessEnabled(self):
+        return self.fEnabled
+
+    def application(self):
+        if self.fApplication is None:
+            self.fApplication = self.fGetApp()
+
+        return self.fApplication
+
+    def ioloop(self):
+        return self.fGetIOLoop()
+
+    def stats(self):
+        return {
+            'requests': self.fRequests,
+            'bytes':    self.fBytes,
+            'avgTime':  self.fTime/self.fRequests if self.fRequests else 0.0,
+        }
+
+    def requestFinished(self, operation, elapsed, received):
+        self.fRequests += 1
+        self.fBytes    += received
+        self.fTime     += elapsed
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def createRequest(self, operation, request, outgoingData=None):
+        url = request.url()
+
+        if not self.fEnabled or (url.scheme(), url.host(), url.port()) != self.fOrigin:
+            return QNetworkAccessManager.createRequest(self, operation, request, outgoingData)
+
+        if operation == QNetworkAccessManager.CustomOperation:
+            method = bytes(request.attribute(QNetworkRequest.CustomVerbAttribute) or b"GET").decode("latin-1")
+        else:
+            method = IN_PROCESS_METHODS[operation]
+
+        body = bytes(outgoingData.readAll()) if outgoingData is not None else b""
+
+        return InProcessReply(self, operation, request, method, body)
+
+# ------------------------------------------------------------------------------------------------------------
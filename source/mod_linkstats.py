@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSlot, QObject
+    from PyQt4.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+else:
+    from PyQt5.QtCore import pyqtSlot, QObject
+    from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+import csv
+
+from collections import deque
+from time import time
+
+# ------------------------------------------------------------------------------------------------------------
+# Link statistics settings
+
+# Requests kept for percentiles and export
+LINK_STATS_REQUESTS = 2000
+
+# WebSocket samples kept, one per LINK_STATS_WEBSOCKET_INTERVAL while messages flow
+LINK_STATS_WEBSOCKETS = 600
+
+# Time (ms) the page batches WebSocket message counts for, before reporting them
+LINK_STATS_WEBSOCKET_INTERVAL = 1000
+
+# Time (s) rates (throughput, messages per second, failures) are computed over
+LINK_STATS_RATE_WINDOW = 10.0
+
+LINK_STATS_OPERATIONS = {
+    QNetworkAccessManager.HeadOperation:   "HEAD",
+    QNetworkAccessManager.GetOperation:    "GET",
+    QNetworkAccessManager.PutOperation:    "PUT",
+    QNetworkAccessManager.PostOperation:   "POST",
+    QNetworkAccessManager.DeleteOperation: "DELETE",
+}
+
+# Name the stats bridge is added to the page's window object with
+LINK_STATS_JS_OBJECT = "modRemoteLinkStats"
+
+# WebKit handles WebSockets itself, outside of QNetworkAccessManager.
+# This wraps the page's WebSocket class to count the messages and report them in batches.
+LINK_STATS_WEBSOCKET_JS = """
+(function() {
+    var stats = window.%(object)s;
+    var NativeWebSocket = window.WebSocket;
+
+    if (!stats || !NativeWebSocket || NativeWebSocket.modRemoteWrapped) {
+        return;
+    }
+
+    var counts = [0, 0, 0, 0]; // received messages and bytes, sent messages and bytes
+
+    var dataSize = function(data) {
+        return data.length || data.byteLength || data.size || 0;
+    };
+
+    var WrappedWebSocket = function(url, protocols) {
+        var ws = (protocols === undefined) ? new NativeWebSocket(url) : new NativeWebSocket(url, protocols);
+        var send = ws.send;
+
+        ws.addEventListener('message', function(ev) {
+            counts[0] += 1;
+            counts[1] += dataSize(ev.data);
+        });
+        ws.send = function(data) {
+            counts[2] += 1;
+            counts[3] += dataSize(data);
+            return send.call(ws, data);
+        };
+
+        return ws;
+    };
+
+    WrappedWebSocket.prototype  = NativeWebSocket.prototype;
+    WrappedWebSocket.CONNECTING = 0;
+    WrappedWebSocket.OPEN       = 1;
+    WrappedWebSocket.CLOSING    = 2;
+    WrappedWebSocket.CLOSED     = 3;
+    WrappedWebSocket.modRemoteWrapped = true;
+
+    window.WebSocket = WrappedWebSocket;
+
+    setInterval(function() {
+        if (counts[0] == 0 && counts[2] == 0) {
+            return;
+        }
+        stats.websocketMessages(counts[0], counts[1], counts[2], counts[3]);
+        counts = [0, 0, 0, 0];
+    }, %(interval)i);
+})();
+""" % { 'object': LINK_STATS_JS_OBJECT, 'interval': LINK_STATS_WEBSOCKET_INTERVAL }
+
+def getPercentile(values, p):
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    return values[min(len(values)-1, int(len(values)*p))]
+
+# ------------------------------------------------------------------------------------------------------------
+# Link Stats
+#
+# Ring buffers of the last requests made by a network access manager (see watch()) and of the WebSocket
+# messages reported by the page (see LINK_STATS_WEBSOCKET_JS).
+# Time to first byte and total latency are kept apart, so a slow device can be told from a slow link.
+
+class LinkStats(QObject):
+    def __init__(self, parent):
+        QObject.__init__(self, parent)
+
+        # (start time, method, url, status, error, from cache, ttfb, latency, bytes)
+        self.fRequests = deque(maxlen=LINK_STATS_REQUESTS)
+
+        # (time, received messages, received bytes, sent messages, sent bytes)
+        self.fWebSockets = deque(maxlen=LINK_STATS_WEBSOCKETS)
+
+    def clear(self):
+        self.fRequests.clear()
+        self.fWebSockets.clear()
+
+    # Record @a reply once it finishes
+    def watch(self, reply):
+        start    = time()
+        progress = [0, None] # bytes received, time of the first answer
+
+        def metaDataChanged():
+            if progress[1] is None:
+                progress[1] = time()
+
+        def downloadProgress(received, total):
+            progress[0] = received
+
+        def finished():
+            end    = time()
+            first  = progress[1] if progress[1] is not None else end
+            status = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+            method = LINK_STATS_OPERATIONS.get(reply.operation(), "OTHER")
+
+            self.fRequests.append((start, method, reply.url().toString(), status or 0, int(reply.error()),
+                                   bool(reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute)),
+                                   first - start, end - start, progress[0]))
+
+        reply.metaDataChanged.connect(metaDataChanged)
+        reply.downloadProgress.connect(downloadProgress)
+        reply.finished.connect(finished)
+
+    # Called by the page through LinkStatsBridge, see LINK_STATS_WEBSOCKET_JS
+    def websocketMessages(self, received, receivedBytes, sent, sentBytes):
+        self.fWebSockets.append((time(), received, receivedBytes, sent, sentBytes))
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Latency percentiles of the requests kept that went over the link,
+    # rates over the last LINK_STATS_RATE_WINDOW seconds
+    def summary(self):
+        now    = time()
+        since  = now - LINK_STATS_RATE_WINDOW
+        linked = [request for request in self.fRequests if not request[5]]
+
+        recentBytes    = sum(request[8] for request in self.fRequests if request[0] >= since and not request[5])
+        recentFailures = sum(1 for request in self.fRequests if request[0] >= since and request[4] != QNetworkReply.NoError)
+        recentMessages = sum(sample[1] + sample[3] for sample in self.fWebSockets if sample[0] >= since)
+
+        return {
+            'requests':   len(self.fRequests),
+            'ttfbP50':    getPercentile([request[6] for request in linked], 0.5),
+            'latencyP50': getPercentile([request[7] for request in linked], 0.5),
+            'latencyP95': getPercentile([request[7] for request in linked], 0.95),
+            'throughput': recentBytes / LINK_STATS_RATE_WINDOW,
+            'failures':   recentFailures,
+            'wsRate':     recentMessages / LINK_STATS_RATE_WINDOW,
+        }
+
+    def exportCsv(self, filename):
+        with open(filename, 'w', newline='') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(("type", "time", "method", "url", "status", "error", "from_cache",
+                             "ttfb_ms", "latency_ms", "bytes", "ws_received", "ws_received_bytes", "ws_sent", "ws_sent_bytes"))
+
+            rows = []
+
+            for start, method, url, status, error, fromCache, ttfb, latency, size in self.fRequests:
+                rows.append(("request", "%.3f" % start, method, url, status, error, int(fromCache),
+                             "%.1f" % (ttfb*1000), "%.1f" % (latency*1000), size, "", "", "", ""))
+
+            for when, received, receivedBytes, sent, sentBytes in self.fWebSockets:
+                rows.append(("websocket", "%.3f" % when, "", "", "", "", "", "", "", "",
+                             received, receivedBytes, sent, sentBytes))
+
+            rows.sort(key=lambda row: float(row[1]))
+            writer.writerows(rows)
+
+# ------------------------------------------------------------------------------------------------------------
+# Link Stats Bridge
+#
+# What the page gets to see of the stats, only websocketMessages().
+# The page can still delete it (every QObject has deleteLater), so a new one is made for each page load.
+
+class LinkStatsBridge(QObject):
+    def __init__(self, parent, stats):
+        QObject.__init__(self, parent)
+
+        self.fStats = stats
+
+    @pyqtSlot(int, int, int, int)
+    def websocketMessages(self, received, receivedBytes, sent, sentBytes):
+        self.fStats.websocketMessages(received, receivedBytes, sent, sentBytes)
+
+# ------------------------------------------------------------------------------------------------------------
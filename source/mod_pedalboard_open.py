@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSlot, Qt, QAbstractListModel, QModelIndex, QSize
+    from PyQt4.QtGui import QPixmap
+    from PyQt4.QtGui import QDialog, QDialogButtonBox, QListView
+else:
+    from PyQt5.QtCore import pyqtSlot, Qt, QAbstractListModel, QModelIndex, QSize
+    from PyQt5.QtGui import QPixmap
+    from PyQt5.QtWidgets import QDialog, QDialogButtonBox, QListView
+
+from bisect import bisect_left
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (UI)
+
+from ui_mod_pedalboard_open import Ui_PedalboardOpen
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Pedalboards)
+
+from mod_scanner import PEDALBOARDS_STATE_READY
+
+# ------------------------------------------------------------------------------------------------------------
+# Rows are handed to the view in batches of this size, as it scrolls
+
+PEDALBOARD_FETCH_BATCH = 200
+
+# ------------------------------------------------------------------------------------------------------------
+# Pedalboard List Model
+#
+# Shows a filtered view of the pedalboard list without creating anything per pedalboard.
+# Only the rows fetched by the view so far are exposed, and thumbnails come from the thumbnail service,
+# with a placeholder until they are loaded.
+# Filtering uses the pedalboard search index, so names and plugins can be searched.
+# Results are cached for the prefixes of the current filter, so deleting characters is free, and typing more
+# only searches within the previous result.
+# Scanner updates insert, remove or refresh single rows, so the view keeps its scroll position and selection.
+
+class PedalboardListModel(QAbstractListModel):
+    BundleRole = Qt.UserRole + 1
+
+    def __init__(self, parent, thumbnails):
+        QAbstractListModel.__init__(self, parent)
+
+        self.fThumbnails = thumbnails
+        self.fThumbnails.thumbnailReady.connect(self.slot_thumbnailReady)
+
+        self.fPlaceholder = QPixmap(thumbnails.thumbnailSize())
+        self.fPlaceholder.fill(Qt.transparent)
+
+        # bundle -> pedalboard, and the search index over them (both owned by the host window)
+        self.fPedalboards = {}
+        self.fSearch      = None
+
+        # thumbnail path -> bundle
+        self.fThumbnailIndex = {}
+
+        # bundles matching the current filter, sorted
+        self.fFilter  = ""
+        self.fMatches = []
+        self.fFetched = 0
+
+        # filter text -> matches, only for the current filter and its prefixes
+        self.fFilterCache = {}
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def setPedalboards(self, pedalboards, searchIndex):
+        self.beginResetModel()
+
+        self.fPedalboards    = pedalboards
+        self.fSearch         = searchIndex
+        self.fThumbnailIndex = dict((p['thumbnail'], bundle) for bundle, p in pedalboards.items() if p['thumbnail'])
+        self.fFilterCache    = {}
+        self.fMatches        = self.findMatches(self.fFilter)
+        self.fFetched        = min(PEDALBOARD_FETCH_BATCH, len(self.fMatches))
+
+        self.endResetModel()
+
+    # Apply scanner results, the pedalboards dict and search index are already up to date
+    def updatePedalboards(self, changed, removed):
+        for bundle in removed:
+            self.removeMatch(bundle)
+
+            for path in [path for path, other in self.fThumbnailIndex.items() if other == bundle]:
+                del self.fThumbnailIndex[path]
+
+        changed = [bundle for bundle in changed if bundle in self.fPedalboards]
+        matched = self.fSearch.search(self.fFilter, changed) if self.fFilter else set(changed)
+
+        for bundle in changed:
+            thumbnail = self.fPedalboards[bundle]['thumbnail']
+            if thumbnail:
+                self.fThumbnailIndex[thumbnail] = bundle
+
+            if bundle in matched:
+                self.insertMatch(bundle)
+            else:
+                self.removeMatch(bundle)
+
+        # cached results for the prefixes don't know about the changes
+        self.fFilterCache = { self.fFilter: self.fMatches } if self.fFilter else {}
+
+    def insertMatch(self, bundle):
+        row = bisect_left(self.fMatches, bundle)
+
+        if row < len(self.fMatches) and self.fMatches[row] == bundle:
+            if row < self.fFetched:
+                modelIndex = self.index(row)
+                self.dataChanged.emit(modelIndex, modelIndex)
+            return
+
+        # rows after the fetched ones are only exposed by fetchMore(), but keep the first batch filled
+        if row < self.fFetched or self.fFetched < PEDALBOARD_FETCH_BATCH:
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.fMatches.insert(row, bundle)
+            self.fFetched += 1
+            self.endInsertRows()
+        else:
+            self.fMatches.insert(row, bundle)
+
+    def removeMatch(self, bundle):
+        row = bisect_left(self.fMatches, bundle)
+
+        if row >= len(self.fMatches) or self.fMatches[row] != bundle:
+            return
+
+        if row < self.fFetched:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.fMatches[row]
+            self.fFetched -= 1
+            self.endRemoveRows()
+        else:
+            del self.fMatches[row]
+
+    def setFilter(self, text):
+        text = text.strip().lower()
+
+        if text == self.fFilter:
+            return
+
+        self.beginResetModel()
+
+        self.fFilter  = text
+        self.fMatches = self.findMatches(text)
+        self.fFetched = min(PEDALBOARD_FETCH_BATCH, len(self.fMatches))
+
+        self.endResetModel()
+
+        # whatever was queued is for rows that are gone now
+        self.fThumbnails.cancelPending()
+
+    def findMatches(self, text):
+        if not text:
+            return sorted(self.fPedalboards)
+
+        matches = self.fFilterCache.get(text)
+
+        if matches is not None:
+            return matches
+
+        # drop what's not a prefix of the new filter, the longest one left has the fewest matches to look at
+        self.fFilterCache = dict((key, value) for key, value in self.fFilterCache.items() if text.startswith(key))
+
+        if self.fFilterCache:
+            previous = self.fFilterCache[max(self.fFilterCache, key=len)]
+            matches  = sorted(self.fSearch.search(text, previous))
+        else:
+            pedalboards = self.fPedalboards
+            matches     = sorted(bundle for bundle in self.fSearch.search(text) if bundle in pedalboards)
+
+        self.fFilterCache[text] = matches
+        return matches
+
+    def matchCount(self):
+        return len(self.fMatches)
+
+    def totalCount(self):
+        return len(self.fPedalboards)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return self.fFetched
+
+    def canFetchMore(self, parent):
+        if parent.isValid():
+            return False
+
+        return self.fFetched < len(self.fMatches)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+
+        count = min(PEDALBOARD_FETCH_BATCH, len(self.fMatches) - self.fFetched)
+
+        if count <= 0:
+            return
+
+        self.beginInsertRows(QModelIndex(), self.fFetched, self.fFetched + count - 1)
+        self.fFetched += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self.fFetched:
+            return None
+
+        pedalboard = self.fPedalboards[self.fMatches[index.row()]]
+
+        if role == Qt.DisplayRole:
+            return pedalboard['title']
+
+        if role == Qt.DecorationRole:
+            pixmap = self.fThumbnails.thumbnail(pedalboard['thumbnail'])
+            return pixmap if pixmap is not None else self.fPlaceholder
+
+        if role == Qt.ToolTipRole:
+            return pedalboard['bundle']
+
+        if role == self.BundleRole:
+            return pedalboard['bundle']
+
+        return None
+
+    # --------------------------------------------------------------------------------------------------------
+
+    @pyqtSlot(str)
+    def slot_thumbnailReady(self, path):
+        bundle = self.fThumbnailIndex.get(path)
+
+        if bundle is None:
+            return
+
+        row = bisect_left(self.fMatches, bundle)
+
+        if row >= self.fFetched or self.fMatches[row] != bundle:
+            return
+
+        modelIndex = self.index(row)
+        self.dataChanged.emit(modelIndex, modelIndex)
+
+# ------------------------------------------------------------------------------------------------------------
+# Pedalboard Open Dialog
+#
+# Lists the pedalboards known by the host window, which keeps them updated as the scanner finds them.
+
+class PedalboardOpenWindow(QDialog):
+    def __init__(self, parent, thumbnails):
+        QDialog.__init__(self, parent)
+        self.ui = Ui_PedalboardOpen()
+        self.ui.setupUi(self)
+
+        self.fHost  = parent
+        self.fModel = PedalboardListModel(self, thumbnails)
+        self.fModel.setPedalboards(parent.fPedalboardsDict, parent.fPedalboardSearch)
+
+        # ----------------------------------------------------------------------------------------------------
+        # Set up GUI
+
+        thumbSize = thumbnails.thumbnailSize()
+
+        self.ui.lv_pedalboards.setViewMode(QListView.IconMode)
+        self.ui.lv_pedalboards.setMovement(QListView.Static)
+        self.ui.lv_pedalboards.setResizeMode(QListView.Adjust)
+        self.ui.lv_pedalboards.setIconSize(thumbSize)
+        self.ui.lv_pedalboards.setGridSize(QSize(thumbSize.width() + 16, thumbSize.height() + 2*self.fontMetrics().height() + 8))
+        self.ui.lv_pedalboards.setWordWrap(True)
+        self.ui.lv_pedalboards.setModel(self.fModel)
+
+        self.ui.buttonBox.button(QDialogButtonBox.Open).setEnabled(False)
+
+        self.updateInfo(parent.fPedalboardsState)
+
+        # ----------------------------------------------------------------------------------------------------
+        # Set-up connections
+
+        parent.pedalboardsChanged.connect(self.slot_pedalboardsChanged)
+        parent.pedalboardsUpdated.connect(self.slot_pedalboardsUpdated)
+
+        self.ui.le_filter.textChanged.connect(self.slot_filterChanged)
+        self.ui.lv_pedalboards.doubleClicked.connect(self.accept)
+        self.ui.lv_pedalboards.selectionModel().currentChanged.connect(self.slot_currentChanged)
+
+        self.finished.connect(self.slot_finished)
+
+    def getSelectedBundle(self):
+        index = self.ui.lv_pedalboards.currentIndex()
+
+        if not index.isValid():
+            return ""
+
+        return self.fModel.data(index, PedalboardListModel.BundleRole) or ""
+
+    # --------------------------------------------------------------------------------------------------------
+
+    @pyqtSlot(int)
+    def slot_pedalboardsChanged(self, state):
+        self.updateInfo(state)
+
+    @pyqtSlot(list, list)
+    def slot_pedalboardsUpdated(self, changed, removed):
+        self.fModel.updatePedalboards(changed, removed)
+
+    @pyqtSlot(str)
+    def slot_filterChanged(self, text):
+        self.fModel.setFilter(text)
+        self.updateInfo(self.fHost.fPedalboardsState)
+
+        if self.fModel.rowCount() > 0:
+            self.ui.lv_pedalboards.setCurrentIndex(self.fModel.index(0))
+
+    @pyqtSlot(QModelIndex, QModelIndex)
+    def slot_currentChanged(self, current, previous):
+        self.ui.buttonBox.button(QDialogButtonBox.Open).setEnabled(current.isValid())
+
+    @pyqtSlot(int)
+    def slot_finished(self, result):
+        self.fHost.pedalboardsChanged.disconnect(self.slot_pedalboardsChanged)
+        self.fHost.pedalboardsUpdated.disconnect(self.slot_pedalboardsUpdated)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def updateInfo(self, state):
+        if self.fModel.matchCount() == self.fModel.totalCount():
+            text = self.tr("%i pedalboards") % self.fModel.totalCount()
+        else:
+            text = self.tr("%i of %i pedalboards") % (self.fModel.matchCount(), self.fModel.totalCount())
+
+        if state != PEDALBOARDS_STATE_READY:
+            text += " " + self.tr("(scanning...)")
+
+        self.ui.label_info.setText(text)
+
+# ------------------------------------------------------------------------------------------------------------
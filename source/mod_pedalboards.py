@@ -0,0 +1,619 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+import json
+import os
+import re
+
+from hashlib import sha1
+
+# ------------------------------------------------------------------------------------------------------------
+# Pedalboard index file format, bump when the stored info changes
+
+PEDALBOARD_INDEX_VERSION = 3
+
+# ------------------------------------------------------------------------------------------------------------
+# Get a stamp that changes whenever any of the bundle's TTL files change.
+# Returns an empty string if the path is not a bundle (no TTL files).
+
+def getBundleStamp(bundle):
+    ttls = []
+
+    try:
+        entries = os.scandir(bundle)
+    except OSError:
+        return ""
+
+    with entries:
+        for entry in entries:
+            if not entry.name.endswith(".ttl"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            ttls.append("%s:%i:%i" % (entry.name, stat.st_mtime_ns, stat.st_size))
+
+    if not ttls:
+        return ""
+
+    ttls.sort()
+    return sha1("\n".join(ttls).encode("utf-8", errors="ignore")).hexdigest()
+
+# ------------------------------------------------------------------------------------------------------------
+# Check if a bundle holds a pedalboard (an ingen graph), without parsing it.
+# Pedalboards share their directories with regular plugin bundles, which are skipped this way.
+
+def isPedalboardBundle(bundle):
+    try:
+        with open(os.path.join(bundle, "manifest.ttl"), 'rb') as fh:
+            manifest = fh.read()
+    except OSError:
+        return False
+
+    return b"ingen:Graph" in manifest or b"ingen#Graph" in manifest
+
+# ------------------------------------------------------------------------------------------------------------
+# Parse a single pedalboard bundle using mod-ui utils
+
+def parsePedalboardBundle(bundle):
+    from modtools.utils import get_pedalboard_info
+
+    info    = get_pedalboard_info(bundle)
+    plugins = info.get('plugins', [])
+    thumb   = os.path.join(bundle, "thumbnail.png")
+    author  = info.get('author') or ""
+
+    if isinstance(author, dict):
+        author = author.get('name', "")
+
+    return {
+        'bundle':    bundle,
+        'title':     info.get('title', "") or os.path.basename(bundle.rstrip(os.sep)),
+        'author':    author,
+        'thumbnail': thumb if os.path.exists(thumb) else "",
+        'plugins':   [p['uri'] for p in plugins],
+    }
+
+# ------------------------------------------------------------------------------------------------------------
+# Get the label (or name) of every installed plugin, as a dict of URI -> label.
+# Uses mod-ui's list of installed plugins, which only has the essential info of each one and is kept cached.
+# Labels change whenever plugins are installed or updated, so they are not stored in the pedalboard index.
+
+def getInstalledPluginLabels():
+    from modtools.utils import get_all_plugins
+
+    return dict((plugin['uri'], plugin.get('label') or plugin.get('name') or "") for plugin in get_all_plugins())
+
+# ------------------------------------------------------------------------------------------------------------
+# Pedalboard Index
+#
+# Keeps pedalboard metadata on disk, keyed by bundle path plus a stamp of its TTL files.
+# Loading the index is a single read, refreshing only re-parses the bundles whose stamp changed.
+# All bundles in @a pedalboardsDirs are tracked, the ones that are not pedalboards are stored without info.
+# The plugins used by each pedalboard are also stored reversed (plugin URI -> bundles), see PluginUsersIndex.
+
+class PedalboardIndex(object):
+    def __init__(self, indexFile, pedalboardsDirs, parser=parsePedalboardBundle):
+        self.fIndexFile       = indexFile
+        self.fPedalboardsDirs = pedalboardsDirs
+        self.fParser          = parser
+
+        # bundle path -> {'stamp': str, 'info': dict}
+        self.fEntries = {}
+        self.fDirty   = False
+
+        # plugin URI -> bundles, kept in sync with fEntries
+        self.fPluginUsers = PluginUsersIndex()
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def load(self):
+        self.fEntries = {}
+        self.fDirty   = False
+        self.fPluginUsers.clear()
+
+        try:
+            with open(self.fIndexFile, 'r', encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return False
+
+        if not isinstance(data, dict) or data.get('version') != PEDALBOARD_INDEX_VERSION:
+            return False
+
+        self.fEntries = data.get('pedalboards', {})
+
+        # indexes saved before plugin users were stored get them rebuilt, the bundles don't need re-parsing
+        if not self.fPluginUsers.fromDict(data.get('pluginUsers')):
+            self.rebuildPluginUsers()
+            return True
+
+        # pedalboards without plugins are not part of the stored map
+        for entry in self.fEntries.values():
+            if entry['info'] is not None and not entry['info']['plugins']:
+                self.fPluginUsers.update(entry['info'])
+
+        return True
+
+    def save(self):
+        if not self.fDirty:
+            return True
+
+        data = {
+            'version': PEDALBOARD_INDEX_VERSION,
+            'pedalboards': self.fEntries,
+            'pluginUsers': self.fPluginUsers.toDict(),
+        }
+
+        tmpFile = self.fIndexFile + ".tmp"
+
+        try:
+            os.makedirs(os.path.dirname(self.fIndexFile), exist_ok=True)
+            with open(tmpFile, 'w', encoding="utf-8") as fh:
+                json.dump(data, fh, separators=(',', ':'))
+            os.replace(tmpFile, self.fIndexFile)
+        except OSError as e:
+            print("PedalboardIndex: failed to save index:", e)
+            return False
+
+        self.fDirty = False
+        return True
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def listBundles(self):
+        bundles = []
+
+        for pedalboardsDir in self.fPedalboardsDirs:
+            try:
+                entries = os.scandir(pedalboardsDir)
+            except OSError:
+                continue
+
+            with entries:
+                bundles.extend(entry.path for entry in entries if entry.is_dir())
+
+        return sorted(bundles)
+
+    def refresh(self):
+        bundles = self.listBundles()
+        self.removeStaleBundles(bundles)
+
+        for bundle in bundles:
+            self.updateBundle(bundle)
+
+        return self.pedalboards()
+
+    # Forget bundles that are no longer present, returns the list of removed ones
+    def removeStaleBundles(self, bundles):
+        removed = list(set(self.fEntries) - set(bundles))
+
+        for bundle in removed:
+            self.fEntries.pop(bundle)
+            self.fPluginUsers.remove(bundle)
+
+        if removed:
+            self.fDirty = True
+
+        return removed
+
+    # Re-parse a bundle if its stamp changed, returns True if the stored info was modified
+    def updateBundle(self, bundle):
+        update = self.parseBundle(bundle)
+
+        if update is None:
+            return False
+
+        self.storeBundle(bundle, *update)
+        return True
+
+    # Parse a bundle if its stamp changed, without modifying the index (the slow half of updateBundle).
+    # Returns None if nothing changed, otherwise the (stamp, info) to pass to storeBundle().
+    def parseBundle(self, bundle):
+        stamp = getBundleStamp(bundle)
+        entry = self.fEntries.get(bundle)
+
+        if not stamp:
+            return None if entry is None else ("", None)
+
+        if entry is not None and entry['stamp'] == stamp:
+            return None
+
+        if not isPedalboardBundle(bundle):
+            return (stamp, None)
+
+        try:
+            return (stamp, self.fParser(bundle))
+        except Exception as e:
+            print("PedalboardIndex: failed to parse '%s': %s" % (bundle, e))
+            return (stamp, None)
+
+    # Store the result of parseBundle(), an empty @a stamp means the bundle is gone
+    def storeBundle(self, bundle, stamp, info):
+        self.fDirty = True
+
+        if not stamp:
+            self.fEntries.pop(bundle, None)
+            self.fPluginUsers.remove(bundle)
+            return
+
+        self.fEntries[bundle] = { 'stamp': stamp, 'info': info }
+
+        if info is not None:
+            self.fPluginUsers.update(info)
+        else:
+            self.fPluginUsers.remove(bundle)
+
+    def pedalboardInfo(self, bundle):
+        entry = self.fEntries.get(bundle)
+        return entry['info'] if entry is not None else None
+
+    def pedalboards(self):
+        return [self.fEntries[bundle]['info'] for bundle in sorted(self.fEntries) if self.fEntries[bundle]['info'] is not None]
+
+    def pluginUsers(self):
+        return self.fPluginUsers
+
+    def rebuildPluginUsers(self):
+        self.fPluginUsers.clear()
+
+        for entry in self.fEntries.values():
+            if entry['info'] is not None:
+                self.fPluginUsers.update(entry['info'])
+
+        self.fDirty = True
+
+# ------------------------------------------------------------------------------------------------------------
+# Pedalboard Search Index
+#
+# Inverted index over pedalboard titles, bundle names and the plugins each pedalboard uses.
+# Text is split into lowercase alphanumeric tokens, each token maps to the pedalboards containing it,
+# and a bigram/trigram index over the (much smaller) token vocabulary finds the tokens containing a search term.
+# Single characters are in most tokens, so they map straight to the pedalboards instead.
+# A query matches the pedalboards that contain every one of its terms as part of some token.
+# Plugins are also found by the labels of the installed plugins, see setPluginLabels().
+
+class PedalboardSearchIndex(object):
+    def __init__(self):
+        # bundle -> pedalboard, to index it again when plugin labels change
+        self.fPedalboards = {}
+
+        # bundle -> set of tokens
+        self.fDocuments = {}
+
+        # token -> set of bundles
+        self.fPostings = {}
+
+        # bigram or trigram -> set of tokens
+        self.fGrams = {}
+
+        # character -> set of bundles
+        self.fChars = {}
+
+        # plugin URI -> label, see getInstalledPluginLabels()
+        self.fPluginLabels = {}
+
+    def __len__(self):
+        return len(self.fDocuments)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def clear(self):
+        self.fPedalboards.clear()
+        self.fDocuments.clear()
+        self.fPostings.clear()
+        self.fGrams.clear()
+        self.fChars.clear()
+
+    # Set the labels of the installed plugins (URI -> label), pedalboards using changed ones are indexed again
+    def setPluginLabels(self, labels):
+        old     = self.fPluginLabels
+        changed = set(uri for uri in set(old) | set(labels) if old.get(uri) != labels.get(uri))
+
+        self.fPluginLabels = labels
+
+        if not changed:
+            return
+
+        for pedalboard in list(self.fPedalboards.values()):
+            if not changed.isdisjoint(pedalboard.get('plugins', ())):
+                self.update(pedalboard)
+
+    # Add or replace a pedalboard, as returned by parsePedalboardBundle
+    def update(self, pedalboard):
+        bundle = pedalboard['bundle']
+        tokens = set(tokenizeSearchText(pedalboardSearchText(pedalboard, self.fPluginLabels)))
+        old    = self.fDocuments.get(bundle)
+
+        self.fPedalboards[bundle] = pedalboard
+
+        if old is not None:
+            if old == tokens:
+                return
+            self.removeTokens(bundle, old - tokens)
+            self.updateChars(bundle, old, tokens)
+            added = tokens - old
+        else:
+            self.updateChars(bundle, (), tokens)
+            added = tokens
+
+        self.fDocuments[bundle] = tokens
+
+        for token in added:
+            bundles = self.fPostings.get(token)
+
+            if bundles is None:
+                bundles = self.fPostings[token] = set()
+                for gram in getSearchGrams(token):
+                    self.fGrams.setdefault(gram, set()).add(token)
+
+            bundles.add(bundle)
+
+    def remove(self, bundle):
+        self.fPedalboards.pop(bundle, None)
+        tokens = self.fDocuments.pop(bundle, None)
+
+        if tokens is not None:
+            self.removeTokens(bundle, tokens)
+            self.updateChars(bundle, tokens, ())
+
+    def removeTokens(self, bundle, tokens):
+        for token in tokens:
+            bundles = self.fPostings[token]
+            bundles.discard(bundle)
+
+            if bundles:
+                continue
+
+            # last user of this token, drop it from the vocabulary
+            del self.fPostings[token]
+
+            for gram in getSearchGrams(token):
+                gramTokens = self.fGrams[gram]
+                gramTokens.discard(token)
+                if not gramTokens:
+                    del self.fGrams[gram]
+
+    # Move @a bundle between the character sets, from the characters of @a oldTokens to those of @a newTokens
+    def updateChars(self, bundle, oldTokens, newTokens):
+        oldChars = set("".join(oldTokens))
+        newChars = set("".join(newTokens))
+
+        for char in oldChars - newChars:
+            bundles = self.fChars[char]
+            bundles.discard(bundle)
+            if not bundles:
+                del self.fChars[char]
+
+        for char in newChars - oldChars:
+            self.fChars.setdefault(char, set()).add(bundle)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Get the set of bundles matching @a query, an empty query matches everything
+    # With @a within, only those bundles are checked, used to narrow down a previous result as the query grows
+    def search(self, query, within=None):
+        terms = sorted(set(tokenizeSearchText(query)), key=len, reverse=True)
+
+        if within is not None:
+            return set(bundle for bundle in within if self.matches(bundle, terms))
+
+        if not terms:
+            return set(self.fDocuments)
+
+        result = None
+
+        # longest terms first, they usually match the fewest pedalboards
+        for term in terms:
+            if len(term) == 1:
+                bundles = self.fChars.get(term, set())
+                result  = set(bundles) if result is None else result & bundles
+            else:
+                bundles = set()
+
+                for token in self.findTokens(term):
+                    bundles.update(self.fPostings[token])
+
+                result = bundles if result is None else result & bundles
+
+            if not result:
+                return set()
+
+        return result
+
+    # Check if every one of @a terms is part of a token of @a bundle
+    def matches(self, bundle, terms):
+        tokens = self.fDocuments.get(bundle)
+
+        if tokens is None:
+            return False
+
+        for term in terms:
+            if not any(term in token for token in tokens):
+                return False
+
+        return True
+
+    # Get the tokens containing @a term, at least 2 characters long (see fChars for single characters)
+    def findTokens(self, term):
+        if len(term) == 2:
+            return self.fGrams.get(term, ())
+
+        candidates = None
+
+        for trigram in sorted(getTrigrams(term), key=lambda t: len(self.fGrams.get(t, ()))):
+            tokens = self.fGrams.get(trigram)
+
+            if tokens is None:
+                return []
+
+            candidates = set(tokens) if candidates is None else candidates & tokens
+
+            if not candidates:
+                return []
+
+        # trigrams can match out of order, check the actual substring
+        return [token for token in candidates if term in token]
+
+# ------------------------------------------------------------------------------------------------------------
+# Plugin Users Index
+#
+# Reverse index from plugin URI to the pedalboards using it, built from the ingen:block prototypes
+# of each pedalboard (the 'plugins' list of parsePedalboardBundle).
+# Answers which pedalboards break when plugins are removed, and which ones can be loaded
+# with a given set of installed plugins, without touching any bundle.
+
+class PluginUsersIndex(object):
+    def __init__(self):
+        # bundle -> set of plugin URIs
+        self.fPedalboards = {}
+
+        # plugin URI -> set of bundles
+        self.fUsers = {}
+
+    def __len__(self):
+        return len(self.fPedalboards)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def clear(self):
+        self.fPedalboards.clear()
+        self.fUsers.clear()
+
+    # Add or replace a pedalboard, as returned by parsePedalboardBundle
+    def update(self, pedalboard):
+        bundle  = pedalboard['bundle']
+        plugins = set(pedalboard.get('plugins', []))
+        old     = self.fPedalboards.get(bundle)
+
+        if old is not None:
+            if old == plugins:
+                return
+            self.removeUses(bundle, old - plugins)
+            added = plugins - old
+        else:
+            added = plugins
+
+        self.fPedalboards[bundle] = plugins
+
+        for uri in added:
+            self.fUsers.setdefault(uri, set()).add(bundle)
+
+    def remove(self, bundle):
+        plugins = self.fPedalboards.pop(bundle, None)
+
+        if plugins is not None:
+            self.removeUses(bundle, plugins)
+
+    def removeUses(self, bundle, plugins):
+        for uri in plugins:
+            bundles = self.fUsers[uri]
+            bundles.discard(bundle)
+
+            if not bundles:
+                del self.fUsers[uri]
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # All plugin URIs used by at least one pedalboard
+    def plugins(self):
+        return sorted(self.fUsers)
+
+    # Get the pedalboards using @a uri
+    def pedalboardsUsing(self, uri):
+        return sorted(self.fUsers.get(uri, ()))
+
+    # Get the pedalboards that would break if all plugins in @a uris were removed
+    def pedalboardsUsingAny(self, uris):
+        bundles = set()
+
+        for uri in uris:
+            bundles.update(self.fUsers.get(uri, ()))
+
+        return sorted(bundles)
+
+    # Get the plugins used by pedalboards but not in @a installed, as a dict of URI -> bundles
+    def missingPlugins(self, installed):
+        installed = set(installed)
+        return dict((uri, sorted(bundles)) for uri, bundles in self.fUsers.items() if uri not in installed)
+
+    # Get the pedalboards whose plugins are all in @a installed
+    def loadablePedalboards(self, installed):
+        installed = set(installed)
+        broken    = set()
+
+        # only the used URIs matter, not the pedalboards or the installed list
+        for uri, bundles in self.fUsers.items():
+            if uri not in installed:
+                broken.update(bundles)
+
+        return sorted(bundle for bundle in self.fPedalboards if bundle not in broken)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Serializable form, plugin URI -> sorted list of bundles
+    def toDict(self):
+        return dict((uri, sorted(bundles)) for uri, bundles in self.fUsers.items())
+
+    # Restore from toDict(), returns False if @a data is not valid
+    def fromDict(self, data):
+        self.clear()
+
+        if not isinstance(data, dict):
+            return False
+
+        for uri, bundles in data.items():
+            if not isinstance(bundles, list) or not bundles:
+                self.clear()
+                return False
+
+            self.fUsers[uri] = set(bundles)
+
+            for bundle in bundles:
+                self.fPedalboards.setdefault(bundle, set()).add(uri)
+
+        return True
+
+# ------------------------------------------------------------------------------------------------------------
+# Search helpers
+
+SEARCH_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# Text a pedalboard can be found by: title, bundle name, author, plugin URIs and the labels in @a pluginLabels
+def pedalboardSearchText(pedalboard, pluginLabels={}):
+    plugins = pedalboard.get('plugins', [])
+    parts   = [pedalboard['title'], os.path.basename(pedalboard['bundle'].rstrip(os.sep)), pedalboard.get('author', "")]
+    parts.extend(plugins)
+    parts.extend(pluginLabels.get(uri, "") for uri in plugins)
+    return " ".join(parts)
+
+def tokenizeSearchText(text):
+    return SEARCH_TOKEN_PATTERN.findall(text.lower())
+
+def getTrigrams(token):
+    return set(token[i:i+3] for i in range(len(token)-2))
+
+# All bigrams and trigrams of @a token
+def getSearchGrams(token):
+    return set(token[i:i+n] for n in (2, 3) for i in range(len(token)-n+1))
+
+# ------------------------------------------------------------------------------------------------------------
@@ -26,10 +26,34 @@ from mod_settings import *
 
 from PyQt5.QtCore import pyqtSignal, pyqtSlot, Qt, QSettings, QTimer, QUrl
 from PyQt5.QtGui import QDesktopServices
-from PyQt5.QtWidgets import QAction, QApplication, QInputDialog, QLineEdit, QMainWindow, QMessageBox
+from PyQt5.QtWidgets import QAction, QApplication, QFileDialog, QInputDialog, QLabel, QLineEdit, QListWidgetItem
+from PyQt5.QtWidgets import QMainWindow, QMessageBox
 from PyQt5.QtWebKit import QWebSettings
 from PyQt5.QtWebKitWidgets import QWebInspector, QWebPage, QWebView
 
+import json
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Discovery)
+
+from mod_discovery import DeviceDiscovery, DISCOVERY_BT_COUNT, getBestLink
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Idle)
+
+from mod_idle import IdleScheduler, IDLE_PRIORITY_LOW
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Link Stats)
+
+from mod_linkstats import LinkStats, LinkStatsBridge, LINK_STATS_JS_OBJECT, LINK_STATS_WEBSOCKET_JS
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Remote Cache)
+
+from mod_remotecache import createRemoteCache, getRemoteCacheName, setRemoteCacheName
+from mod_remotecache import RemoteDeviceProbe, RemoteNetworkAccessManager
+
 # ------------------------------------------------------------------------------------------------------------
 # Imports (UI)
 
@@ -70,24 +94,64 @@ class RemoteWebPage(QWebPage):
 
 # ------------------------------------------------------------------------------------------------------------
 # Remote Connect Dialog
+#
+# Bluetooth, USB and the LAN hosts used before are probed as soon as the dialog opens.
+# Each reachable link is listed with its round-trip time and throughput, and the fastest one to the device
+# used last time (or to the only device found) is selected unless the user picked one already.
 
 class RemoteConnectDialog(QDialog):
     INDEX_BT  = 0
     INDEX_LAN = 1
     INDEX_USB = 2
 
+    # LAN hosts remembered for discovery
+    MAX_LAN_HOSTS = 8
+
     def __init__(self, parent):
-        QMainWindow.__init__(self, parent)
+        QDialog.__init__(self, parent)
         self.ui = Ui_ConnectDialog()
         self.ui.setupUi(self)
 
         self.fAddress = QUrl("")
 
+        # links found by the last discovery, as dicts from DeviceDiscovery
+        self.fResults = []
+
+        # identity of the device connected to last time, empty if unknown
+        self.fIdentity = ""
+
+        # address connected to last time, used to pick a link when devices report no identity
+        self.fLastUrl = ""
+
+        # "ip:port" of LAN hosts connected to before, most recent first
+        self.fLanHosts = []
+
+        # set once the user picks a link, discovery won't change the selection after that
+        self.fUserChoice = False
+
+        self.fDiscovery = DeviceDiscovery(self)
+
         self.loadSettings()
 
+        # show what was found last time while looking again
+        for result in self.fResults:
+            self.updateLinkItem(result, True)
+
         self.accepted.connect(self.slot_setAddress)
         self.finished.connect(self.slot_saveSettings)
 
+        self.fDiscovery.linkFound.connect(self.slot_linkFound)
+        self.fDiscovery.finished.connect(self.slot_discoveryFinished)
+
+        self.ui.b_discover.clicked.connect(self.slot_discover)
+        self.ui.comboBox.activated.connect(self.slot_userChoice)
+        self.ui.le_ip_lan.textEdited.connect(self.slot_userChoice)
+        self.ui.le_ip_usb.textEdited.connect(self.slot_userChoice)
+        self.ui.lw_devices.itemClicked.connect(self.slot_linkClicked)
+        self.ui.lw_devices.itemDoubleClicked.connect(self.slot_linkDoubleClicked)
+
+        QTimer.singleShot(0, self.slot_discover)
+
     def getAddress(self):
         return self.fAddress
 
@@ -101,6 +165,18 @@ class RemoteConnectDialog(QDialog):
         self.ui.sb_port_lan.setValue(settings.value("lan-port", 8888, type=int))
         self.ui.le_ip_usb.setText(settings.value("usb-ip", "192.168.51.1", type=str))
 
+        try:
+            self.fLanHosts = json.loads(settings.value("lan-hosts", "[]", type=str))
+            discovered     = json.loads(settings.value("discovered", "{}", type=str))
+            self.fResults  = discovered.get('results', [])
+            self.fIdentity = discovered.get('identity', "")
+            self.fLastUrl  = discovered.get('url', "")
+        except (ValueError, AttributeError):
+            self.fLanHosts = []
+            self.fResults  = []
+            self.fIdentity = ""
+            self.fLastUrl  = ""
+
     @pyqtSlot()
     def slot_saveSettings(self):
         settings = QSettings()
@@ -112,6 +188,10 @@ class RemoteConnectDialog(QDialog):
         settings.setValue("lan-port",  self.ui.sb_port_lan.value())
         settings.setValue("usb-ip",    self.ui.le_ip_usb.text())
 
+        settings.setValue("lan-hosts",  json.dumps(self.fLanHosts))
+        settings.setValue("discovered", json.dumps({ 'results': self.fResults, 'identity': self.fIdentity,
+                                                     'url': self.fLastUrl }))
+
     @pyqtSlot()
     def slot_setAddress(self):
         index = self.ui.comboBox.currentIndex()
@@ -134,11 +214,156 @@ class RemoteConnectDialog(QDialog):
             url += ":%i" % port
 
         self.fAddress = QUrl(url)
+        self.fLastUrl = url
+
+        if index == self.INDEX_LAN:
+            host = "%s:%i" % (address, port)
+            self.fLanHosts = [host] + [h for h in self.fLanHosts if h != host][:self.MAX_LAN_HOSTS-1]
+
+        for result in self.fResults:
+            if QUrl(result['url']) == self.fAddress and result['identity']:
+                self.fIdentity = result['identity']
+                break
+
+        # finished() came before accepted(), save again with the new address
+        self.slot_saveSettings()
 
     def done(self, r):
+        self.fDiscovery.abort()
         QDialog.done(self, r)
         self.close()
 
+    # --------------------------------------------------------------------------------------------------------
+    # Discovery
+
+    def getCandidates(self):
+        candidates = []
+
+        for i in range(1, max(DISCOVERY_BT_COUNT, self.ui.sb_devnumber_bt.value())+1):
+            candidates.append((self.INDEX_BT, "http://192.168.50.%i" % i))
+
+        candidates.append((self.INDEX_USB, "http://%s" % self.ui.le_ip_usb.text()))
+
+        for host in ["%s:%i" % (self.ui.le_ip_lan.text(), self.ui.sb_port_lan.value())] + self.fLanHosts:
+            candidates.append((self.INDEX_LAN, "http://%s" % host))
+
+        return candidates
+
+    def getLinkText(self, result):
+        url  = QUrl(result['url'])
+        text = "%s - %s" % (self.ui.comboBox.itemText(result['link']), url.authority())
+
+        text += self.tr(" - %i ms, %.1f KiB/s") % (result['rtt']*1000, result['throughput']/1024)
+
+        if result['identity']:
+            text += " [%s]" % result['identity']
+
+        return text
+
+    def updateLinkItem(self, result, cached=False):
+        text = self.getLinkText(result)
+
+        if cached:
+            text += self.tr(" (last seen)")
+
+        for i in range(self.ui.lw_devices.count()):
+            item = self.ui.lw_devices.item(i)
+            if item.data(Qt.UserRole) == result['url']:
+                item.setText(text)
+                return item
+
+        item = QListWidgetItem(text)
+        item.setData(Qt.UserRole, result['url'])
+        self.ui.lw_devices.addItem(item)
+        return item
+
+    def selectLink(self, result):
+        url  = QUrl(result['url'])
+        link = result['link']
+
+        if link == self.INDEX_BT:
+            self.ui.sb_devnumber_bt.setValue(int(url.host().rsplit(".", 1)[-1]))
+        elif link == self.INDEX_LAN:
+            self.ui.le_ip_lan.setText(url.host())
+            self.ui.sb_port_lan.setValue(url.port(80))
+        elif link == self.INDEX_USB:
+            self.ui.le_ip_usb.setText(url.host())
+        else:
+            return
+
+        self.ui.comboBox.setCurrentIndex(link)
+
+        for i in range(self.ui.lw_devices.count()):
+            item = self.ui.lw_devices.item(i)
+            if item.data(Qt.UserRole) == result['url']:
+                self.ui.lw_devices.setCurrentItem(item)
+                break
+
+    def getResult(self, item):
+        url = item.data(Qt.UserRole)
+
+        for result in self.fDiscovery.results() + self.fResults:
+            if result['url'] == url:
+                return result
+
+        return None
+
+    @pyqtSlot()
+    def slot_discover(self):
+        self.ui.b_discover.setEnabled(False)
+        self.ui.label_discovery.setText(self.tr("Searching for devices..."))
+        self.fDiscovery.start(self.getCandidates())
+
+    @pyqtSlot(object)
+    def slot_linkFound(self, result):
+        self.updateLinkItem(result)
+
+    @pyqtSlot()
+    def slot_discoveryFinished(self):
+        self.fResults = self.fDiscovery.results()
+
+        # drop the links that are gone since last time
+        urls = set(result['url'] for result in self.fResults)
+
+        for i in reversed(range(self.ui.lw_devices.count())):
+            if self.ui.lw_devices.item(i).data(Qt.UserRole) not in urls:
+                self.ui.lw_devices.takeItem(i)
+
+        self.ui.b_discover.setEnabled(True)
+
+        if not self.fResults:
+            self.ui.label_discovery.setText(self.tr("No devices found"))
+            return
+
+        self.ui.label_discovery.setText(self.tr("Devices found:"))
+
+        if self.fUserChoice:
+            return
+
+        best = getBestLink(self.fResults, self.fIdentity, self.fLastUrl)
+
+        if best is not None:
+            self.selectLink(best)
+
+    @pyqtSlot()
+    def slot_userChoice(self):
+        self.fUserChoice = True
+
+    @pyqtSlot(QListWidgetItem)
+    def slot_linkClicked(self, item):
+        result = self.getResult(item)
+
+        if result is None:
+            return
+
+        self.fUserChoice = True
+        self.selectLink(result)
+
+    @pyqtSlot(QListWidgetItem)
+    def slot_linkDoubleClicked(self, item):
+        self.slot_linkClicked(item)
+        self.accept()
+
 # ------------------------------------------------------------------------------------------------------------
 # Remote Window
 
@@ -159,8 +384,26 @@ class RemoteWindow(QMainWindow):
         # Current remote url
         self.fRemoteURL = ""
 
-        # Qt idle timer
-        self.fIdleTimerId = 0
+        # Name the current device's assets are cached under, empty until known
+        self.fRemoteCacheName = ""
+
+        # Webview load signals are connected, and a new load should follow the current one
+        self.fLoading       = False
+        self.fReloadPending = False
+
+        # Static UI and plugin GUI assets are cached on disk per device and served from there first
+        self.fNetworkManager = RemoteNetworkAccessManager(self, createRemoteCache())
+        self.fDeviceProbe    = RemoteDeviceProbe(self, self.fNetworkManager)
+
+        # Latency, bytes and failures of every request, plus the page's websocket message counts
+        self.fLinkStats = LinkStats(self)
+        self.fNetworkManager.setLinkStats(self.fLinkStats)
+
+        # What the page gets instead of the stats themselves, replaced on each page load
+        self.fLinkStatsBridge = None
+
+        # Periodic and deferred work, all run from a single timer that is only armed when needed
+        self.fIdleScheduler = IdleScheduler(self)
 
         # to be filled with key-value pairs of current settings
         self.fSavedSettings = {}
@@ -173,6 +416,7 @@ class RemoteWindow(QMainWindow):
         self.ui.swp_webview.layout().addWidget(self.ui.webview)
 
         self.ui.webpage = RemoteWebPage(self)
+        self.ui.webpage.setNetworkAccessManager(self.fNetworkManager)
         self.ui.webview.setPage(self.ui.webpage)
 
         self.ui.webinspector = QWebInspector(None)
@@ -190,6 +434,8 @@ class RemoteWindow(QMainWindow):
         self.ui.act_backend_hide_modgui.setVisible(False)
         self.ui.act_backend_hide_cloud.setEnabled(False)
         self.ui.act_backend_hide_cloud.setVisible(False)
+        self.ui.act_backend_dump.setEnabled(False)
+        self.ui.act_backend_dump.setVisible(False)
         self.ui.menu_Backend.menuAction().setEnabled(False)
         self.ui.menu_Backend.menuAction().setVisible(False)
 
@@ -215,6 +461,17 @@ class RemoteWindow(QMainWindow):
         self.ui.menu_Presets.menuAction().setEnabled(False)
         self.ui.menu_Presets.menuAction().setVisible(False)
 
+        self.ui.act_file_linkstats = QAction(self.tr("Show Link Statistics"), self)
+        self.ui.act_file_linkstats.setCheckable(True)
+        self.ui.act_file_linkstats_export = QAction(self.tr("Export Link Statistics..."), self)
+        self.ui.menu_File.insertAction(self.ui.act_file_quit, self.ui.act_file_linkstats)
+        self.ui.menu_File.insertAction(self.ui.act_file_quit, self.ui.act_file_linkstats_export)
+        self.ui.menu_File.insertSeparator(self.ui.act_file_quit)
+
+        self.ui.label_linkstats = QLabel(self)
+        self.statusBar().addPermanentWidget(self.ui.label_linkstats, 1)
+        self.statusBar().hide()
+
         self.ui.act_settings_configure.setText(self.tr("Configure MOD-Remote"))
         self.ui.b_start.setIcon(QIcon(":/48x48/network-connect.png"))
         self.ui.b_start.setText(self.tr("Connect..."))
@@ -251,11 +508,18 @@ class RemoteWindow(QMainWindow):
 
         self.SIGTERM.connect(self.slot_handleSIGTERM)
 
+        self.fNetworkManager.revalidationFinished.connect(self.slot_remoteCacheRevalidated)
+        self.fDeviceProbe.finished.connect(self.slot_deviceProbeFinished)
+
         self.ui.act_file_connect.triggered.connect(self.slot_fileConnect)
         self.ui.act_file_disconnect.triggered.connect(self.slot_fileDisconnect)
 
         self.ui.act_file_refresh.triggered.connect(self.slot_fileRefresh)
         self.ui.act_file_inspect.triggered.connect(self.slot_fileInspect)
+        self.ui.act_file_linkstats.toggled.connect(self.slot_fileShowLinkStats)
+        self.ui.act_file_linkstats_export.triggered.connect(self.slot_fileExportLinkStats)
+
+        self.ui.webpage.mainFrame().javaScriptWindowObjectCleared.connect(self.slot_webviewWindowObjectCleared)
 
         self.ui.act_settings_configure.triggered.connect(self.slot_configure)
 
@@ -272,6 +536,9 @@ class RemoteWindow(QMainWindow):
 
         self.setProperWindowTitle()
 
+        if self.ui.act_file_linkstats.isChecked():
+            self.slot_fileShowLinkStats(True)
+
         QTimer.singleShot(1, self.fixWebViewSize)
 
     # --------------------------------------------------------------------------------------------------------
@@ -283,25 +550,39 @@ class RemoteWindow(QMainWindow):
         if not dialog.exec_():
             return
 
-        self.ui.webview.loadStarted.connect(self.slot_webviewLoadStarted)
-        self.ui.webview.loadProgress.connect(self.slot_webviewLoadProgress)
-        self.ui.webview.loadFinished.connect(self.slot_webviewLoadFinished)
+        url = dialog.getAddress()
+
+        self.fRemoteURL       = url.toString()
+        self.fRemoteCacheName = getRemoteCacheName(url)
+        self.setProperWindowTitle()
 
         self.ui.w_buttons.setEnabled(False)
-        self.ui.webview.load(dialog.getAddress())
-        self.ui.stackedwidget.setCurrentIndex(1)
+
+        if self.fRemoteCacheName:
+            # known device, show the cached UI right away and check its firmware meanwhile
+            self.fNetworkManager.setDevice(url, self.fRemoteCacheName)
+            self.loadRemote()
+            self.ui.stackedwidget.setCurrentIndex(1)
+        else:
+            self.ui.label_progress.setText(self.tr("Identifying device..."))
+
+        self.fDeviceProbe.probe(url)
 
         # allow to disconnect
         self.ui.act_file_disconnect.setEnabled(True)
 
     @pyqtSlot()
     def slot_fileDisconnect(self):
-        try:
-            self.ui.webview.loadStarted.disconnect(self.slot_webviewLoadStarted)
-            self.ui.webview.loadProgress.disconnect(self.slot_webviewLoadProgress)
-            self.ui.webview.loadFinished.disconnect(self.slot_webviewLoadFinished)
-        except:
-            pass
+        self.fRemoteURL       = ""
+        self.fRemoteCacheName = ""
+        self.fReloadPending   = False
+        self.setProperWindowTitle()
+
+        self.fDeviceProbe.cancel()
+        self.fNetworkManager.clearDevice()
+        self.fIdleScheduler.remove("remote cache revalidation")
+
+        self.disconnectLoadSignals()
 
         self.ui.w_buttons.setEnabled(True)
         self.ui.stackedwidget.setCurrentIndex(0)
@@ -317,12 +598,35 @@ class RemoteWindow(QMainWindow):
 
     @pyqtSlot()
     def slot_fileRefresh(self):
+        # static assets come from the cache, and get revalidated once loaded
+        self.connectLoadSignals()
         self.ui.webview.reload()
 
     @pyqtSlot()
     def slot_fileInspect(self):
         self.ui.webinspector.show()
 
+    @pyqtSlot(bool)
+    def slot_fileShowLinkStats(self, show):
+        self.statusBar().setVisible(show)
+
+        if show:
+            self.fIdleScheduler.addPeriodic("link stats", self.updateLinkStats, 1000, IDLE_PRIORITY_LOW, True)
+        else:
+            self.fIdleScheduler.remove("link stats")
+
+    @pyqtSlot()
+    def slot_fileExportLinkStats(self):
+        filename, ok = QFileDialog.getSaveFileName(self, self.tr("Export Link Statistics"), "mod-remote-link-stats.csv",
+                                                   self.tr("CSV files (*.csv)"))
+        if not filename:
+            return
+
+        try:
+            self.fLinkStats.exportCsv(filename)
+        except OSError as e:
+            QMessageBox.warning(self, self.tr("Error"), self.tr("Failed to export link statistics:\n%s") % e)
+
     # --------------------------------------------------------------------------------------------------------
     # Settings (menu actions)
 
@@ -374,9 +678,12 @@ class RemoteWindow(QMainWindow):
 
     @pyqtSlot(bool)
     def slot_webviewLoadFinished(self, ok):
-        self.ui.webview.loadStarted.disconnect(self.slot_webviewLoadStarted)
-        self.ui.webview.loadProgress.disconnect(self.slot_webviewLoadProgress)
-        self.ui.webview.loadFinished.disconnect(self.slot_webviewLoadFinished)
+        self.disconnectLoadSignals()
+
+        if self.fReloadPending:
+            self.fReloadPending = False
+            self.loadRemote()
+            return
 
         self.ui.w_buttons.setEnabled(True)
 
@@ -390,6 +697,9 @@ class RemoteWindow(QMainWindow):
             self.ui.label_progress.setText("")
             self.ui.stackedwidget.setCurrentIndex(1)
 
+            # check what came from the cache once the page settled down
+            self.fIdleScheduler.callLater("remote cache revalidation", self.fNetworkManager.revalidate, 2000, IDLE_PRIORITY_LOW)
+
         else:
             # disable file menu
             self.ui.act_file_disconnect.setEnabled(False)
@@ -402,6 +712,95 @@ class RemoteWindow(QMainWindow):
 
         print("load finished")
 
+    @pyqtSlot()
+    def slot_webviewWindowObjectCleared(self):
+        frame = self.ui.webpage.mainFrame()
+
+        if self.fLinkStatsBridge is not None:
+            try:
+                self.fLinkStatsBridge.deleteLater()
+            except RuntimeError:
+                # the previous page deleted it already
+                pass
+
+        self.fLinkStatsBridge = LinkStatsBridge(self, self.fLinkStats)
+        frame.addToJavaScriptWindowObject(LINK_STATS_JS_OBJECT, self.fLinkStatsBridge)
+        frame.evaluateJavaScript(LINK_STATS_WEBSOCKET_JS)
+
+    def connectLoadSignals(self):
+        if self.fLoading:
+            return
+
+        self.fLoading = True
+        self.ui.webview.loadStarted.connect(self.slot_webviewLoadStarted)
+        self.ui.webview.loadProgress.connect(self.slot_webviewLoadProgress)
+        self.ui.webview.loadFinished.connect(self.slot_webviewLoadFinished)
+
+    def disconnectLoadSignals(self):
+        if not self.fLoading:
+            return
+
+        self.fLoading = False
+        self.ui.webview.loadStarted.disconnect(self.slot_webviewLoadStarted)
+        self.ui.webview.loadProgress.disconnect(self.slot_webviewLoadProgress)
+        self.ui.webview.loadFinished.disconnect(self.slot_webviewLoadFinished)
+
+    def loadRemote(self):
+        # a new load interrupts the current one, which would take the load signals with it
+        if self.fLoading:
+            self.fReloadPending = True
+            return
+
+        self.connectLoadSignals()
+        self.ui.webview.load(QUrl(self.fRemoteURL))
+
+    # --------------------------------------------------------------------------------------------------------
+    # Remote Cache
+
+    @pyqtSlot(str)
+    def slot_deviceProbeFinished(self, cacheName):
+        if not self.fRemoteURL:
+            return
+
+        url = QUrl(self.fRemoteURL)
+
+        if not cacheName:
+            # unreachable, keep showing the cached UI if there is one, let the webview report the error otherwise
+            if not self.fRemoteCacheName:
+                self.loadRemote()
+                self.ui.stackedwidget.setCurrentIndex(1)
+            return
+
+        if cacheName == self.fRemoteCacheName:
+            return
+
+        # new device or new firmware, whatever was cached under the old name doesn't apply anymore
+        wasShowingCache = bool(self.fRemoteCacheName)
+
+        self.fRemoteCacheName = cacheName
+        setRemoteCacheName(url, cacheName)
+        self.fNetworkManager.setDevice(url, cacheName)
+
+        if wasShowingCache:
+            print("remote device firmware changed, reloading")
+
+        self.loadRemote()
+        self.ui.stackedwidget.setCurrentIndex(1)
+
+    @pyqtSlot(int, int)
+    def slot_remoteCacheRevalidated(self, updated, checked):
+        print("remote cache: %i of %i cached assets changed on the device, used from the next refresh" % (updated, checked))
+
+    # --------------------------------------------------------------------------------------------------------
+    # Link Stats
+
+    def updateLinkStats(self):
+        summary = self.fLinkStats.summary()
+
+        self.ui.label_linkstats.setText(self.tr("latency p50 %i ms, p95 %i ms | first byte p50 %i ms | %.1f KiB/s | websocket %.1f msg/s | %i failed") % (
+                                        summary['latencyP50']*1000, summary['latencyP95']*1000, summary['ttfbP50']*1000,
+                                        summary['throughput']/1024, summary['wsRate'], summary['failures']))
+
     # --------------------------------------------------------------------------------------------------------
     # Settings
 
@@ -409,6 +808,7 @@ class RemoteWindow(QMainWindow):
         settings = QSettings()
 
         settings.setValue("Geometry", self.saveGeometry())
+        settings.setValue("ShowLinkStats", self.ui.act_file_linkstats.isChecked())
 
     def loadSettings(self, firstTime):
         qsettings   = QSettings()
@@ -426,17 +826,13 @@ class RemoteWindow(QMainWindow):
 
         if firstTime:
             self.restoreGeometry(qsettings.value("Geometry", ""))
+            self.ui.act_file_linkstats.setChecked(qsettings.value("ShowLinkStats", False, type=bool))
 
             if inspectorEnabled and self.fSavedSettings[MOD_KEY_WEBVIEW_SHOW_INSPECTOR]:
                 QTimer.singleShot(1000, self.ui.webinspector.show)
 
         self.ui.act_file_inspect.setVisible(inspectorEnabled)
 
-        if self.fIdleTimerId != 0:
-            self.killTimer(self.fIdleTimerId)
-
-        self.fIdleTimerId = self.startTimer(MOD_DEFAULT_MAIN_REFRESH_INTERVAL)
-
     # --------------------------------------------------------------------------------------------------------
     # Misc
 
@@ -449,9 +845,7 @@ class RemoteWindow(QMainWindow):
     # Qt events
 
     def closeEvent(self, event):
-        if self.fIdleTimerId != 0:
-            self.killTimer(self.fIdleTimerId)
-            self.fIdleTimerId = 0
+        self.fIdleScheduler.removeAll()
 
         self.saveSettings()
 
@@ -461,12 +855,6 @@ class RemoteWindow(QMainWindow):
         #self.ui.webinspector.close()
         QApplication.instance().quit()
 
-    def timerEvent(self, event):
-        if event.timerId() == self.fIdleTimerId:
-            pass
-
-        QMainWindow.timerEvent(self, event)
-
     def resizeEvent(self, event):
         QMainWindow.resizeEvent(self, event)
         self.fixWebViewSize()
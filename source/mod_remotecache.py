@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSignal, pyqtSlot, QObject, QSettings, QTimer, QUrl
+    from PyQt4.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+else:
+    from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject, QSettings, QTimer, QUrl
+    from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+import json
+
+from hashlib import sha1
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Web Cache)
+
+from mod_webcache import WebDiskCache
+
+# ------------------------------------------------------------------------------------------------------------
+# Remote cache settings
+
+# Maximum size of the disk cache shared by all devices, in bytes
+REMOTE_CACHE_SIZE = 256*1024*1024
+
+# Background revalidation requests in flight, kept low so the link stays free for the UI
+REMOTE_REVALIDATE_CONCURRENCY = 2
+
+# Time (ms) given to the device to answer the identity probe
+REMOTE_PROBE_TIMEOUT = 5000
+
+# /system/info fields that make up the firmware version, the rest (uptime, load, etc) changes all the time
+REMOTE_VERSION_KEYS = ("version", "firmware", "release", "bin_compat")
+
+# Static UI and plugin GUI assets, served from the cache first.
+# HTML (including the index page) is never on this list, it references the other assets and must not go stale,
+# so it always goes to the device and is revalidated with its ETag like any other request.
+REMOTE_STATIC_PATHS      = ("/css/", "/fonts/", "/img/", "/js/", "/resources/", "/effect/file/", "/effect/image/")
+REMOTE_STATIC_EXTENSIONS = (".css", ".js", ".png", ".jpg", ".svg", ".gif", ".woff", ".ttf", ".otf", ".eot")
+
+# Marks our own revalidation requests, so they go to the network
+REMOTE_REVALIDATE_ATTRIBUTE = QNetworkRequest.Attribute(QNetworkRequest.User + 1)
+
+def isRemoteStaticAsset(url):
+    path = url.path().lower()
+
+    if path in ("", "/") or path.endswith((".html", ".htm")):
+        return False
+
+    return path.startswith(REMOTE_STATIC_PATHS) or path.endswith(REMOTE_STATIC_EXTENSIONS)
+
+def getRemoteOriginKey(url):
+    return "%s:%i" % (url.host(), url.port(80))
+
+# ------------------------------------------------------------------------------------------------------------
+# Remote Network Access Manager
+#
+# Serves static assets of the current device from the disk cache first, without touching the link.
+# The assets served that way are revalidated in the background once the page is loaded,
+# so changed files are picked up by the next load. Anything else (API calls) goes to the device,
+# revalidating cached responses with their ETag or Last-Modified like WebDiskCache always does.
+
+class RemoteNetworkAccessManager(QNetworkAccessManager):
+    # signals
+    revalidationFinished = pyqtSignal(int, int) # updated and checked assets
+
+    def __init__(self, parent, cache):
+        QNetworkAccessManager.__init__(self, parent)
+
+        self.fCache = cache
+        self.fCache.install(self) # takes ownership
+
+        # (scheme, host, port) of the device served cache-first, None when not connected
+        self.fOrigin = None
+
+        # static assets that came from the cache since the last revalidation
+        self.fServedFromCache = set()
+
+        # revalidation in progress
+        self.fRevalidateQueue   = []
+        self.fRevalidateActive  = 0
+        self.fRevalidateChecked = 0
+        self.fRevalidateUpdated = 0
+
+        # records every request when set, see mod_linkstats
+        self.fLinkStats = None
+
+    # Serve static assets from @a url cache-first, stored under @a name (device identity and firmware)
+    def setDevice(self, url, name):
+        self.clearDevice()
+
+        self.fOrigin = (url.scheme(), url.host(), url.port())
+        self.fCache.addOrigin(url, name)
+
+    def clearDevice(self):
+        if self.fOrigin is not None:
+            scheme, host, port = self.fOrigin
+            url = QUrl()
+            url.setScheme(scheme)
+            url.setHost(host)
+            url.setPort(port)
+            self.fCache.removeOrigin(url)
+
+        self.fOrigin = None
+        self.fServedFromCache.clear()
+        self.fRevalidateQueue = []
+
+    def isDeviceUrl(self, url):
+        return self.fOrigin is not None and (url.scheme(), url.host(), url.port()) == self.fOrigin
+
+    def setLinkStats(self, stats):
+        self.fLinkStats = stats
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def createRequest(self, operation, request, outgoingData=None):
+        url = request.url()
+
+        if (operation != QNetworkAccessManager.GetOperation or not self.isDeviceUrl(url) or
+            request.attribute(REMOTE_REVALIDATE_ATTRIBUTE) or not isRemoteStaticAsset(url)):
+            reply = QNetworkAccessManager.createRequest(self, operation, request, outgoingData)
+        else:
+            request = QNetworkRequest(request)
+            request.setAttribute(QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.PreferCache)
+
+            reply = QNetworkAccessManager.createRequest(self, operation, request, outgoingData)
+            reply.metaDataChanged.connect(lambda: self.checkServedFromCache(reply))
+
+        if self.fLinkStats is not None:
+            self.fLinkStats.watch(reply)
+
+        return reply
+
+    def checkServedFromCache(self, reply):
+        if reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute):
+            self.fServedFromCache.add(reply.url().toString())
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Check every asset served from the cache against the device, in the background
+    def revalidate(self):
+        if self.fRevalidateQueue or self.fRevalidateActive:
+            return
+
+        self.fRevalidateQueue   = sorted(self.fServedFromCache)
+        self.fRevalidateChecked = 0
+        self.fRevalidateUpdated = 0
+        self.fServedFromCache.clear()
+
+        if not self.fRevalidateQueue:
+            return
+
+        for i in range(REMOTE_REVALIDATE_CONCURRENCY):
+            self.revalidateNext()
+
+    def revalidateNext(self):
+        if not self.fRevalidateQueue:
+            if self.fRevalidateActive == 0:
+                self.revalidationFinished.emit(self.fRevalidateUpdated, self.fRevalidateChecked)
+            return
+
+        request = QNetworkRequest(QUrl(self.fRevalidateQueue.pop(0)))
+        request.setAttribute(REMOTE_REVALIDATE_ATTRIBUTE, True)
+        request.setAttribute(QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.PreferNetwork)
+        request.setPriority(QNetworkRequest.LowPriority)
+
+        self.fRevalidateActive += 1
+
+        reply = self.get(request)
+        reply.finished.connect(lambda: self.slot_revalidateFinished(reply))
+
+    def slot_revalidateFinished(self, reply):
+        self.fRevalidateActive  -= 1
+        self.fRevalidateChecked += 1
+
+        # a 304 is served from the cache, anything else that worked is new content
+        if reply.error() == QNetworkReply.NoError and not reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute):
+            self.fRevalidateUpdated += 1
+
+        reply.deleteLater()
+        self.revalidateNext()
+
+# ------------------------------------------------------------------------------------------------------------
+# Remote Device Probe
+#
+# Finds out the name the cache of a device is stored under: its identity plus its firmware version.
+# mod-ui's /system/info is used when it reports a version, otherwise the device address is the identity
+# and a hash of the UI's index page stands for the firmware version.
+
+class RemoteDeviceProbe(QObject):
+    # signals
+    finished = pyqtSignal(str) # cache name, empty if the device could not be reached
+
+    def __init__(self, parent, manager):
+        QObject.__init__(self, parent)
+
+        self.fManager  = manager
+        self.fReply    = None
+        self.fCallback = None
+        self.fUrl      = QUrl()
+
+        self.fTimer = QTimer(self)
+        self.fTimer.setInterval(REMOTE_PROBE_TIMEOUT)
+        self.fTimer.setSingleShot(True)
+        self.fTimer.timeout.connect(self.slot_timeout)
+
+    def probe(self, url):
+        self.cancel()
+        self.fUrl = QUrl(url)
+        self.request("/system/info", self.slot_systemInfoFinished)
+
+    # Stop probing, without reporting anything
+    def cancel(self):
+        self.fTimer.stop()
+
+        if self.fReply is None:
+            return
+
+        reply, self.fReply = self.fReply, None
+        reply.finished.disconnect(self.fCallback)
+        reply.abort()
+        reply.deleteLater()
+
+    def request(self, path, callback):
+        url = QUrl(self.fUrl)
+        url.setPath(path)
+
+        request = QNetworkRequest(url)
+        request.setAttribute(REMOTE_REVALIDATE_ATTRIBUTE, True)
+        request.setAttribute(QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.AlwaysNetwork)
+        request.setAttribute(QNetworkRequest.CacheSaveControlAttribute, False)
+
+        self.fReply    = self.fManager.get(request)
+        self.fCallback = callback
+        self.fReply.finished.connect(callback)
+        self.fTimer.start()
+
+    def takeReply(self):
+        self.fTimer.stop()
+        reply, self.fReply = self.fReply, None
+        reply.deleteLater()
+
+        if reply.error() != QNetworkReply.NoError:
+            return None
+
+        return bytes(reply.readAll())
+
+    def getCacheName(self, identity, version):
+        name = "%s-%s" % (identity, sha1(version.encode("utf-8", errors="ignore")).hexdigest()[:16])
+        return "".join(c if c.isalnum() or c in "-." else "-" for c in name)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    @pyqtSlot()
+    def slot_timeout(self):
+        self.cancel()
+        self.finished.emit("")
+
+    @pyqtSlot()
+    def slot_systemInfoFinished(self):
+        data = self.takeReply()
+        info = None
+
+        if data is not None:
+            try:
+                info = json.loads(data.decode("utf-8", errors="replace"))
+            except ValueError:
+                pass
+
+        version = {}
+
+        if isinstance(info, dict):
+            version = dict((key, info[key]) for key in REMOTE_VERSION_KEYS if info.get(key))
+
+        if not version:
+            self.request("/", self.slot_indexFinished)
+            return
+
+        identity = getRemoteOriginKey(self.fUrl)
+
+        for key in ("uid", "serial"):
+            if info.get(key):
+                identity = str(info[key])
+                break
+
+        self.finished.emit(self.getCacheName(identity, json.dumps(version, sort_keys=True)))
+
+    @pyqtSlot()
+    def slot_indexFinished(self):
+        data = self.takeReply()
+
+        if data is None:
+            self.finished.emit("")
+            return
+
+        self.finished.emit(self.getCacheName(getRemoteOriginKey(self.fUrl), sha1(data).hexdigest()))
+
+# ------------------------------------------------------------------------------------------------------------
+# Remembered cache name of each device address, so reconnecting doesn't need to wait for the probe
+
+def getRemoteCacheName(url):
+    settings = QSettings()
+    settings.beginGroup("RemoteCache")
+    return settings.value(getRemoteOriginKey(url), "", type=str)
+
+def setRemoteCacheName(url, name):
+    settings = QSettings()
+    settings.beginGroup("RemoteCache")
+    settings.setValue(getRemoteOriginKey(url), name)
+
+def createRemoteCache():
+    return WebDiskCache(None, REMOTE_CACHE_DIR, REMOTE_CACHE_SIZE)
+
+# ------------------------------------------------------------------------------------------------------------
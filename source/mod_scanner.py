@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+from mod_pedalboards import PedalboardIndex, getBundleStamp, getInstalledPluginLabels
+from mod_trace import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSignal, pyqtSlot, QFileSystemWatcher, QObject, QThread, QTimer
+else:
+    from PyQt5.QtCore import pyqtSignal, pyqtSlot, QFileSystemWatcher, QObject, QThread, QTimer
+
+from threading import Lock
+from time import time
+
+# ------------------------------------------------------------------------------------------------------------
+# Pedalboard list state, as seen by consumers of the scanner results
+
+PEDALBOARDS_STATE_PARTIAL = 0 # scan in progress, list might be incomplete or outdated
+PEDALBOARDS_STATE_READY   = 1 # list matches what's on disk
+
+# Results are sent to the GUI thread when this many are pending, or after this many seconds
+SCAN_BATCH_SIZE     = 64
+SCAN_BATCH_INTERVAL = 0.1
+
+# Filesystem events are collected for this long (ms) before being reported
+WATCH_DEBOUNCE_INTERVAL = 500
+
+# Interval (ms) for checking paths that could not be watched
+WATCH_POLL_INTERVAL = 3000
+
+# ------------------------------------------------------------------------------------------------------------
+# Pedalboard Scan Thread
+#
+# Owns the pedalboard index and keeps all bundle parsing off the GUI thread.
+# Results are streamed in batches, starting with whatever the on-disk index already knows.
+# The plugin users index stored with it can be queried from other threads, see queryPluginUsers().
+# Only this thread modifies the index, so it reads it freely and only takes fIndexLock to modify it.
+
+class PedalboardScanThread(QThread):
+    # signals
+    pedalboardsFound   = pyqtSignal(list) # list of pedalboard info dicts (new or changed)
+    pedalboardsRemoved = pyqtSignal(list) # list of bundle paths
+    pluginLabelsFound  = pyqtSignal(dict) # plugin URI -> label of the installed plugins, on each full scan
+    scanFinished       = pyqtSignal()
+
+    def __init__(self, parent=None):
+        QThread.__init__(self, parent)
+
+        self.fIndex       = PedalboardIndex(PEDALBOARD_INDEX_FILE, getPedalboardDirs())
+        self.fIndexLoaded = False
+
+        # held while the index is modified, so other threads can read it (see queryPluginUsers())
+        self.fIndexLock = Lock()
+
+        # pending jobs, None means full scan
+        self.fLock = Lock()
+        self.fJobs = []
+        self.fBusy = False
+
+        # pending results
+        self.fFound     = []
+        self.fRemoved   = []
+        self.fLastFlush = 0.0
+
+        # last plugin labels sent, see sendPluginLabels()
+        self.fPluginLabels = None
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def requestFullScan(self):
+        self.queueJob(None)
+
+    def requestBundles(self, bundles):
+        self.queueJob(list(bundles))
+
+    def queueJob(self, job):
+        with self.fLock:
+            self.fJobs.append(job)
+            if self.fBusy:
+                return
+            self.fBusy = True
+
+        # the thread might still be returning from a previous run
+        self.wait()
+        self.start(QThread.LowPriority)
+
+    def stopWait(self):
+        self.requestInterruption()
+        return self.wait(5000)
+
+    # Run @a query with the plugin users index (a PluginUsersIndex) and return its result, from any thread.
+    # Bundles are parsed without holding the lock, so a query only waits for a parsed bundle to be stored.
+    # Storing waits for the query though, so keep it short. The index is empty until loaded by the first scan.
+    def queryPluginUsers(self, query):
+        with self.fIndexLock:
+            return query(self.fIndex.pluginUsers())
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def run(self):
+        traceThreadName("PedalboardScanThread")
+
+        if not self.fIndexLoaded:
+            self.fIndexLoaded = True
+
+            with self.fIndexLock:
+                self.fIndex.load()
+
+            # before the cached pedalboards, so these are indexed for search with the labels right away
+            self.sendPluginLabels()
+
+            # let the GUI show what we had last time right away
+            cached = self.fIndex.pedalboards()
+            if cached:
+                self.pedalboardsFound.emit(cached)
+
+        while True:
+            with self.fLock:
+                idle = not self.fJobs or self.isInterruptionRequested()
+                if not idle:
+                    job = self.fJobs.pop(0)
+
+            if idle:
+                # save once per run, including partial progress when interrupted.
+                # we're still busy while saving, so jobs queued meanwhile don't need to wait for it
+                self.fIndex.save()
+
+                with self.fLock:
+                    if not self.fJobs or self.isInterruptionRequested():
+                        self.fBusy = False
+                        break
+                continue
+
+            with traceSpan("pedalboard scan", { 'bundles': "all" if job is None else len(job) }):
+                if job is None:
+                    self.scanAll()
+                else:
+                    self.scanBundles(job)
+
+            self.flush()
+
+            with self.fLock:
+                finished = not self.fJobs
+
+            if finished:
+                self.scanFinished.emit()
+
+    def scanAll(self):
+        self.sendPluginLabels()
+
+        bundles = self.fIndex.listBundles()
+
+        with self.fIndexLock:
+            self.fRemoved.extend(self.fIndex.removeStaleBundles(bundles))
+
+        self.scanBundles(bundles)
+
+    def scanBundles(self, bundles):
+        for bundle in bundles:
+            if self.isInterruptionRequested():
+                return
+
+            update = self.fIndex.parseBundle(bundle)
+
+            if update is not None:
+                with self.fIndexLock:
+                    self.fIndex.storeBundle(bundle, *update)
+
+                info = update[1]
+
+                if info is not None:
+                    self.fFound.append(info)
+                else:
+                    self.fRemoved.append(bundle)
+
+            if len(self.fFound) >= SCAN_BATCH_SIZE or time() - self.fLastFlush >= SCAN_BATCH_INTERVAL:
+                self.flush()
+
+    # Labels are not part of the index, plugins get installed and updated independently of the pedalboards
+    def sendPluginLabels(self):
+        try:
+            labels = getInstalledPluginLabels()
+        except Exception as e:
+            print("PedalboardScanThread: failed to get plugin labels:", e)
+            return
+
+        if labels == self.fPluginLabels:
+            return
+
+        self.fPluginLabels = labels
+        self.pluginLabelsFound.emit(labels)
+
+    def flush(self):
+        self.fLastFlush = time()
+
+        if self.fRemoved:
+            removed, self.fRemoved = self.fRemoved, []
+            self.pedalboardsRemoved.emit(removed)
+
+        if self.fFound:
+            found, self.fFound = self.fFound, []
+            self.pedalboardsFound.emit(found)
+
+# ------------------------------------------------------------------------------------------------------------
+# Pedalboard Watcher
+#
+# Watches the pedalboards directory, each bundle and its TTL files, and reports which bundles changed.
+# Used for the user pedalboards directory, where mod-ui saves. Pedalboards elsewhere in the LV2 path are only
+# picked up by full scans.
+# Bursts of events (like a pedalboard being saved) are debounced into a single report.
+# Paths that can't be watched (inotify limits, unsupported filesystems) are polled instead.
+
+class PedalboardWatcher(QObject):
+    # signals
+    bundlesChanged = pyqtSignal(list) # added, modified or removed bundle paths
+
+    def __init__(self, pedalboardsDir, parent=None):
+        QObject.__init__(self, parent)
+
+        self.fPedalboardsDir = pedalboardsDir.rstrip(os.sep)
+
+        # bundle path -> list of watched paths
+        self.fBundles = {}
+
+        # polling fallback, bundle path -> last known stamp
+        self.fPolled  = {}
+        self.fPollDir = False
+
+        # bundles changed since last report
+        self.fPending = set()
+
+        self.fWatcher = QFileSystemWatcher(self)
+        self.fWatcher.directoryChanged.connect(self.slot_directoryChanged)
+        self.fWatcher.fileChanged.connect(self.slot_fileChanged)
+
+        self.fDebounceTimer = QTimer(self)
+        self.fDebounceTimer.setInterval(WATCH_DEBOUNCE_INTERVAL)
+        self.fDebounceTimer.setSingleShot(True)
+        self.fDebounceTimer.timeout.connect(self.slot_reportChanges)
+
+        self.fPollTimer = QTimer(self)
+        self.fPollTimer.setInterval(WATCH_POLL_INTERVAL)
+        self.fPollTimer.timeout.connect(self.slot_poll)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def start(self):
+        self.fPollDir = not (os.path.isdir(self.fPedalboardsDir) and self.fWatcher.addPath(self.fPedalboardsDir))
+
+        for bundle in self.listBundles():
+            self.watchBundle(bundle)
+
+        self.updatePollTimer()
+
+    def stop(self):
+        self.fDebounceTimer.stop()
+        self.fPollTimer.stop()
+
+        paths = self.fWatcher.files() + self.fWatcher.directories()
+        if paths:
+            self.fWatcher.removePaths(paths)
+
+        self.fBundles = {}
+        self.fPolled  = {}
+        self.fPending = set()
+
+    # --------------------------------------------------------------------------------------------------------
+
+    @pyqtSlot(str)
+    def slot_directoryChanged(self, path):
+        if path.rstrip(os.sep) == self.fPedalboardsDir:
+            self.checkBundleList()
+        else:
+            # files might have been added or replaced, watch them again
+            self.watchBundle(path)
+            self.addPending(path)
+
+    @pyqtSlot(str)
+    def slot_fileChanged(self, path):
+        bundle = os.path.dirname(path)
+
+        # saving by replacing a file drops its watch, adding a path that is still watched does nothing
+        if os.path.exists(path):
+            self.fWatcher.addPath(path)
+
+        self.addPending(bundle)
+
+    @pyqtSlot()
+    def slot_poll(self):
+        if self.fPollDir:
+            if os.path.isdir(self.fPedalboardsDir) and self.fWatcher.addPath(self.fPedalboardsDir):
+                self.fPollDir = False
+            self.checkBundleList()
+
+        for bundle, stamp in list(self.fPolled.items()):
+            newStamp = getBundleStamp(bundle)
+            if newStamp == stamp:
+                continue
+            self.fPolled[bundle] = newStamp
+            self.addPending(bundle)
+
+        self.updatePollTimer()
+
+    @pyqtSlot()
+    def slot_reportChanges(self):
+        if not self.fPending:
+            return
+
+        bundles, self.fPending = sorted(self.fPending), set()
+        self.bundlesChanged.emit(bundles)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def listBundles(self):
+        try:
+            entries = os.scandir(self.fPedalboardsDir)
+        except OSError:
+            return []
+
+        with entries:
+            return [entry.path for entry in entries if entry.is_dir()]
+
+    def checkBundleList(self):
+        bundles = set(self.listBundles())
+        known   = set(self.fBundles)
+
+        for bundle in bundles - known:
+            self.watchBundle(bundle)
+            self.addPending(bundle)
+
+        for bundle in known - bundles:
+            self.unwatchBundle(bundle)
+            self.addPending(bundle)
+
+        self.updatePollTimer()
+
+    def watchBundle(self, bundle):
+        try:
+            with os.scandir(bundle) as entries:
+                paths = [bundle] + [entry.path for entry in entries if entry.name.endswith(".ttl")]
+        except OSError:
+            return
+
+        watched = set(self.fBundles.get(bundle, ()))
+        missing = [path for path in paths if path not in watched]
+        failed  = self.fWatcher.addPaths(missing) if missing else []
+
+        # only what is really watched, paths that failed are tried again next time
+        self.fBundles[bundle] = [path for path in paths if path not in failed] if failed else paths
+
+        if failed:
+            self.fPolled[bundle] = getBundleStamp(bundle)
+        else:
+            self.fPolled.pop(bundle, None)
+
+    def unwatchBundle(self, bundle):
+        paths = self.fBundles.pop(bundle, [])
+        self.fPolled.pop(bundle, None)
+
+        # paths that are gone already were dropped by the watcher, removing them again does nothing
+        if paths:
+            self.fWatcher.removePaths(paths)
+
+    def addPending(self, bundle):
+        self.fPending.add(bundle.rstrip(os.sep))
+        self.fDebounceTimer.start()
+
+    def updatePollTimer(self):
+        if self.fPollDir or self.fPolled:
+            if not self.fPollTimer.isActive():
+                self.fPollTimer.start()
+        elif self.fPollTimer.isActive():
+            self.fPollTimer.stop()
+
+# ------------------------------------------------------------------------------------------------------------
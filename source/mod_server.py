@@ -0,0 +1,1024 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Backend and webserver lifecycle, shared by the GUI and headless modes
+#
+# Only QtCore is used here, no widgets or WebKit.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSignal, pyqtSlot, qWarning, QObject, QProcess, QThread, QTimer
+else:
+    from PyQt5.QtCore import pyqtSignal, pyqtSlot, qWarning, QObject, QProcess, QThread, QTimer
+
+from time import time
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+
+# ------------------------------------------------------------------------------------------------------------
+# Import (WebServer)
+
+# need to set initial settings before importing MOD stuff
+setInitialSettings()
+
+from mod.session import SESSION
+
+# mod.webserver pulls in all request handlers and tornado.web, it is imported when the webserver first starts
+webserver = None
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Backend)
+
+from mod_backend import BackendLogBuffer, BackendOutputParser, BACKEND_EVENT_ERROR, BACKEND_EVENT_READY, BACKEND_EVENT_XRUN
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Tracing)
+
+from mod_trace import *
+
+# ------------------------------------------------------------------------------------------------------------
+
+def loadWebServer():
+    global webserver
+
+    if webserver is None:
+        with traceSpan("import mod.webserver"):
+            from mod import webserver as module
+        webserver = module
+
+    return webserver
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (asyncio)
+
+try:
+    from asyncio import new_event_loop, set_event_loop
+    haveAsyncIO = True
+except:
+    haveAsyncIO = False
+
+# ------------------------------------------------------------------------------------------------------------
+# Host connection wait
+#
+# mod-ui sets SESSION.host.connected from its socket connect callback, without notifying anyone else.
+# The host is given a subclass that resolves futures as soon as that happens, see waitForHostConnected().
+# HostConnectionWait calls @a callback with True once connected, or with False after @a timeout ms.
+# A wait that ended (or was cancelled) doesn't call anything later on.
+
+class HostConnectedHook(object):
+    def __setattr__(self, name, value):
+        super(HostConnectedHook, self).__setattr__(name, value)
+
+        if name != "connected" or not value:
+            return
+
+        futures = self.__dict__.pop("fConnectedFutures", [])
+
+        for future in futures:
+            if not future.done():
+                future.set_result(True)
+
+def hookHostConnected(host):
+    if isinstance(host, HostConnectedHook):
+        return
+
+    hostClass = type(host)
+    host.__class__ = type("Hooked" + hostClass.__name__, (HostConnectedHook, hostClass), {})
+
+# Get a future that is resolved once @a host is connected, must be called from the IOLoop the host runs on
+def waitForHostConnected(host):
+    future = Future()
+
+    if host.connected:
+        future.set_result(True)
+        return future
+
+    hookHostConnected(host)
+    host.__dict__.setdefault("fConnectedFutures", []).append(future)
+    return future
+
+class HostConnectionWait(object):
+    def __init__(self, ioloop, host, timeout, callback):
+        self.fIOLoop    = ioloop
+        self.fCallback  = callback
+        self.fCancelled = False
+        self.fTimeout   = None
+
+        ioloop.add_callback(lambda: self.start(host, timeout))
+
+    # Can be called from any thread
+    def cancel(self):
+        self.fCancelled = True
+
+    def start(self, host, timeout):
+        if self.fCancelled:
+            return
+
+        self.fTimeout = self.fIOLoop.call_later(timeout/1000.0, lambda: self.finish(False))
+        self.fIOLoop.add_future(waitForHostConnected(host), lambda future: self.finish(True))
+
+    def finish(self, connected):
+        if self.fCancelled:
+            return
+
+        self.fCancelled = True
+        self.fIOLoop.remove_timeout(self.fTimeout)
+        self.fCallback(connected)
+
+# ------------------------------------------------------------------------------------------------------------
+# WebServer Thread
+
+class WebServerThread(QThread):
+    # signals
+    running = pyqtSignal()
+    failed  = pyqtSignal(str)
+
+    # globals
+    prepareWasCalled = False
+
+    def __init__(self, parent=None):
+        QThread.__init__(self, parent)
+        self.eventLoop = None
+        self.readyTimeout = MOD_DEFAULT_HOST_READY_TIMEOUT
+
+        # IOLoop of this thread while it runs, work for the webserver or session has to be scheduled on it
+        self.ioloop = None
+
+    def setReadyTimeout(self, timeout):
+        self.readyTimeout = timeout
+
+    def waitForReady(self):
+        HostConnectionWait(IOLoop.current(), SESSION.host, self.readyTimeout, self.readyFinished)
+
+    def readyFinished(self, connected):
+        if not connected:
+            traceInstant("webserver ready timeout")
+            self.failed.emit("mod-host did not accept connections after %i ms." % self.readyTimeout)
+            return
+
+        traceInstant("webserver ready")
+        self.running.emit()
+
+    def run(self):
+        traceThreadName("WebServerThread")
+        traceInstant("webserver thread started")
+
+        if haveAsyncIO:
+            self.eventLoop = new_event_loop()
+            set_event_loop(self.eventLoop)
+
+        self.ioloop = IOLoop.current()
+
+        with traceSpan("SESSION.host.init_host"):
+            SESSION.host.init_host()
+
+        if not self.prepareWasCalled:
+            self.prepareWasCalled = True
+            listenOnWebServerSocket(webserver.application)
+
+            try:
+                with traceSpan("webserver.prepare"):
+                    webserver.prepare(True)
+            except OSError as e:
+                self.ioloop = None
+                self.failed.emit("Could not listen on port %s: %s" % (config["port"], e))
+                return
+
+        self.waitForReady()
+        webserver.start()
+
+        self.ioloop = None
+        traceInstant("webserver thread finished")
+
+    def stop(self):
+        webserver.stop()
+        if self.eventLoop is not None:
+            self.eventLoop.call_soon_threadsafe(self.eventLoop.stop)
+
+    def stopWait(self):
+        with traceSpan("WebServerThread.stopWait"):
+            self.stop()
+            return self.wait(5000)
+
+# ------------------------------------------------------------------------------------------------------------
+# Webserver socket
+
+# mod-ui's prepare() calls application.listen() with the configured port, which would bind it a second time.
+# Serve on WEBSERVER_SOCKET instead, it already holds that port since startup (see mod_common).
+def listenOnWebServerSocket(application):
+    def listen(port, address="", **kwargs):
+        from tornado.httpserver import HTTPServer
+
+        WEBSERVER_SOCKET.setblocking(False)
+        WEBSERVER_SOCKET.listen(128)
+
+        server = HTTPServer(application, **kwargs)
+        server.add_sockets([WEBSERVER_SOCKET])
+        return server
+
+    application.listen = listen
+
+# ------------------------------------------------------------------------------------------------------------
+# Shutdown
+
+# Time (ms) given to each component to stop cleanly before being forced
+SHUTDOWN_WEBSERVER_TIMEOUT = 5000
+SHUTDOWN_BACKEND_TIMEOUT   = 2000
+
+# Total shutdown time (ms) we aim for, anything above is reported as a warning
+SHUTDOWN_TIME_BUDGET = 1000
+
+# Stops the webserver thread and the backend process concurrently, without blocking the GUI thread.
+# Each one escalates on its own timer: webserver stop -> thread terminate, backend terminate -> kill.
+
+class ShutdownMachine(QObject):
+    # signals
+    finished = pyqtSignal(float) # total time in seconds
+
+    def __init__(self, process, webServerThread, parent):
+        QObject.__init__(self, parent)
+
+        self.fProcess         = process
+        self.fWebServerThread = webServerThread
+
+        self.fStopping          = False
+        self.fStoppingBackend   = False
+        self.fStoppingWebServer = False
+        self.fStartTime         = 0.0
+
+        self.fBackendTimer = QTimer(self)
+        self.fBackendTimer.setInterval(SHUTDOWN_BACKEND_TIMEOUT)
+        self.fBackendTimer.setSingleShot(True)
+        self.fBackendTimer.timeout.connect(self.slot_backendTimeout)
+
+        self.fWebServerTimer = QTimer(self)
+        self.fWebServerTimer.setInterval(SHUTDOWN_WEBSERVER_TIMEOUT)
+        self.fWebServerTimer.setSingleShot(True)
+        self.fWebServerTimer.timeout.connect(self.slot_webServerTimeout)
+
+        process.finished.connect(self.slot_check)
+        webServerThread.finished.connect(self.slot_check)
+
+    def isStopping(self):
+        return self.fStopping
+
+    # Used when a standby backend takes over
+    def setProcess(self, process):
+        self.fProcess.finished.disconnect(self.slot_check)
+        self.fProcess = process
+        self.fProcess.finished.connect(self.slot_check)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Stop the webserver, and the backend too if @a stopBackend is set.
+    # Can be called again while stopping, finished() is emitted once everything is stopped.
+    def start(self, stopBackend=True):
+        backendRunning = stopBackend and self.fProcess.state() != QProcess.NotRunning
+
+        # nothing to stop
+        if not (self.fStopping or backendRunning or self.fWebServerThread.isRunning()):
+            if stopBackend:
+                SESSION.host.close_jack()
+            self.finished.emit(0.0)
+            return
+
+        if not self.fStopping:
+            self.fStopping  = True
+            self.fStartTime = time()
+            traceAsyncBegin("shutdown")
+
+        if not self.fStoppingWebServer and self.fWebServerThread.isRunning():
+            self.fStoppingWebServer = True
+            self.fWebServerThread.stop()
+            self.fWebServerTimer.start()
+
+        if stopBackend and not self.fStoppingBackend:
+            self.fStoppingBackend = True
+            SESSION.host.close_jack()
+
+            if self.fProcess.state() != QProcess.NotRunning:
+                self.fProcess.terminate()
+                self.fBackendTimer.start()
+
+        self.slot_check()
+
+    @pyqtSlot()
+    def slot_check(self):
+        if not self.fStopping:
+            return
+        if self.fWebServerThread.isRunning() or self.fProcess.state() != QProcess.NotRunning:
+            return
+
+        self.fBackendTimer.stop()
+        self.fWebServerTimer.stop()
+
+        self.fStopping          = False
+        self.fStoppingBackend   = False
+        self.fStoppingWebServer = False
+
+        elapsed = time() - self.fStartTime
+        traceAsyncEnd("shutdown", { 'ms': elapsed*1000 })
+
+        if elapsed*1000 > SHUTDOWN_TIME_BUDGET:
+            qWarning("Shutdown took %i ms, over the %i ms budget" % (elapsed*1000, SHUTDOWN_TIME_BUDGET))
+        else:
+            print("Shutdown took %i ms" % (elapsed*1000))
+
+        self.finished.emit(elapsed)
+
+    @pyqtSlot()
+    def slot_backendTimeout(self):
+        if self.fProcess.state() == QProcess.NotRunning:
+            return
+
+        qWarning("Backend failed top stop cleanly, forced kill")
+        self.fProcess.kill()
+
+    @pyqtSlot()
+    def slot_webServerTimeout(self):
+        if not self.fWebServerThread.isRunning():
+            return
+
+        qWarning("WebServer Thread failed top stop cleanly, forced terminate")
+        self.fWebServerThread.terminate()
+
+        # finished() is not always emitted for terminated threads
+        self.fWebServerThread.wait(500)
+        self.slot_check()
+
+# ------------------------------------------------------------------------------------------------------------
+# Standby backend
+
+# Command sent after the pedalboard, answered once mod-host went through everything before it
+STANDBY_SYNC_COMMAND = "cpu_load"
+
+# Stop @a process without waiting for it, it is deleted once finished.
+# With a @a timeout (ms) it is asked to terminate first, and only killed if still running after that.
+def stopProcessLater(process, timeout=0):
+    if process.state() == QProcess.NotRunning:
+        process.deleteLater()
+        return
+
+    process.finished.connect(process.deleteLater)
+
+    if timeout <= 0:
+        process.kill()
+        return
+
+    # owned by the process, so it goes away together with it
+    killTimer = QTimer(process)
+    killTimer.setInterval(timeout)
+    killTimer.setSingleShot(True)
+    killTimer.timeout.connect(process.kill)
+    killTimer.start()
+
+    process.terminate()
+
+# Restarts the backend without stopping the webserver, reloading the UI or interrupting audio.
+# A second process is started on its own pair of ports, and once it is ready the session connects to it,
+# which loads the current pedalboard into it. The old process keeps playing meanwhile, and is only stopped
+# (asynchronously) after the new one has gone through the whole pedalboard.
+
+class StandbyBackend(QObject):
+    # signals
+    ready    = pyqtSignal()                # standby process is ready, the session can be moved to it
+    switched = pyqtSignal(QObject, float)  # new process and the time the session took to move, in seconds
+    failed   = pyqtSignal(str)
+
+    # internal, emitted from the webserver thread
+    hostLoaded = pyqtSignal()
+
+    def __init__(self, outputCallback, webServerThread, parent):
+        QObject.__init__(self, parent)
+
+        self.fOutputCallback  = outputCallback
+        self.fWebServerThread = webServerThread
+
+        self.fProcess    = None
+        self.fPorts      = None
+        self.fSwitching  = False
+        self.fSwitchTime = 0.0
+
+        # sockets holding fPorts until the process is ready, see reservePorts()
+        self.fPortReservation = []
+
+        # session connection to the standby process, see switchHost()
+        self.fHostWait = None
+
+        self.fParser = BackendOutputParser()
+        self.fParser.setHandler(BACKEND_EVENT_READY, self.slot_parserReady)
+
+        self.fReadyTimer = QTimer(self)
+        self.fReadyTimer.setSingleShot(True)
+        self.fReadyTimer.timeout.connect(self.slot_readyTimeout)
+
+        self.hostLoaded.connect(self.slot_hostLoaded)
+
+    def isActive(self):
+        return self.fProcess is not None
+
+    def ports(self):
+        return self.fPorts
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Start a new backend next to the current one, on new ports
+    def start(self, hostPath, hostArgs, readyTimeout):
+        if self.fProcess is not None:
+            return
+
+        self.fPorts, self.fPortReservation = reserveBackendPorts()
+        port, feedbackPort = self.fPorts
+
+        self.fParser.reset()
+        traceAsyncBegin("standby backend start")
+
+        self.fProcess = QProcess(self.parent())
+        self.fProcess.setProcessChannelMode(QProcess.MergedChannels)
+        self.fProcess.setReadChannel(QProcess.StandardOutput)
+        self.fProcess.readyRead.connect(self.slot_read)
+        self.fProcess.finished.connect(self.slot_processFinished)
+        self.fProcess.start(hostPath, ["-p", str(port), "-f", str(feedbackPort)] + hostArgs)
+
+        self.fReadyTimer.start(readyTimeout)
+
+    # Move the session to the standby process and load the pedalboard into it, called after ready().
+    # The current process is left alone, the owner stops it after switched().
+    def switch(self):
+        # the session lives in the webserver thread, its IOLoop is not the one of this thread
+        ioloop = self.fWebServerThread.ioloop
+
+        if ioloop is None:
+            self.abort()
+            self.failed.emit("Webserver is not running, session can't be moved to the standby backend.")
+            return
+
+        self.fSwitching  = True
+        self.fSwitchTime = time()
+        traceAsyncBegin("backend switch")
+
+        # same timeout as for starting, now used for connecting and loading the pedalboard
+        self.fReadyTimer.start()
+
+        port    = self.fPorts[0]
+        timeout = self.fReadyTimer.interval()
+        ioloop.add_callback(lambda: self.switchHost(port, timeout))
+
+    # Stop the standby process, if there is one
+    def abort(self):
+        if self.fProcess is None:
+            return
+
+        if self.fReadyTimer.isActive() and not self.fSwitching:
+            traceAsyncEnd("standby backend start", { 'aborted': True })
+
+        self.fReadyTimer.stop()
+        self.releasePorts()
+
+        if self.fHostWait is not None:
+            self.fHostWait.cancel()
+            self.fHostWait = None
+
+        self.fProcess.finished.disconnect(self.slot_processFinished)
+        self.fProcess.readyRead.disconnect(self.slot_read)
+        stopProcessLater(self.fProcess)
+
+        self.fProcess   = None
+        self.fSwitching = False
+
+    # --------------------------------------------------------------------------------------------------------
+
+    @pyqtSlot()
+    def slot_read(self):
+        self.fOutputCallback(self.fParser.process(bytes(self.fProcess.readAllStandardOutput())))
+
+    def slot_parserReady(self, line):
+        if self.fSwitching or not self.fReadyTimer.isActive():
+            return
+
+        self.fReadyTimer.stop()
+        self.releasePorts()
+        traceAsyncEnd("standby backend start")
+        QTimer.singleShot(0, self.ready.emit)
+
+    @pyqtSlot()
+    def slot_readyTimeout(self):
+        switching = self.fSwitching
+        self.abort()
+
+        if switching:
+            self.failed.emit("Standby backend did not load the pedalboard in time.")
+        else:
+            self.failed.emit("Standby backend was not ready in time.")
+
+    @pyqtSlot(int, QProcess.ExitStatus)
+    def slot_processFinished(self, exitCode, exitStatus):
+        self.fOutputCallback(self.fParser.flush())
+        self.abort()
+        self.failed.emit("Standby backend stopped unexpectedly.")
+
+    @pyqtSlot()
+    def slot_hostLoaded(self):
+        if self.fProcess is None or not self.fSwitching:
+            return
+
+        self.fReadyTimer.stop()
+        self.fHostWait = None
+
+        # all further output goes to the owner
+        process = self.fProcess
+        process.finished.disconnect(self.slot_processFinished)
+        process.readyRead.disconnect(self.slot_read)
+        self.fOutputCallback(self.fParser.flush())
+
+        self.fProcess   = None
+        self.fSwitching = False
+
+        elapsed = time() - self.fSwitchTime
+        traceAsyncEnd("backend switch", { 'ms': elapsed*1000 })
+
+        self.switched.emit(process, elapsed)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # The process has the ports bound (or is gone), they don't need to be held anymore
+    def releasePorts(self):
+        releasePorts(self.fPortReservation)
+        self.fPortReservation = []
+
+    # Runs in the webserver thread
+    def switchHost(self, port, timeout):
+        host = SESSION.host
+        host.addr = (host.addr[0], port)
+        host.connected = False
+
+        # commands are answered in order, the sync command is answered once the pedalboard is loaded.
+        # a timeout is handled by fReadyTimer on our side
+        def connected(ok):
+            if ok:
+                host.send(STANDBY_SYNC_COMMAND, lambda resp: self.hostLoaded.emit(), datatype='float')
+
+        self.fHostWait = HostConnectionWait(IOLoop.current(), host, timeout, connected)
+
+        SESSION.reconnectApp()
+        host.init_host()
+
+# ------------------------------------------------------------------------------------------------------------
+# Host Server
+#
+# Runs the backend process and the webserver thread, and keeps them in sync.
+# The owner gets notified through signals, errors are not shown to the user here.
+
+class HostServer(QObject):
+    # signals
+    backendStarted    = pyqtSignal()
+    backendReady      = pyqtSignal()
+    backendFinished   = pyqtSignal(int, int) # exit code and QProcess.ExitStatus
+    backendError      = pyqtSignal(int, str) # QProcess.ProcessError and description
+    backendSwitched   = pyqtSignal(float)    # time the session took to move to the new backend, in seconds
+    restartFinished   = pyqtSignal()         # restart() is done, whether it worked or not
+    webServerRunning  = pyqtSignal()
+    webServerFailed   = pyqtSignal(str)
+    webServerFinished = pyqtSignal()
+
+    def __init__(self, parent=None):
+        QObject.__init__(self, parent)
+
+        # need to call session reconnect after connecting the 1st time
+        self.fNeedsSessionReconnect = False
+
+        # restart() in progress, and its span is open in the trace
+        self.fRestarting     = False
+        self.fTracingRestart = False
+
+        # host settings, see setSettings()
+        self.fSettings = {
+            MOD_KEY_HOST_VERBOSE:       MOD_DEFAULT_HOST_VERBOSE,
+            MOD_KEY_HOST_PATH:          MOD_DEFAULT_HOST_PATH,
+            MOD_KEY_HOST_READY_TIMEOUT: MOD_DEFAULT_HOST_READY_TIMEOUT,
+        }
+
+        # Process that runs the backend
+        self.fProccessBackend = QProcess(self)
+        self.fProccessBackend.setProcessChannelMode(QProcess.MergedChannels)
+        self.fProccessBackend.setReadChannel(QProcess.StandardOutput)
+        self.fStoppingBackend = False
+
+        # Parser for the backend output, events are handled by the slot_backendEvent* methods
+        self.fBackendParser = BackendOutputParser()
+        self.fBackendParser.setHandler(BACKEND_EVENT_READY, self.slot_backendEventReady)
+        self.fBackendParser.setHandler(BACKEND_EVENT_ERROR, self.slot_backendEventError)
+        self.fBackendParser.setHandler(BACKEND_EVENT_XRUN,  self.slot_backendEventXrun)
+        self.fBackendXruns = 0
+
+        # Recent backend output, shown in the log window
+        self.fBackendLog = BackendLogBuffer()
+
+        # Thread for managing the webserver
+        self.fWebServerThread = WebServerThread(self)
+
+        # Second backend process used for restarts, see StandbyBackend
+        self.fStandbyBackend = StandbyBackend(self.handleBackendLines, self.fWebServerThread, self)
+        self.fSwitchingBackend = False
+
+        # Ports of the current backend, reserved on each start and held until it is ready
+        self.fBackendPorts           = None
+        self.fBackendPortReservation = []
+
+        # Stops webserver and backend without blocking, callbacks are called once done
+        self.fShutdown = ShutdownMachine(self.fProccessBackend, self.fWebServerThread, self)
+        self.fShutdownCallbacks = []
+
+        # ----------------------------------------------------------------------------------------------------
+        # Set-up connections
+
+        self.connectBackendProcess(self.fProccessBackend)
+
+        self.fStandbyBackend.ready.connect(self.slot_standbyReady)
+        self.fStandbyBackend.switched.connect(self.slot_standbySwitched)
+        self.fStandbyBackend.failed.connect(self.slot_standbyFailed)
+
+        self.fWebServerThread.running.connect(self.slot_webServerRunning)
+        self.fWebServerThread.failed.connect(self.slot_webServerFailed)
+
+        self.fShutdown.finished.connect(self.slot_shutdownFinished)
+        self.fWebServerThread.finished.connect(self.slot_webServerFinished)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Use the host keys from @a settings, as loaded by HostWindow.loadSettings()
+    def setSettings(self, settings):
+        for key in self.fSettings:
+            self.fSettings[key] = settings[key]
+
+    def logBuffer(self):
+        return self.fBackendLog
+
+    def isBackendRunning(self):
+        return self.fProccessBackend.state() != QProcess.NotRunning
+
+    # True while anything is running or stopping
+    def isActive(self):
+        return self.fShutdown.isStopping() or self.fWebServerThread.isRunning() or self.isBackendRunning()
+
+    # A standby backend can only take over when everything is up and nothing is stopping
+    def canSwitchBackend(self):
+        if self.fShutdown.isStopping() or self.fStandbyBackend.isActive():
+            return False
+        if self.fProccessBackend.state() != QProcess.Running:
+            return False
+        return self.fWebServerThread.isRunning() and SESSION.host.connected
+
+    def getBackendCommand(self):
+        hostPath = self.fSettings[MOD_KEY_HOST_PATH]
+        if hostPath.endswith("ingen"):
+            hostPath = MOD_DEFAULT_HOST_PATH
+
+        if self.fSettings[MOD_KEY_HOST_VERBOSE]:
+            hostArgs = ["-v"]
+        else:
+            hostArgs = ["-n"]
+
+        return (hostPath, hostArgs)
+
+    def getProcessErrorAsString(self, error):
+        if error == -2:
+            return self.tr("Ingen failed to create UNIX socket.")
+        if error == QProcess.FailedToStart:
+            return self.tr("Process failed to start.")
+        if error == QProcess.Crashed:
+            return self.tr("Process crashed.")
+        if error == QProcess.Timedout:
+            return self.tr("Process timed out.")
+        if error == QProcess.WriteError:
+            return self.tr("Process write error.")
+        return self.tr("Unkown error.")
+
+    # --------------------------------------------------------------------------------------------------------
+
+    @pyqtSlot()
+    def start(self):
+        if self.fProccessBackend.state() != QProcess.NotRunning:
+            print("HostServer.start ignored")
+            return
+
+        print("HostServer.start in progress...")
+        self.fBackendParser.reset()
+        self.fBackendXruns = 0
+        traceAsyncBegin("backend start")
+
+        self.releaseBackendPorts()
+        self.fBackendPorts, self.fBackendPortReservation = reserveBackendPorts()
+        port, feedbackPort = self.fBackendPorts
+        SESSION.host.addr  = (SESSION.host.addr[0], port)
+
+        hostPath, hostArgs = self.getBackendCommand()
+        self.fProccessBackend.start(hostPath, ["-p", str(port), "-f", str(feedbackPort)] + hostArgs)
+
+        # the webserver is only needed once the backend is ready, import it while the backend starts
+        loadWebServer()
+
+    @pyqtSlot()
+    def restart(self):
+        if self.fStandbyBackend.isActive():
+            print("HostServer.restart ignored, already restarting")
+            return
+
+        self.fRestarting     = True
+        self.fTracingRestart = isTracing()
+        traceAsyncBegin("backend restart")
+
+        # keep the UI and audio running while a new backend starts next to the current one
+        if self.canSwitchBackend():
+            hostPath, hostArgs = self.getBackendCommand()
+            self.fStandbyBackend.start(hostPath, hostArgs, self.fSettings[MOD_KEY_HOST_READY_TIMEOUT])
+            return
+
+        # start again only once the old backend is gone
+        self.stop(self.start)
+
+    # Stop webserver and backend, @a callback is called once both are stopped
+    def stop(self, callback=None):
+        self.stopBackendAndWebServer(True, callback)
+
+    # Stop only the webserver
+    def stopWebServer(self, callback=None):
+        self.stopBackendAndWebServer(False, callback)
+
+    def stopBackendAndWebServer(self, stopBackend, callback):
+        if callback is not None:
+            self.fShutdownCallbacks.append(callback)
+
+        if stopBackend and self.fStandbyBackend.isActive():
+            # the old process was handed over already, take it back so its exit is handled
+            if self.fSwitchingBackend:
+                self.fSwitchingBackend = False
+                self.connectBackendProcess(self.fProccessBackend)
+            self.fStandbyBackend.abort()
+
+        if stopBackend and self.fProccessBackend.state() != QProcess.NotRunning:
+            self.fStoppingBackend = True
+
+        self.fShutdown.start(stopBackend)
+
+    # blocking version, only used when the owner is destroyed
+    def stopWait(self):
+        self.fStandbyBackend.abort()
+
+        if self.fWebServerThread.isRunning():
+            with traceSpan("stopAndWaitForWebServer"):
+                if not self.fWebServerThread.stopWait():
+                    qWarning("WebServer Thread failed top stop cleanly, forced terminate")
+                    self.fWebServerThread.terminate()
+
+        SESSION.host.close_jack()
+
+        if self.fProccessBackend.state() == QProcess.NotRunning:
+            return
+
+        with traceSpan("stopAndWaitForBackend"):
+            self.fStoppingBackend = True
+            self.fProccessBackend.terminate()
+            if not self.fProccessBackend.waitForFinished(2000):
+                qWarning("Backend failed top stop cleanly, forced kill")
+                self.fProccessBackend.kill()
+
+    # --------------------------------------------------------------------------------------------------------
+    # Backend process
+
+    @pyqtSlot()
+    def slot_backendStarted(self):
+        traceInstant("backend process started", { 'pid': int(self.fProccessBackend.processId()) })
+        self.backendStarted.emit()
+
+    @pyqtSlot(int, QProcess.ExitStatus)
+    def slot_backendFinished(self, exitCode, exitStatus):
+        traceInstant("backend process finished", { 'exitCode': exitCode, 'exitStatus': int(exitStatus) })
+        self.handleBackendLines(self.fBackendParser.flush())
+        self.releaseBackendPorts()
+
+        self.fStoppingBackend = False
+
+        self.backendFinished.emit(exitCode, int(exitStatus))
+
+        # stop webserver
+        self.stopWebServer()
+
+    @pyqtSlot(QProcess.ProcessError)
+    def slot_backendError(self, error):
+        traceInstant("backend error", { 'error': int(error) })
+
+        # stop webserver
+        self.stopWebServer()
+
+        # crashed while stopping, ignore
+        if error == QProcess.Crashed and self.fStoppingBackend:
+            return
+
+        self.backendError.emit(int(error), self.getProcessErrorAsString(error))
+
+    @pyqtSlot()
+    def slot_backendRead(self):
+        #if self.fProccessBackend.state() != QProcess.Running:
+            #return
+
+        self.handleBackendLines(self.fBackendParser.process(bytes(self.fProccessBackend.readAllStandardOutput())))
+
+            #elif "Listening on socket " in line:
+                #QTimer.singleShot(1000, self.slot_ingenStarted)
+            ##elif "Activated Jack client " in line:
+                ##QTimer.singleShot(1000, self.fWebServerThread.start)
+            #elif "Failed to create UNIX socket" in line or "Could not activate Jack client" in line:
+                ## need to wait for ingen to create sockets so it can delete them on termination
+                #QTimer.singleShot(1000, self.slot_ingenStartError)
+
+    def slot_backendEventReady(self, line):
+        QTimer.singleShot(0, self.slot_backendStartPhase2)
+
+    def slot_backendEventError(self, line):
+        traceInstant("backend error output", { 'line': line })
+
+        # always show errors, verbose mode prints everything anyway
+        if not self.fSettings[MOD_KEY_HOST_VERBOSE]:
+            print("BACKEND:", line)
+
+    def slot_backendEventXrun(self, line):
+        self.fBackendXruns += 1
+        traceInstant("backend xrun", { 'count': self.fBackendXruns })
+
+    @pyqtSlot()
+    def slot_backendStartPhase2(self):
+        traceInstant("mod-host ready")
+        traceAsyncEnd("backend start")
+        self.releaseBackendPorts()
+        if self.fProccessBackend.state() == QProcess.NotRunning:
+            return
+
+        self.backendReady.emit()
+
+        if not self.fNeedsSessionReconnect:
+            # we'll need it for next time
+            self.fNeedsSessionReconnect = True
+        else:
+            # we need it now
+            SESSION.reconnectApp()
+
+        self.fWebServerThread.setReadyTimeout(self.fSettings[MOD_KEY_HOST_READY_TIMEOUT])
+        self.fWebServerThread.start()
+
+    @pyqtSlot()
+    def slot_backendStartError(self):
+        self.stop()
+        self.backendError.emit(-2, self.getProcessErrorAsString(-2))
+
+    # --------------------------------------------------------------------------------------------------------
+    # Standby backend
+
+    @pyqtSlot()
+    def slot_standbyReady(self):
+        # the old process keeps playing until the new one took over, its exit is handled there
+        self.fSwitchingBackend = True
+        self.disconnectBackendProcess(self.fProccessBackend)
+        self.handleBackendLines(self.fBackendParser.flush())
+
+        self.fStandbyBackend.switch()
+
+    @pyqtSlot(QObject, float)
+    def slot_standbySwitched(self, process, elapsed):
+        oldProcess = self.fProccessBackend
+
+        self.fSwitchingBackend = False
+        self.fProccessBackend  = process
+        self.fBackendPorts     = self.fStandbyBackend.ports()
+        self.fBackendParser.reset()
+        self.fBackendXruns = 0
+
+        self.connectBackendProcess(process)
+        self.fShutdown.setProcess(process)
+
+        # the new process has the pedalboard loaded, the old one can go now
+        stopProcessLater(oldProcess, SHUTDOWN_BACKEND_TIMEOUT)
+
+        print("Backend switched, session moved in %i ms" % (elapsed*1000))
+        self.endRestart()
+
+        self.backendSwitched.emit(elapsed)
+
+    @pyqtSlot(str)
+    def slot_standbyFailed(self, error):
+        qWarning("Backend switch failed: %s" % error)
+
+        # the old backend is still fine if the session was not moved yet
+        if not self.fSwitchingBackend:
+            self.endRestart({ 'failed': True })
+            return
+
+        # otherwise do a regular restart
+        self.fSwitchingBackend = False
+        self.connectBackendProcess(self.fProccessBackend)
+        self.stop(self.start)
+
+    # --------------------------------------------------------------------------------------------------------
+    # Web Server
+
+    @pyqtSlot()
+    def slot_webServerRunning(self):
+        print("webserver running with URL:", config["addr"])
+        traceInstant("webserver running")
+        self.endRestart()
+
+        self.webServerRunning.emit()
+
+    @pyqtSlot(str)
+    def slot_webServerFailed(self, error):
+        # stop backend&server
+        self.stop()
+
+        self.webServerFailed.emit(error)
+
+    @pyqtSlot()
+    def slot_webServerFinished(self):
+        print("webserver finished")
+        traceInstant("webserver finished")
+
+        self.webServerFinished.emit()
+
+    # --------------------------------------------------------------------------------------------------------
+    # Shutdown
+
+    @pyqtSlot(float)
+    def slot_shutdownFinished(self, elapsed):
+        callbacks, self.fShutdownCallbacks = self.fShutdownCallbacks, []
+
+        # let the other finished/error handlers run first
+        for callback in callbacks:
+            QTimer.singleShot(0, callback)
+
+    # --------------------------------------------------------------------------------------------------------
+    # Internal stuff
+
+    def handleBackendLines(self, lines):
+        if not lines:
+            return
+
+        self.fBackendLog.append(lines)
+
+        if not self.fSettings[MOD_KEY_HOST_VERBOSE]:
+            return
+
+        # a single write for the whole batch
+        sys.stdout.write("".join("BACKEND: %s\n" % line for line in lines))
+        sys.stdout.flush()
+
+    def connectBackendProcess(self, process):
+        process.error.connect(self.slot_backendError)
+        process.started.connect(self.slot_backendStarted)
+        process.finished.connect(self.slot_backendFinished)
+        process.readyRead.connect(self.slot_backendRead)
+
+    def disconnectBackendProcess(self, process):
+        process.error.disconnect(self.slot_backendError)
+        process.started.disconnect(self.slot_backendStarted)
+        process.finished.disconnect(self.slot_backendFinished)
+        process.readyRead.disconnect(self.slot_backendRead)
+
+    def releaseBackendPorts(self):
+        releasePorts(self.fBackendPortReservation)
+        self.fBackendPortReservation = []
+
+    def endRestart(self, args=None):
+        if not self.fRestarting:
+            return
+
+        self.fRestarting = False
+
+        if self.fTracingRestart:
+            self.fTracingRestart = False
+            traceAsyncEnd("backend restart", args)
+
+        self.restartFinished.emit()
+
+# ------------------------------------------------------------------------------------------------------------
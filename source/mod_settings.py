@@ -112,6 +112,7 @@ class SettingsWindow(QDialog):
         self.ui.cb_webview_verbose.setChecked(settings.value(MOD_KEY_WEBVIEW_VERBOSE, MOD_DEFAULT_WEBVIEW_VERBOSE, type=bool))
         self.ui.cb_webview_show_inspector.setChecked(settings.value(MOD_KEY_WEBVIEW_SHOW_INSPECTOR, MOD_DEFAULT_WEBVIEW_SHOW_INSPECTOR, type=bool))
         self.ui.cb_webview_show_inspector.setEnabled(self.ui.cb_webview_inspector.isChecked())
+        self.ui.cb_webview_in_process.setChecked(settings.value(MOD_KEY_WEBVIEW_IN_PROCESS, MOD_DEFAULT_WEBVIEW_IN_PROCESS, type=bool))
 
     # --------------------------------------------------------------------------------------------------------
 
@@ -137,6 +138,7 @@ class SettingsWindow(QDialog):
         settings.setValue(MOD_KEY_WEBVIEW_INSPECTOR,      self.ui.cb_webview_inspector.isChecked())
         settings.setValue(MOD_KEY_WEBVIEW_VERBOSE,        self.ui.cb_webview_verbose.isChecked())
         settings.setValue(MOD_KEY_WEBVIEW_SHOW_INSPECTOR, self.ui.cb_webview_show_inspector.isChecked())
+        settings.setValue(MOD_KEY_WEBVIEW_IN_PROCESS,     self.ui.cb_webview_in_process.isChecked())
 
     # --------------------------------------------------------------------------------------------------------
 
@@ -163,6 +165,7 @@ class SettingsWindow(QDialog):
             self.ui.cb_webview_inspector.setChecked(MOD_DEFAULT_WEBVIEW_INSPECTOR)
             self.ui.cb_webview_verbose.setChecked(MOD_DEFAULT_WEBVIEW_VERBOSE)
             self.ui.cb_webview_show_inspector.setChecked(MOD_DEFAULT_WEBVIEW_SHOW_INSPECTOR)
+            self.ui.cb_webview_in_process.setChecked(MOD_DEFAULT_WEBVIEW_IN_PROCESS)
 
     # --------------------------------------------------------------------------------------------------------
 
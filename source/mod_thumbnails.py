@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSignal, pyqtSlot, Qt, QBuffer, QByteArray, QObject, QRunnable, QSize, QThread, QThreadPool
+    from PyQt4.QtGui import QImage, QImageReader, QPixmap
+else:
+    from PyQt5.QtCore import pyqtSignal, pyqtSlot, Qt, QBuffer, QByteArray, QObject, QRunnable, QSize, QThread, QThreadPool
+    from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+from collections import OrderedDict
+from hashlib import sha1
+
+# ------------------------------------------------------------------------------------------------------------
+# Thumbnail settings
+
+# Thumbnails are scaled to fit this size, keeping their aspect ratio
+THUMBNAIL_WIDTH  = 256
+THUMBNAIL_HEIGHT = 128
+
+# Decoded pixmaps kept in memory, in bytes
+THUMBNAIL_MEMORY_CACHE_SIZE = 32*1024*1024
+
+# Pre-scaled images kept on disk, in bytes, the least recently used ones are removed first
+THUMBNAIL_DISK_CACHE_SIZE = 64*1024*1024
+
+# Decoding threads, at most
+THUMBNAIL_MAX_THREADS = 4
+
+# ------------------------------------------------------------------------------------------------------------
+# Get the thumbnail for the image at @a path, scaled to fit @a size.
+# The scaled image is stored in @a cacheDir, keyed by a hash of the original file contents.
+# Returns a null QImage if the file can't be read. Safe to call from any thread.
+
+def loadThumbnail(path, size, cacheDir):
+    try:
+        with open(path, 'rb') as fh:
+            data = fh.read()
+    except OSError:
+        return QImage()
+
+    cacheFile = os.path.join(cacheDir, "%s-%ix%i.png" % (sha1(data).hexdigest(), size.width(), size.height()))
+    image     = QImage()
+
+    if image.load(cacheFile, "PNG"):
+        # mark as recently used
+        try:
+            os.utime(cacheFile)
+        except OSError:
+            pass
+        return image
+
+    buf = QBuffer()
+    buf.setData(QByteArray(data))
+
+    reader = QImageReader(buf)
+    origSize = reader.size()
+
+    # let the reader scale while decoding, never scale up
+    if origSize.isValid() and (origSize.width() > size.width() or origSize.height() > size.height()):
+        reader.setScaledSize(origSize.scaled(size, Qt.KeepAspectRatio))
+
+    image = reader.read()
+
+    if image.isNull():
+        return image
+
+    tmpFile = cacheFile + ".tmp"
+
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        if image.save(tmpFile, "PNG"):
+            os.replace(tmpFile, cacheFile)
+    except OSError as e:
+        print("ThumbnailService: failed to write cache file:", e)
+
+    return image
+
+# Remove the least recently used files until @a cacheDir is below @a maxSize bytes
+def pruneThumbnailCache(cacheDir, maxSize):
+    files = []
+    total = 0
+
+    try:
+        entries = os.scandir(cacheDir)
+    except OSError:
+        return
+
+    with entries:
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    if total <= maxSize:
+        return
+
+    files.sort()
+
+    for mtime, size, path in files:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+
+        total -= size
+        if total <= maxSize:
+            break
+
+# ------------------------------------------------------------------------------------------------------------
+# Thread pool jobs
+
+class ThumbnailSignals(QObject):
+    loaded = pyqtSignal(str, QImage)
+
+class ThumbnailJob(QRunnable):
+    def __init__(self, path, size, cacheDir, signals):
+        QRunnable.__init__(self)
+        self.fPath     = path
+        self.fSize     = size
+        self.fCacheDir = cacheDir
+        self.fSignals  = signals
+
+    def run(self):
+        self.fSignals.loaded.emit(self.fPath, loadThumbnail(self.fPath, self.fSize, self.fCacheDir))
+
+class ThumbnailCachePruneJob(QRunnable):
+    def __init__(self, cacheDir, maxSize):
+        QRunnable.__init__(self)
+        self.fCacheDir = cacheDir
+        self.fMaxSize  = maxSize
+
+    def run(self):
+        pruneThumbnailCache(self.fCacheDir, self.fMaxSize)
+
+# ------------------------------------------------------------------------------------------------------------
+# Thumbnail Service
+#
+# Hands out display-sized pixmaps for thumbnail files, without ever decoding on the GUI thread.
+# Pixmaps come from a size-bounded in-memory LRU, misses are loaded by a thread pool from the
+# on-disk cache of pre-scaled images (or the original file) and announced with thumbnailReady.
+# The most recent requests are loaded first, so whatever is currently on screen wins while scrolling.
+
+class ThumbnailService(QObject):
+    # signals
+    thumbnailReady = pyqtSignal(str)
+
+    def __init__(self, parent, size=QSize(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT), cacheDir=THUMBNAILS_CACHE_DIR):
+        QObject.__init__(self, parent)
+
+        self.fSize     = QSize(size)
+        self.fCacheDir = cacheDir
+
+        # path -> QPixmap, least recently used first
+        self.fCache      = OrderedDict()
+        self.fCacheBytes = 0
+        self.fCacheLimit = THUMBNAIL_MEMORY_CACHE_SIZE
+
+        # paths being loaded, and those that could not be
+        self.fPending  = set()
+        self.fFailed   = set()
+        self.fPriority = 0
+
+        # stats
+        self.fHits   = 0
+        self.fMisses = 0
+
+        self.fPool = QThreadPool(self)
+        self.fPool.setMaxThreadCount(max(1, min(QThread.idealThreadCount()-1, THUMBNAIL_MAX_THREADS)))
+
+        self.fSignals = ThumbnailSignals(self)
+        self.fSignals.loaded.connect(self.slot_loaded)
+
+        self.fPool.start(ThumbnailCachePruneJob(self.fCacheDir, THUMBNAIL_DISK_CACHE_SIZE))
+
+    def stopWait(self):
+        self.cancelPending()
+        self.fPool.waitForDone(2000)
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def thumbnailSize(self):
+        return QSize(self.fSize)
+
+    # Get the thumbnail for @a path, or None if it's not loaded yet.
+    # In that case it gets loaded in the background, thumbnailReady is emitted once done.
+    def thumbnail(self, path):
+        if not path:
+            return None
+
+        pixmap = self.fCache.get(path)
+
+        if pixmap is not None:
+            self.fCache.move_to_end(path)
+            self.fHits += 1
+            return pixmap
+
+        self.fMisses += 1
+        self.request(path)
+        return None
+
+    # Load @a path in the background, if not already in memory
+    def request(self, path):
+        if path in self.fCache or path in self.fPending or path in self.fFailed:
+            return
+
+        self.fPending.add(path)
+
+        # newer requests get higher priority
+        self.fPriority += 1
+        self.fPool.start(ThumbnailJob(path, self.fSize, self.fCacheDir, self.fSignals), self.fPriority)
+
+    # Drop queued requests, used when the requested thumbnails are no longer visible
+    def cancelPending(self):
+        self.fPool.clear()
+        self.fPending.clear()
+        self.fPriority = 0
+
+    # Forget @a path, used when the file changed on disk
+    def invalidate(self, path):
+        self.fFailed.discard(path)
+
+        pixmap = self.fCache.pop(path, None)
+
+        if pixmap is not None:
+            self.fCacheBytes -= self.pixmapBytes(pixmap)
+
+    def clearMemoryCache(self):
+        self.fCache.clear()
+        self.fCacheBytes = 0
+        self.fFailed.clear()
+
+    def stats(self):
+        return {
+            'items':   len(self.fCache),
+            'bytes':   self.fCacheBytes,
+            'hits':    self.fHits,
+            'misses':  self.fMisses,
+            'pending': len(self.fPending),
+        }
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def pixmapBytes(self, pixmap):
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth()) // 8
+
+    @pyqtSlot(str, QImage)
+    def slot_loaded(self, path, image):
+        # cancelled in the meantime, keep it anyway since the work is done
+        self.fPending.discard(path)
+
+        if image.isNull():
+            self.fFailed.add(path)
+            return
+
+        old = self.fCache.pop(path, None)
+
+        if old is not None:
+            self.fCacheBytes -= self.pixmapBytes(old)
+
+        pixmap = QPixmap.fromImage(image)
+        self.fCache[path] = pixmap
+        self.fCacheBytes += self.pixmapBytes(pixmap)
+
+        while self.fCacheBytes > self.fCacheLimit and len(self.fCache) > 1:
+            path2, pixmap2 = self.fCache.popitem(last=False)
+            self.fCacheBytes -= self.pixmapBytes(pixmap2)
+
+        self.thumbnailReady.emit(path)
+
+# ------------------------------------------------------------------------------------------------------------
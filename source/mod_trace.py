@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Lightweight lifecycle tracing, exported in Chrome trace-event format (chrome://tracing, Perfetto)
+#
+# Tracing is enabled by setting MOD_APP_TRACE to the output filename.
+# When disabled, all trace calls return right away.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+import json
+import os
+
+from contextlib import contextmanager
+from threading import current_thread, get_ident, Lock
+from time import perf_counter
+
+# ------------------------------------------------------------------------------------------------------------
+# Tracer
+
+class Tracer(object):
+    def __init__(self, filename):
+        self.fFilename = filename
+        self.fEnabled  = bool(filename)
+        self.fLock     = Lock()
+        self.fEvents   = []
+        self.fThreads  = {}
+        self.fPid      = os.getpid()
+        self.fStart    = perf_counter()
+
+    def isEnabled(self):
+        return self.fEnabled
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def addEvent(self, name, ph, args=None, **extra):
+        tid   = get_ident()
+        event = {
+            'name': name,
+            'ph':   ph,
+            'ts':   (perf_counter() - self.fStart) * 1000000.0,
+            'pid':  self.fPid,
+            'tid':  tid,
+        }
+
+        if args:
+            event['args'] = args
+        if extra:
+            event.update(extra)
+
+        with self.fLock:
+            if tid not in self.fThreads:
+                self.fThreads[tid] = current_thread().name
+            self.fEvents.append(event)
+
+    def setThreadName(self, name):
+        if not self.fEnabled:
+            return
+
+        with self.fLock:
+            self.fThreads[get_ident()] = name
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def dump(self, filename=None):
+        if not self.fEnabled:
+            return False
+
+        with self.fLock:
+            events  = list(self.fEvents)
+            threads = dict(self.fThreads)
+
+        for tid, name in threads.items():
+            events.append({ 'name': "thread_name", 'ph': "M", 'pid': self.fPid, 'tid': tid, 'args': { 'name': name } })
+
+        try:
+            with open(filename or self.fFilename, 'w') as fh:
+                json.dump({ 'traceEvents': events, 'displayTimeUnit': "ms" }, fh)
+        except OSError as e:
+            print("Failed to write trace file:", e)
+            return False
+
+        print("Trace written to", filename or self.fFilename)
+        return True
+
+# ------------------------------------------------------------------------------------------------------------
+# Global tracer
+
+_tracer = Tracer(os.getenv("MOD_APP_TRACE", ""))
+
+def isTracing():
+    return _tracer.fEnabled
+
+def traceThreadName(name):
+    _tracer.setThreadName(name)
+
+# Instant event, for things that happen at a single point in time
+def traceInstant(name, args=None):
+    if _tracer.fEnabled:
+        _tracer.addEvent(name, "i", args, s="t")
+
+# Span on the current thread, begin and end must be called from the same thread
+def traceBegin(name, args=None):
+    if _tracer.fEnabled:
+        _tracer.addEvent(name, "B", args)
+
+def traceEnd(name, args=None):
+    if _tracer.fEnabled:
+        _tracer.addEvent(name, "E", args)
+
+@contextmanager
+def traceSpan(name, args=None):
+    if not _tracer.fEnabled:
+        yield
+        return
+
+    _tracer.addEvent(name, "B", args)
+    try:
+        yield
+    finally:
+        _tracer.addEvent(name, "E")
+
+# Span that can begin and end on different threads or event loop iterations
+def traceAsyncBegin(name, args=None):
+    if _tracer.fEnabled:
+        _tracer.addEvent(name, "b", args, cat="async", id=name)
+
+def traceAsyncEnd(name, args=None):
+    if _tracer.fEnabled:
+        _tracer.addEvent(name, "e", args, cat="async", id=name)
+
+def dumpTrace(filename=None):
+    return _tracer.dump(filename)
+
+# ------------------------------------------------------------------------------------------------------------
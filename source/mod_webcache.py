@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# MOD-App
+# Copyright (C) 2014-2015 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of
+# the License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the LICENSE file.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom)
+
+from mod_common import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+if using_Qt4:
+    from PyQt4.QtCore import pyqtSlot, QDateTime, QUrl
+    from PyQt4.QtNetwork import QNetworkAccessManager, QNetworkCacheMetaData, QNetworkDiskCache, QNetworkReply, QNetworkRequest
+else:
+    from PyQt5.QtCore import pyqtSlot, QDateTime, QUrl
+    from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkCacheMetaData, QNetworkDiskCache, QNetworkReply, QNetworkRequest
+
+# ------------------------------------------------------------------------------------------------------------
+# Web cache settings
+
+# Maximum size of the disk cache, in bytes
+WEB_CACHE_SIZE = 128*1024*1024
+
+# ------------------------------------------------------------------------------------------------------------
+# Web Disk Cache
+#
+# QNetworkDiskCache that stores registered origins under a stable name instead of their host and port.
+# The webserver gets a random port on each launch, so plain URL keys would never be hit twice.
+# Responses from registered origins are stored as already expired, so every load revalidates them
+# with the ETag or Last-Modified the server sent, and only unchanged files are served from disk.
+# Hits and misses are counted from the replies of the managers it is installed on, see install().
+
+class WebDiskCache(QNetworkDiskCache):
+    def __init__(self, parent, cacheDir=WEB_CACHE_DIR, maxSize=WEB_CACHE_SIZE):
+        QNetworkDiskCache.__init__(self, parent)
+        self.setCacheDirectory(cacheDir)
+        self.setMaximumCacheSize(maxSize)
+
+        # (scheme, host, port) -> origin name
+        self.fOrigins = {}
+
+        # stats
+        self.fHits   = 0
+        self.fMisses = 0
+        self.fStored = 0
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Use this cache for @a manager, which takes ownership of it
+    def install(self, manager):
+        manager.setCache(self)
+        manager.finished.connect(self.slot_replyFinished)
+
+    # Store everything under @a url's scheme, host and port as coming from @a name
+    def addOrigin(self, url, name):
+        url = QUrl(url)
+        self.fOrigins[(url.scheme(), url.host(), url.port())] = name
+
+    def removeOrigin(self, url):
+        url = QUrl(url)
+        self.fOrigins.pop((url.scheme(), url.host(), url.port()), None)
+
+    def cacheKey(self, url):
+        name = self.fOrigins.get((url.scheme(), url.host(), url.port()))
+
+        if name is None:
+            return url
+
+        key = QUrl(url)
+        key.setHost(name)
+        key.setPort(-1)
+        return key
+
+    def isRegistered(self, url):
+        return (url.scheme(), url.host(), url.port()) in self.fOrigins
+
+    def stats(self):
+        return {
+            'hits':   self.fHits,
+            'misses': self.fMisses,
+            'stored': self.fStored,
+            'bytes':  self.cacheSize(),
+        }
+
+    # --------------------------------------------------------------------------------------------------------
+
+    def metaData(self, url):
+        metaData = QNetworkDiskCache.metaData(self, self.cacheKey(url))
+
+        # callers expect the URL they asked for
+        if metaData.isValid():
+            metaData.setUrl(url)
+
+        return metaData
+
+    def data(self, url):
+        return QNetworkDiskCache.data(self, self.cacheKey(url))
+
+    def remove(self, url):
+        return QNetworkDiskCache.remove(self, self.cacheKey(url))
+
+    def prepare(self, metaData):
+        url = metaData.url()
+
+        if self.isRegistered(url):
+            # nothing to revalidate against, it would be served stale forever
+            hasETag = any(bytes(name).lower() == b"etag" for name, value in metaData.rawHeaders())
+            if not (hasETag or metaData.lastModified().isValid()):
+                return None
+
+            metaData = self.localMetaData(metaData)
+
+        self.fStored += 1
+        return QNetworkDiskCache.prepare(self, metaData)
+
+    def updateMetaData(self, metaData):
+        if self.isRegistered(metaData.url()):
+            metaData = self.localMetaData(metaData)
+
+        QNetworkDiskCache.updateMetaData(self, metaData)
+
+    def localMetaData(self, metaData):
+        metaData = QNetworkCacheMetaData(metaData)
+        metaData.setUrl(self.cacheKey(metaData.url()))
+
+        # stale right away, so it's revalidated on every load
+        metaData.setExpirationDate(QDateTime.currentDateTimeUtc())
+        return metaData
+
+    # --------------------------------------------------------------------------------------------------------
+
+    # Qt also calls data() to update metadata and while revalidating, so hits are counted per reply instead.
+    # Replies made outside of Qt's HTTP backend (like the in-process transport) never use the cache.
+    @pyqtSlot(QNetworkReply)
+    def slot_replyFinished(self, reply):
+        if reply.operation() != QNetworkAccessManager.GetOperation or type(reply) is not QNetworkReply:
+            return
+
+        if reply.url().scheme() not in ("http", "https"):
+            return
+
+        if reply.request().attribute(QNetworkRequest.CacheLoadControlAttribute) == QNetworkRequest.AlwaysNetwork:
+            return
+
+        if reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute):
+            self.fHits += 1
+        else:
+            self.fMisses += 1
+
+# ------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Throughput benchmark for the mod-host output parser
+#
+# usage: bench-backend-parser.py [--size MB] [--chunk BYTES] [--repeat N]
+#
+# Generates verbose mod-host style output with color escapes and feeds it in chunks,
+# like QProcess delivers it, to the old split/replace loop and to BackendOutputParser.
+# Verbose mode also writes every line to /dev/null, as mod-app does with --verbose.
+# Each run is repeated, the best time is reported.
+
+import os
+import random
+import sys
+
+from time import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(sys.argv[0]), "..")))
+
+from mod_backend import BackendOutputParser
+
+# Regular verbose output, with the occasional error or xrun mixed in
+SAMPLE_LINES = (
+    "received command: param_set 0 gain 0.500000",
+    "received command: param_get 1 freq",
+    "\x1b[0;33mmonitor: effect_0 output 0.012\x1b[0m",
+    "effect_0 loaded",
+    "resp 0",
+)
+
+RARE_LINES = (
+    "\x1b[0;31merror: failed to connect ports\x1b[0m",
+    "jack xrun detected, delay 1.2 ms",
+)
+
+def generate(size):
+    rand  = random.Random(0)
+    lines = []
+    total = 0
+
+    while total < size:
+        if rand.random() < 0.001:
+            line = rand.choice(RARE_LINES) + "\n"
+        else:
+            line = rand.choice(SAMPLE_LINES) + "\n"
+        total += len(line)
+        lines.append(line)
+
+    lines.insert(len(lines)//2, "mod-host ready!\n")
+    return "".join(lines).encode("utf-8")
+
+def chunks(data, chunkSize):
+    return [data[i:i+chunkSize] for i in range(0, len(data), chunkSize)]
+
+# Same as the loop previously used in HostWindow.slot_backendRead
+def runOld(reads, out):
+    count = 0
+
+    for data in reads:
+        for line in str(data.strip(), encoding="utf-8", errors="ignore").strip().split("\n"):
+            line = line.replace("\x1b[0m","").replace("\x1b[0;31m","").replace("\x1b[0;33m","").strip()
+            if not line:
+                continue
+            count += 1
+            if out is not None:
+                print("BACKEND:", line, file=out)
+            if line == "mod-host ready!" or line == "mod-host is running.":
+                pass
+
+    return count
+
+def runNew(reads, out):
+    events = { 'ready': 0, 'error': 0, 'xrun': 0 }
+    parser = BackendOutputParser()
+
+    for event in events:
+        parser.setHandler(event, lambda line, event=event: events.__setitem__(event, events[event]+1))
+
+    count = 0
+    for data in reads:
+        lines  = parser.process(data)
+        count += len(lines)
+        if out is not None and lines:
+            out.write("".join("BACKEND: %s\n" % line for line in lines))
+    count += len(parser.flush())
+
+    return count, events
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    argparser = ArgumentParser(description="Measure mod-host output parser throughput")
+    argparser.add_argument("--size", type=float, default=32.0, help="amount of output in MB")
+    argparser.add_argument("--chunk", type=int, default=4096, help="bytes per read")
+    argparser.add_argument("--repeat", type=int, default=5, help="runs of each parser, the fastest counts")
+    args = argparser.parse_args()
+
+    data  = generate(int(args.size*1024*1024))
+    reads = chunks(data, args.chunk)
+    mb    = len(data)/(1024*1024)
+
+    print("input:  %.1f MB in %i reads of %i bytes" % (mb, len(reads), args.chunk))
+
+    with open(os.devnull, 'w') as devnull:
+        for mode, out in (("quiet", None), ("verbose", devnull)):
+            oldTime = newTime = float("inf")
+
+            for i in range(max(1, args.repeat)):
+                start = time()
+                oldCount = runOld(reads, out)
+                oldTime  = min(oldTime, time() - start)
+
+                start = time()
+                newCount, events = runNew(reads, out)
+                newTime = min(newTime, time() - start)
+
+            print("%s:" % mode)
+            print("  old:  %.3f s, %.1f MB/s, %i lines" % (oldTime, mb/oldTime, oldCount))
+            print("  new:  %.3f s, %.1f MB/s, %i lines (%.1fx)" % (newTime, mb/newTime, newCount, oldTime/max(newTime, 1e-9)))
+
+    print("events: %s" % ", ".join("%s=%i" % item for item in sorted(events.items())))
+
+    # the old loop splits lines across reads, so its count is a bit higher
+    if events['ready'] != 1:
+        print("WARNING: ready line was not detected exactly once")
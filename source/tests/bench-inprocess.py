@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Benchmark webview requests over loopback TCP against the in-process transport
+#
+# usage: bench-inprocess.py [--requests N] [--concurrency N] [--sizes BYTES,BYTES,...]
+#
+# Runs a tornado application on its own IOLoop thread, listening on a random port like mod-app does,
+# and requests the same URLs through a plain QNetworkAccessManager and through InProcessNetworkAccessManager.
+# Reports per-request latency (median, p95) and the process CPU time used per request for each transport.
+
+import os
+import sys
+import threading
+
+from time import perf_counter, process_time
+
+CWD = sys.path[0]
+
+if not CWD:
+    CWD = os.path.dirname(sys.argv[0])
+
+# make it work with cxfreeze
+if os.path.isfile(CWD):
+    CWD = os.path.dirname(CWD)
+
+sys.path = [os.path.join(CWD, "..")] + sys.path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QCoreApplication, QEventLoop, QUrl
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest
+
+from tornado import web
+from tornado.httpserver import HTTPServer
+from tornado.ioloop import IOLoop
+from tornado.netutil import bind_sockets
+
+from mod_inprocess import InProcessNetworkAccessManager
+
+try:
+    from asyncio import new_event_loop, set_event_loop
+    haveAsyncIO = True
+except:
+    haveAsyncIO = False
+
+# ------------------------------------------------------------------------------------------------------------
+# Server side, an API call and static-like assets of the given sizes
+
+class ApiHandler(web.RequestHandler):
+    def get(self):
+        self.write({ 'ok': True, 'value': self.get_argument("value", "") })
+
+class AssetHandler(web.RequestHandler):
+    payloads = {}
+
+    def get(self, size):
+        size = int(size)
+        data = self.payloads.get(size)
+
+        if data is None:
+            data = self.payloads[size] = b"x" * size
+
+        self.set_header("Content-Type", "application/octet-stream")
+        self.write(data)
+
+def startServer():
+    application = web.Application([
+        (r"/api", ApiHandler),
+        (r"/asset/(\d+)", AssetHandler),
+    ])
+
+    sockets = bind_sockets(0, "127.0.0.1")
+    started = threading.Event()
+    ioloops = []
+
+    def run():
+        if haveAsyncIO:
+            set_event_loop(new_event_loop())
+
+        HTTPServer(application).add_sockets(sockets)
+        ioloops.append(IOLoop.current())
+        started.set()
+        ioloops[0].start()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait()
+
+    return application, ioloops[0], "http://127.0.0.1:%i" % sockets[0].getsockname()[1]
+
+# ------------------------------------------------------------------------------------------------------------
+
+def runRequests(app, manager, urls, concurrency):
+    latencies = []
+    pending   = list(reversed(urls))
+    active    = [0]
+    loop      = QEventLoop()
+
+    def startNext():
+        url   = pending.pop()
+        start = perf_counter()
+        reply = manager.get(QNetworkRequest(QUrl(url)))
+
+        def finished():
+            reply.readAll()
+            latencies.append(perf_counter() - start)
+            reply.deleteLater()
+            active[0] -= 1
+
+            if pending:
+                startNext()
+            elif active[0] == 0:
+                loop.quit()
+
+        reply.finished.connect(finished)
+        active[0] += 1
+
+    cpuStart = process_time()
+    wallStart = perf_counter()
+
+    for i in range(min(concurrency, len(pending))):
+        startNext()
+
+    loop.exec_()
+
+    return latencies, process_time() - cpuStart, perf_counter() - wallStart
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values)-1, int(len(values)*p))]
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Compare loopback TCP and in-process webview requests")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=6, help="requests in flight, webkit uses up to 6 per host")
+    parser.add_argument("--sizes", default="0,4096,65536,1048576", help="asset sizes, 0 means the JSON API call")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    application, ioloop, origin = startServer()
+
+    managers = (
+        ("tcp", QNetworkAccessManager()),
+        ("in-process", InProcessNetworkAccessManager(None, QUrl(origin), lambda: application, lambda: ioloop)),
+    )
+    managers[1][1].setInProcessEnabled(True)
+
+    for size in (int(size) for size in args.sizes.split(",")):
+        path  = "/api?value=%i" if size == 0 else "/asset/%i" % size + "?n=%i"
+        count = args.requests if size < 1048576 else max(1, args.requests//20)
+        urls  = [origin + (path % i) for i in range(count)]
+
+        print("%s, %i requests:" % ("api call" if size == 0 else "%i byte asset" % size, count))
+
+        for name, manager in managers:
+            # warm up connections and code paths
+            runRequests(app, manager, urls[:20], args.concurrency)
+
+            latencies, cpu, wall = runRequests(app, manager, urls, args.concurrency)
+
+            print("  %-10s  median %7.3f ms  p95 %7.3f ms  cpu %7.3f ms/request  %8.1f requests/s" % (
+                  name, percentile(latencies, 0.5)*1000, percentile(latencies, 0.95)*1000,
+                  cpu/count*1000, count/wall))
+
+    ioloop.add_callback(ioloop.stop)
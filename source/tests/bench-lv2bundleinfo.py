@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Benchmark per-call lilv world creation against a pooled BundleInspector
+#
+# usage: bench-lv2bundleinfo.py /path/to/bundle-or-directory [...]
+
+import os
+import sys
+
+from time import time
+
+from lv2bundleinfo import BundleInspector, get_info_from_lv2_bundle
+
+def find_bundles(paths):
+    bundles = []
+
+    for path in paths:
+        path = os.path.abspath(path)
+
+        if os.path.exists(os.path.join(path, "manifest.ttl")):
+            bundles.append(path)
+            continue
+
+        for name in sorted(os.listdir(path)):
+            bundle = os.path.join(path, name)
+            if os.path.exists(os.path.join(bundle, "manifest.ttl")):
+                bundles.append(bundle)
+
+    return bundles
+
+def bench_per_call(bundles):
+    failed = 0
+    start  = time()
+
+    for bundle in bundles:
+        try:
+            get_info_from_lv2_bundle(bundle)
+        except Exception:
+            failed += 1
+
+    return time() - start, failed
+
+def bench_pooled(bundles):
+    start     = time()
+    inspector = BundleInspector()
+    failed    = sum(1 for bundle, info, error in inspector.get_info_many(bundles) if error is not None)
+
+    return time() - start, failed
+
+if __name__ == '__main__':
+    if len(sys.argv) == 1:
+        print("usage %s /path/to/bundle-or-directory [...]" % sys.argv[0])
+        sys.exit(0)
+
+    bundles = find_bundles(sys.argv[1:])
+
+    if not bundles:
+        print("no bundles found")
+        sys.exit(1)
+
+    percall, failed1 = bench_per_call(bundles)
+    pooled,  failed2 = bench_pooled(bundles)
+
+    print("bundles:  %i (%i failed)" % (len(bundles), failed2))
+    print("per-call: %.3f s, %.2f ms/bundle" % (percall, percall*1000/len(bundles)))
+    print("pooled:   %.3f s, %.2f ms/bundle (%.1fx faster)" % (pooled, pooled*1000/len(bundles), percall/max(pooled, 1e-9)))
+
+    if failed1 != failed2:
+        print("WARNING: per-call and pooled results differ (%i vs %i failures)" % (failed1, failed2))
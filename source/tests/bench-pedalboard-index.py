@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Benchmark cold vs warm start of the pedalboard index
+#
+# usage: bench-pedalboard-index.py [--generate N] [/path/to/pedalboards]
+#
+# Without a path the benchmark runs on a temporary copy of N synthetic bundles (default 500).
+
+import os
+import shutil
+import sys
+import tempfile
+
+from time import time
+
+CWD = sys.path[0]
+
+if not CWD:
+    CWD = os.path.dirname(sys.argv[0])
+
+# make it work with cxfreeze
+if os.path.isfile(CWD):
+    CWD = os.path.dirname(CWD)
+
+sys.path = [os.path.join(CWD, ".."), os.path.join(CWD, "..", "modules", "mod-ui")] + sys.path
+
+from mod_pedalboards import PedalboardIndex
+
+# ------------------------------------------------------------------------------------------------------------
+
+MANIFEST_TTL = """\
+@prefix ingen: <http://drobilla.net/ns/ingen#> .
+@prefix lv2:   <http://lv2plug.in/ns/lv2core#> .
+@prefix pedal: <http://moddevices.com/ns/modpedal#> .
+@prefix rdfs:  <http://www.w3.org/2000/01/rdf-schema#> .
+
+<%(name)s.ttl>
+    lv2:prototype ingen:GraphPrototype ;
+    a lv2:Plugin ,
+        ingen:Graph ,
+        pedal:Pedalboard ;
+    rdfs:seeAlso <%(name)s.ttl> .
+"""
+
+PEDALBOARD_TTL = """\
+@prefix doap:  <http://usefulinc.com/ns/doap#> .
+@prefix ingen: <http://drobilla.net/ns/ingen#> .
+@prefix lv2:   <http://lv2plug.in/ns/lv2core#> .
+@prefix modgui: <http://moddevices.com/ns/modgui#> .
+@prefix pedal: <http://moddevices.com/ns/modpedal#> .
+
+%(blocks)s
+<>
+    doap:name "%(name)s" ;
+    modgui:thumbnail <thumbnail.png> ;
+    ingen:block %(blocklist)s ;
+    lv2:prototype ingen:GraphPrototype ;
+    a lv2:Plugin ,
+        ingen:Graph ,
+        pedal:Pedalboard .
+"""
+
+BLOCK_TTL = """\
+<block%(index)i>
+    lv2:prototype <http://example.org/plugins/plugin%(index)i> ;
+    a ingen:Block .
+"""
+
+def generateBundles(path, count):
+    for i in range(count):
+        name   = "pedalboard%05i" % i
+        bundle = os.path.join(path, name + ".pedalboard")
+        os.makedirs(bundle)
+
+        with open(os.path.join(bundle, "manifest.ttl"), 'w') as fh:
+            fh.write(MANIFEST_TTL % { 'name': name })
+
+        with open(os.path.join(bundle, name + ".ttl"), 'w') as fh:
+            fh.write(PEDALBOARD_TTL % {
+                'name':      name,
+                'blocks':    "\n".join(BLOCK_TTL % { 'index': j } for j in range(i % 8 + 1)),
+                'blocklist': " , ".join("<block%i>" % j for j in range(i % 8 + 1)),
+            })
+
+def touchBundles(path, count):
+    bundles = sorted(os.listdir(path))[:count]
+
+    for bundle in bundles:
+        manifest = os.path.join(path, bundle, "manifest.ttl")
+        with open(manifest, 'a') as fh:
+            fh.write("\n")
+
+    return len(bundles)
+
+def timeRefresh(indexFile, pedalboardsDir):
+    start = time()
+    index = PedalboardIndex(indexFile, [pedalboardsDir])
+    index.load()
+    pedalboards = index.refresh()
+    index.save()
+    return time() - start, len(pedalboards)
+
+# ------------------------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    count = 500
+    args  = sys.argv[1:]
+
+    if "--generate" in args:
+        i = args.index("--generate")
+        count = int(args[i+1])
+        args  = args[:i] + args[i+2:]
+
+    tmpdir = tempfile.mkdtemp(prefix="mod-bench-")
+
+    try:
+        if args:
+            pedalboardsDir = os.path.abspath(args[0])
+        else:
+            pedalboardsDir = os.path.join(tmpdir, "pedalboards")
+            os.makedirs(pedalboardsDir)
+            generateBundles(pedalboardsDir, count)
+
+        indexFile = os.path.join(tmpdir, "pedalboards-index.json")
+
+        cold, total = timeRefresh(indexFile, pedalboardsDir)
+        warm, _     = timeRefresh(indexFile, pedalboardsDir)
+
+        print("bundles:          %i" % total)
+        print("cold start:       %.3f s" % cold)
+        print("warm start:       %.3f s (%.1fx faster)" % (warm, cold/max(warm, 1e-9)))
+
+        if not args:
+            changed    = touchBundles(pedalboardsDir, max(1, count//100))
+            partial, _ = timeRefresh(indexFile, pedalboardsDir)
+            print("warm, %i changed: %.3f s" % (changed, partial))
+
+    finally:
+        shutil.rmtree(tmpdir)
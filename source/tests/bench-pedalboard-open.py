@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Benchmark the pedalboard open dialog with large libraries
+#
+# usage: bench-pedalboard-open.py [--sizes N,N,...] [--query TEXT]
+#
+# For each library size, measures how long the dialog takes to open (until it has been painted),
+# the latency of each keystroke while typing the query into the filter, and of clearing it again.
+# Uses the offscreen Qt platform and synthetic pedalboards, a few of them with real thumbnail files.
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+from time import perf_counter
+
+CWD = sys.path[0]
+
+if not CWD:
+    CWD = os.path.dirname(sys.argv[0])
+
+# make it work with cxfreeze
+if os.path.isfile(CWD):
+    CWD = os.path.dirname(CWD)
+
+sys.path = [os.path.join(CWD, "..")] + sys.path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import pyqtSignal, Qt
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication, QWidget
+
+from mod_pedalboards import PedalboardSearchIndex
+
+# ------------------------------------------------------------------------------------------------------------
+
+WORDS = ("clean", "crunch", "lead", "ambient", "reverb", "delay", "fuzz", "octave", "bass", "acoustic",
+         "shimmer", "tremolo", "phaser", "chorus", "looper", "vocal", "synth", "drive", "tape", "room")
+
+# Stands in for HostWindow, the dialog only needs the pedalboard list and its signal
+class FakeHost(QWidget):
+    pedalboardsChanged = pyqtSignal(int)
+
+    def __init__(self, pedalboards):
+        QWidget.__init__(self)
+        self.fPedalboards      = pedalboards
+        self.fPedalboardsState = 1
+        self.fPedalboardSearch = PedalboardSearchIndex()
+
+        for pedalboard in pedalboards:
+            self.fPedalboardSearch.update(pedalboard)
+
+def generatePedalboards(count, thumbDir, thumbCount):
+    rand  = random.Random(count)
+    thumbs = []
+
+    for i in range(thumbCount):
+        path  = os.path.join(thumbDir, "thumb%i.png" % i)
+        image = QImage(640, 320, QImage.Format_ARGB32)
+        image.fill(rand.randint(0, 0xffffff))
+        image.save(path)
+        thumbs.append(path)
+
+    pedalboards = []
+
+    for i in range(count):
+        title = " ".join(rand.choice(WORDS) for w in range(3)) + " %i" % i
+        pedalboards.append({
+            'bundle':    "/tmp/pedalboards/pedalboard%06i.pedalboard" % i,
+            'title':     title,
+            'thumbnail': thumbs[i % len(thumbs)] if thumbs and i < thumbCount*4 else "",
+            'author':    "",
+            'plugins':   [],
+        })
+
+    return pedalboards
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values)-1, int(len(values)*p))]
+
+# ------------------------------------------------------------------------------------------------------------
+
+def runSize(app, count, query, tmpDir):
+    from mod_pedalboard_open import PedalboardOpenWindow
+    from mod_thumbnails import ThumbnailService
+
+    thumbDir = os.path.join(tmpDir, "thumbs%i" % count)
+    os.makedirs(thumbDir)
+
+    host       = FakeHost(generatePedalboards(count, thumbDir, 32))
+    thumbnails = ThumbnailService(host, cacheDir=os.path.join(tmpDir, "cache%i" % count))
+
+    start  = perf_counter()
+    dialog = PedalboardOpenWindow(host, thumbnails)
+    dialog.show()
+    app.processEvents()
+    openTime = perf_counter() - start
+
+    keystrokes = []
+    for i in range(1, len(query)+1):
+        start = perf_counter()
+        dialog.ui.le_filter.setText(query[:i])
+        app.processEvents()
+        keystrokes.append(perf_counter() - start)
+
+    start = perf_counter()
+    dialog.ui.le_filter.setText("")
+    app.processEvents()
+    clearTime = perf_counter() - start
+
+    dialog.close()
+    thumbnails.stopWait()
+
+    print("%8i  open %7.1f ms  keystroke median %6.2f ms, p90 %6.2f ms, max %6.2f ms  clear %6.1f ms" % (
+          count, openTime*1000, percentile(keystrokes, 0.5)*1000, percentile(keystrokes, 0.9)*1000,
+          max(keystrokes)*1000, clearTime*1000))
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Measure pedalboard open dialog latency")
+    parser.add_argument("--sizes", default="100,1000,10000,50000")
+    parser.add_argument("--query", default="reverb delay")
+    args = parser.parse_args()
+
+    app    = QApplication(sys.argv)
+    tmpDir = tempfile.mkdtemp(prefix="mod-bench-open-")
+
+    try:
+        for count in (int(size) for size in args.sizes.split(",")):
+            runSize(app, count, args.query, tmpDir)
+    finally:
+        shutil.rmtree(tmpDir)
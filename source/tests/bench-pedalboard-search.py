@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Benchmark pedalboard search, inverted index vs linear scan
+#
+# usage: bench-pedalboard-search.py [--sizes N,N,...] [--repeat N]
+#
+# Generates synthetic pedalboards with realistic plugin URIs and labels, then runs a set of queries
+# (title words, plugin names, partial words, multiple terms) with PedalboardSearchIndex
+# and with a linear scan over the list of pedalboard dicts, and checks both give the same results.
+# The linear scan is timed as-is and with the searchable text of each pedalboard precomputed.
+
+import os
+import random
+import sys
+
+from time import perf_counter
+
+CWD = sys.path[0]
+
+if not CWD:
+    CWD = os.path.dirname(sys.argv[0])
+
+# make it work with cxfreeze
+if os.path.isfile(CWD):
+    CWD = os.path.dirname(CWD)
+
+sys.path = [os.path.join(CWD, "..")] + sys.path
+
+from mod_pedalboards import PedalboardSearchIndex, pedalboardSearchText, tokenizeSearchText
+
+# ------------------------------------------------------------------------------------------------------------
+
+WORDS = ("clean", "crunch", "lead", "ambient", "reverb", "delay", "fuzz", "octave", "bass", "acoustic",
+         "shimmer", "tremolo", "phaser", "chorus", "looper", "vocal", "synth", "drive", "tape", "room",
+         "plate", "spring", "wah", "flanger", "compressor", "gate", "eq", "cabinet", "amp", "tuner")
+
+URI_TEMPLATES = (
+    "http://guitarix.sourceforge.net/plugins/gx_%s_%i#_%s",
+    "http://calf.sourceforge.net/plugins/%s%i",
+    "http://moddevices.com/plugins/mod-devel/%s-%i",
+    "urn:dragonfly:%s%i",
+    "https://github.com/example/%s-%i",
+)
+
+QUERIES = ("reverb", "rev", "shimmer delay", "guitarix", "calf", "dragonfly plate", "gx", "zz",
+           "pedalboard01234", "nothing-matches", "tape drive room", "a")
+
+# Returns the pedalboards and the plugin labels (URI -> label)
+def generatePedalboards(count):
+    rand = random.Random(count)
+
+    plugins = []
+    for i in range(600):
+        word     = rand.choice(WORDS)
+        template = rand.choice(URI_TEMPLATES)
+        plugins.append(template % ((word, i, word) if template.count("%") == 3 else (word, i)))
+
+    labels      = dict((uri, uri.rsplit("/", 1)[-1].split("#")[0].title()) for uri in plugins)
+    pedalboards = []
+
+    for i in range(count):
+        uris = rand.sample(plugins, rand.randint(3, 12))
+        pedalboards.append({
+            'bundle':    "/home/user/.pedalboards/pedalboard%05i.pedalboard" % i,
+            'title':     " ".join(rand.choice(WORDS) for w in range(rand.randint(1, 3))).title(),
+            'author':    rand.choice(WORDS).title(),
+            'thumbnail': "",
+            'plugins':   uris,
+        })
+
+    return (pedalboards, labels)
+
+# Same matching rules as the index: every query term is part of some token
+def linearSearch(pedalboards, labels, query):
+    terms = tokenizeSearchText(query)
+    found = set()
+
+    for pedalboard in pedalboards:
+        text = " ".join(tokenizeSearchText(pedalboardSearchText(pedalboard, labels)))
+        if all(term in text for term in terms):
+            found.add(pedalboard['bundle'])
+
+    return found
+
+# Linear scan over precomputed text, the best a scan can do
+def linearSearchPrecomputed(texts, query):
+    terms = tokenizeSearchText(query)
+    return set(bundle for bundle, text in texts if all(term in text for term in terms))
+
+# ------------------------------------------------------------------------------------------------------------
+
+def runSize(count, repeat):
+    pedalboards, labels = generatePedalboards(count)
+
+    start = perf_counter()
+    index = PedalboardSearchIndex()
+    index.setPluginLabels(labels)
+    for pedalboard in pedalboards:
+        index.update(pedalboard)
+    buildTime = perf_counter() - start
+
+    # incremental update, as when the scanner reports a changed bundle
+    changed = dict(pedalboards[count//2], title="Changed Title")
+    start = perf_counter()
+    index.update(changed)
+    updateTime = perf_counter() - start
+    index.update(pedalboards[count//2])
+
+    texts = [(p['bundle'], " ".join(tokenizeSearchText(pedalboardSearchText(p, labels)))) for p in pedalboards]
+
+    print("%i pedalboards: build %.1f ms, single update %.3f ms, %i tokens, %i grams" % (
+          count, buildTime*1000, updateTime*1000, len(index.fPostings), len(index.fGrams)))
+
+    for query in QUERIES:
+        start = perf_counter()
+        for i in range(repeat):
+            result = index.search(query)
+        indexTime = (perf_counter() - start)/repeat
+
+        start    = perf_counter()
+        expected = linearSearch(pedalboards, labels, query)
+        linearTime = perf_counter() - start
+
+        start = perf_counter()
+        for i in range(repeat):
+            linearSearchPrecomputed(texts, query)
+        scanTime = (perf_counter() - start)/repeat
+
+        status = "" if result == expected else "  MISMATCH"
+
+        print("  %-18s %6i results  index %7.3f ms  linear %8.2f ms  precomputed %7.2f ms  (%.0fx)%s" % (
+              repr(query), len(result), indexTime*1000, linearTime*1000, scanTime*1000,
+              scanTime/max(indexTime, 1e-9), status))
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Compare pedalboard search index with a linear scan")
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--repeat", type=int, default=20, help="index queries are repeated this many times")
+    args = parser.parse_args()
+
+    for count in (int(size) for size in args.sizes.split(",")):
+        runSize(count, args.repeat)
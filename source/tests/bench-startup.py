@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Startup benchmark for mod-app
+#
+# usage: bench-startup.py [--runs N] [--restarts N] [--output FILE] [--timeout SECONDS] [--headless]
+#
+# Each run starts mod-app in a fresh process using the offscreen Qt platform and
+# tests/fake-mod-host.py as backend, and records when each startup phase is reached.
+# The median of all runs is appended to FILE (default: bench-startup.json) together
+# with the current git commit, and compared against the previous entry.
+# With --restarts, each run also restarts the backend N times once the UI is ready.
+# Restarts normally switch to a standby backend, cold restarts only happen as fallback.
+# The switch time is checked against RESTART_DOWNTIME_TARGET.
+# With --headless, mod-app runs without any window and the UI is considered ready once the webserver runs.
+# Results are compared against the previous entry of the same mode, peak memory is recorded as well.
+
+from time import time
+
+START = time()
+
+import json
+import os
+import resource
+import subprocess
+import sys
+
+CWD = sys.path[0]
+
+if not CWD:
+    CWD = os.path.dirname(sys.argv[0])
+
+# make it work with cxfreeze
+if os.path.isfile(CWD):
+    CWD = os.path.dirname(CWD)
+
+CWD        = os.path.abspath(CWD)
+SOURCE_DIR = os.path.abspath(os.path.join(CWD, ".."))
+FAKE_HOST  = os.path.join(CWD, "fake-mod-host.py")
+
+# Phases in the order they happen, times are seconds since the process started
+PHASES = (
+    "imports",              # mod_host and all its dependencies imported
+    "window",               # HostWindow() constructed
+    "backendStart",         # slot_backendStart called
+    "shown",                # window shown and the first event loop pass done (only that pass in headless mode)
+    "backendReady",         # "mod-host ready!" line received
+    "webServerRunning",     # slot_webServerRunning called
+    "webviewLoadFinished",  # slot_webviewLoadFinished called
+    "webviewPostFinished2", # slot_webviewPostFinished2 called, UI is usable
+    # these are durations since slot_backendRestart was called
+    "restartWebServerRunning", # cold restart, webserver running again
+    "restartReady",            # cold restart, UI is usable again
+    "restartSwitched",         # standby backend took over
+    "restartDowntime",         # time the session took to move, from connecting to the standby to it having the pedalboard
+)
+
+# Standby restarts should not keep the session away for longer than this (ms), the old backend plays meanwhile
+RESTART_DOWNTIME_TARGET = 50
+
+RESULT_PREFIX = "BENCH-RESULT:"
+
+# ------------------------------------------------------------------------------------------------------------
+# Child process, runs mod-app once
+
+def runChild(timeout, restarts, headless):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    # mod_common uses sys.path[0] to find custom modules
+    sys.path = [SOURCE_DIR] + sys.path
+    # separate instance, so settings and data don't touch the regular ones
+    sys.argv = [os.path.join(SOURCE_DIR, "mod-app"), "--instance", "benchmark"]
+
+    marks = {}
+    restartMarks = []
+
+    def mark(name):
+        if name not in marks:
+            marks[name] = time() - START
+
+    if headless:
+        import mod_headless as mod_module
+        from PyQt5.QtCore import QCoreApplication as QApplication
+    else:
+        import mod_host as mod_module
+        from PyQt5.QtWidgets import QApplication
+
+    from PyQt5.QtCore import QSettings, QTimer
+    mark("imports")
+
+    app = QApplication(sys.argv)
+    app.setApplicationName(mod_module.APP_NAME)
+    app.setOrganizationName("MOD")
+
+    # use the stand-in backend
+    QSettings().setValue(mod_module.MOD_KEY_HOST_PATH, FAKE_HOST)
+    QSettings().setValue(mod_module.MOD_KEY_HOST_VERBOSE, False)
+
+    class Restarter(object):
+        fRestartsLeft = restarts
+        fRestartStart = None
+
+        def markRestart(self, name):
+            if self.fRestartStart is not None:
+                restartMarks[-1][name] = time() - self.fRestartStart
+
+        def doRestart(self):
+            self.fRestartsLeft -= 1
+            self.fRestartStart = time()
+            restartMarks.append({})
+            self.fServer.restart()
+
+        # UI is ready
+        def ready(self):
+            self.markRestart("restartReady")
+
+            if self.fRestartsLeft > 0:
+                QTimer.singleShot(0, self.doRestart)
+            else:
+                QTimer.singleShot(0, self.finish)
+
+        def slot_benchWebServerRunning(self):
+            mark("webServerRunning")
+            self.markRestart("restartWebServerRunning")
+
+        def slot_benchBackendSwitched(self, elapsed):
+            self.markRestart("restartSwitched")
+            restartMarks[-1]["restartDowntime"] = elapsed
+            self.ready()
+
+        def connectServer(self):
+            self.fServer.backendReady.connect(lambda: mark("backendReady"))
+            self.fServer.webServerRunning.connect(self.slot_benchWebServerRunning)
+            self.fServer.backendSwitched.connect(self.slot_benchBackendSwitched)
+
+    if headless:
+        class BenchHost(Restarter, mod_module.HeadlessHost):
+            def start(self):
+                mark("backendStart")
+                mod_module.HeadlessHost.start(self)
+
+            def slot_webServerRunning(self):
+                mod_module.HeadlessHost.slot_webServerRunning(self)
+                # there is no UI to load, the webserver is all we wait for
+                mark("webviewPostFinished2")
+                self.ready()
+
+            def finish(self):
+                self.quit(0)
+
+    else:
+        class BenchHost(Restarter, mod_module.HostWindow):
+            def slot_backendStart(self):
+                mark("backendStart")
+                mod_module.HostWindow.slot_backendStart(self)
+
+            def slot_webviewLoadFinished(self, ok):
+                mark("webviewLoadFinished")
+                if not ok:
+                    marks["error"] = "webview failed to load"
+                mod_module.HostWindow.slot_webviewLoadFinished(self, ok)
+
+            def slot_webviewPostFinished2(self):
+                mod_module.HostWindow.slot_webviewPostFinished2(self)
+                mark("webviewPostFinished2")
+                self.ready()
+
+            def finish(self):
+                self.close()
+
+    def slot_timeout():
+        marks["error"] = "timed out"
+        host.finish()
+
+    host = BenchHost()
+    host.connectServer()
+    mark("window")
+
+    if headless:
+        QTimer.singleShot(0, host.start)
+    else:
+        host.show()
+
+    QTimer.singleShot(0, lambda: mark("shown"))
+
+    QTimer.singleShot(int(timeout*1000*(restarts+1)), slot_timeout)
+    app.exec_()
+
+    for name in PHASES[PHASES.index("restartWebServerRunning"):]:
+        values = [r[name] for r in restartMarks if name in r]
+        if values:
+            marks[name] = median(values)
+
+    # peak memory in MB, ru_maxrss is in KB on Linux
+    marks["maxRSS"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+    print(RESULT_PREFIX + json.dumps(marks), flush=True)
+
+# ------------------------------------------------------------------------------------------------------------
+# Parent process, runs the children and stores results
+
+def gitCommit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=SOURCE_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def runOnce(timeout, restarts, headless):
+    args = [sys.executable, os.path.join(CWD, "bench-startup.py"), "--child",
+            "--timeout", str(timeout), "--restarts", str(restarts)]
+
+    if headless:
+        args.append("--headless")
+
+    proc = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=timeout*(restarts+1)+30)
+
+    for line in reversed(proc.stdout.decode("utf-8", errors="ignore").splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+
+    return { 'error': "no result, exit code %i" % proc.returncode }
+
+def median(values):
+    values = sorted(values)
+    middle = len(values)//2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle-1] + values[middle]) / 2
+
+def runParent(runs, restarts, output, timeout, headless):
+    mode    = "headless" if headless else "gui"
+    results = []
+
+    for i in range(runs):
+        result = runOnce(timeout, restarts, headless)
+
+        if "error" in result:
+            print("run %i failed: %s" % (i+1, result["error"]))
+            continue
+
+        results.append(result)
+        print("run %i: %.3f s" % (i+1, result.get("webviewPostFinished2", 0.0)))
+
+    if not results:
+        return False
+
+    record = {
+        'commit': gitCommit(),
+        'date':   int(time()),
+        'mode':   mode,
+        'runs':   len(results),
+        'maxRSS': median([r['maxRSS'] for r in results]),
+        'phases': dict((phase, median([r[phase] for r in results if phase in r]))
+                       for phase in PHASES if any(phase in r for r in results)),
+    }
+
+    try:
+        with open(output, 'r') as fh:
+            history = json.load(fh)
+    except (OSError, ValueError):
+        history = []
+
+    # entries from before modes existed are all gui
+    sameMode = [entry for entry in history if entry.get('mode', "gui") == mode]
+    previous = sameMode[-1] if sameMode else None
+
+    print()
+    print("%-22s %10s %10s %10s" % ("phase", "ms", "prev ms", "delta"))
+
+    for phase in PHASES:
+        if phase not in record['phases']:
+            continue
+
+        value = record['phases'][phase]*1000
+
+        if previous is not None and phase in previous['phases']:
+            prev = previous['phases'][phase]*1000
+            print("%-22s %10.1f %10.1f %+10.1f" % (phase, value, prev, value-prev))
+        else:
+            print("%-22s %10.1f %10s %10s" % (phase, value, "-", "-"))
+
+    if previous is not None and 'maxRSS' in previous:
+        print("%-22s %10.1f %10.1f %+10.1f" % ("peak memory (MB)", record['maxRSS'], previous['maxRSS'],
+                                               record['maxRSS']-previous['maxRSS']))
+    else:
+        print("%-22s %10.1f %10s %10s" % ("peak memory (MB)", record['maxRSS'], "-", "-"))
+
+    if "restartDowntime" in record['phases']:
+        downtime = record['phases']["restartDowntime"]*1000
+        print("\nrestart downtime %.1f ms, %s the %i ms target" % (
+              downtime, "within" if downtime <= RESTART_DOWNTIME_TARGET else "OVER", RESTART_DOWNTIME_TARGET))
+
+    if previous is not None:
+        print("\ncompared against commit %s (%s mode)" % (previous['commit'], mode))
+
+    history.append(record)
+
+    with open(output, 'w') as fh:
+        json.dump(history, fh, indent=2)
+
+    return True
+
+# ------------------------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser, SUPPRESS
+
+    parser = ArgumentParser(description="Measure mod-app startup phases")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--restarts", type=int, default=0)
+    parser.add_argument("--output", default="bench-startup.json")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--child", action="store_true", help=SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        runChild(args.timeout, args.restarts, args.headless)
+    else:
+        sys.exit(0 if runParent(args.runs, args.restarts, args.output, args.timeout, args.headless) else 1)
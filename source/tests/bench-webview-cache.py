@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Benchmark webview reloads with and without the web disk cache
+#
+# usage: bench-webview-cache.py [--html DIR] [--generate N] [--runs N]
+#
+# Serves DIR (default: synthetic mod-ui-like files, N assets) over HTTP and loads its index.html
+# into a QWebPage using the offscreen Qt platform. Each load uses a new server on a new port,
+# like a new mod-app launch does. Loads are timed without cache, with an empty cache (cold)
+# and with the cache filled by the previous load (warm), counting the full (200) and
+# revalidated (304) responses and the bytes the server sent.
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from time import perf_counter
+
+CWD = sys.path[0]
+
+if not CWD:
+    CWD = os.path.dirname(sys.argv[0])
+
+# make it work with cxfreeze
+if os.path.isfile(CWD):
+    CWD = os.path.dirname(CWD)
+
+sys.path = [os.path.join(CWD, "..")] + sys.path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QEventLoop, QTimer, QUrl
+from PyQt5.QtNetwork import QNetworkAccessManager
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWebKitWidgets import QWebPage
+
+from mod_webcache import WebDiskCache
+
+# ------------------------------------------------------------------------------------------------------------
+# Server side
+
+class ServerStats(object):
+    def __init__(self):
+        self.lock   = threading.Lock()
+        self.full   = 0
+        self.notMod = 0
+        self.bytes  = 0
+
+class RequestHandler(SimpleHTTPRequestHandler):
+    stats = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_response(self, code, message=None):
+        with self.stats.lock:
+            if code == 304:
+                self.stats.notMod += 1
+            elif code == 200:
+                self.stats.full += 1
+        SimpleHTTPRequestHandler.send_response(self, code, message)
+
+    def copyfile(self, source, outputfile):
+        data = source.read()
+        with self.stats.lock:
+            self.stats.bytes += len(data)
+        outputfile.write(data)
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+def startServer(htmlDir, stats):
+    handler = type("Handler", (RequestHandler,), { 'stats': stats })
+    server  = ThreadingServer(("127.0.0.1", 0), lambda *args: handler(*args, directory=htmlDir))
+    thread  = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+# ------------------------------------------------------------------------------------------------------------
+# Synthetic mod-ui, an index.html with scripts, stylesheets and images
+
+def generateHtml(path, count):
+    rand = random.Random(count)
+    tags = []
+
+    for i in range(count):
+        kind = i % 3
+        size = rand.randint(2, 200)*1024
+
+        if kind == 0:
+            name = "js/script%i.js" % i
+            tags.append('<script src="%s"></script>' % name)
+            data = ("var x%i = '%s';\n" % (i, "x"*64)) * (size//80)
+        elif kind == 1:
+            name = "css/style%i.css" % i
+            tags.append('<link rel="stylesheet" href="%s">' % name)
+            data = (".c%i { color: #123456; }\n" % i) * (size//24)
+        else:
+            name = "img/image%i.svg" % i
+            tags.append('<img src="%s">' % name)
+            data = '<svg xmlns="http://www.w3.org/2000/svg">%s</svg>' % (("<!-- %s -->" % ("x"*64)) * (size//72))
+
+        os.makedirs(os.path.dirname(os.path.join(path, name)), exist_ok=True)
+        with open(os.path.join(path, name), 'w') as fh:
+            fh.write(data)
+
+    with open(os.path.join(path, "index.html"), 'w') as fh:
+        fh.write("<html><head>%s</head><body></body></html>" % "\n".join(tags))
+
+# ------------------------------------------------------------------------------------------------------------
+
+def loadOnce(app, htmlDir, manager, cache=None):
+    stats  = ServerStats()
+    server = startServer(htmlDir, stats)
+    origin = "http://127.0.0.1:%i" % server.server_address[1]
+    url    = QUrl(origin + "/index.html")
+
+    # the new port is registered before loading, like mod-app does with its own
+    if cache is not None:
+        cache.addOrigin(QUrl(origin), "mod-ui")
+
+    page = QWebPage()
+    page.setNetworkAccessManager(manager)
+
+    loop = QEventLoop()
+    page.loadFinished.connect(loop.quit)
+    QTimer.singleShot(60000, loop.quit)
+
+    start = perf_counter()
+    page.mainFrame().load(url)
+    loop.exec_()
+    elapsed = perf_counter() - start
+
+    # keep webkit's memory cache from hiding the disk cache on the next load
+    page.settings().clearMemoryCaches()
+    page.deleteLater()
+    app.processEvents()
+
+    server.shutdown()
+    server.server_close()
+
+    return elapsed, stats
+
+def printLoad(label, elapsed, stats, cache=None):
+    line = "%-8s %8.1f ms  %4i full  %4i revalidated  %8.1f KiB sent" % (
+           label, elapsed*1000, stats.full, stats.notMod, stats.bytes/1024.0)
+
+    if cache is not None:
+        cacheStats = cache.stats()
+        line += "  cache %i hits, %.1f KiB stored" % (cacheStats['hits'], cacheStats['bytes']/1024.0)
+
+    print(line)
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Measure webview reload time with and without the disk cache")
+    parser.add_argument("--html", help="directory to serve, like MOD_HTML_DIR")
+    parser.add_argument("--generate", type=int, default=150, help="assets in the synthetic html dir")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    app    = QApplication(sys.argv)
+    tmpDir = tempfile.mkdtemp(prefix="mod-bench-webcache-")
+
+    try:
+        htmlDir = args.html
+
+        if htmlDir is None:
+            htmlDir = os.path.join(tmpDir, "html")
+            generateHtml(htmlDir, args.generate)
+
+        for run in range(args.runs):
+            print("run %i:" % (run+1))
+
+            elapsed, stats = loadOnce(app, htmlDir, QNetworkAccessManager())
+            printLoad("nocache", elapsed, stats)
+
+            # the cache dir outlives the manager, like it does across mod-app launches
+            cacheDir = os.path.join(tmpDir, "cache%i" % run)
+
+            for label in ("cold", "warm"):
+                manager = QNetworkAccessManager()
+                cache   = WebDiskCache(None, cacheDir)
+                cache.install(manager)
+
+                elapsed, stats = loadOnce(app, htmlDir, manager, cache)
+                printLoad(label, elapsed, stats, cache)
+
+                manager.deleteLater()
+                app.processEvents()
+    finally:
+        shutil.rmtree(tmpDir)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Import-time budget check for mod-app
+#
+# usage: check-import-time.py [--runs N] [--budget MODULE=MS ...] [--shown-budget MS] [--top N]
+#
+# Imports each entry module in a fresh process with "python -X importtime" and takes the median
+# cumulative time of all runs. Fails if a module is over its budget, or if it imports something
+# that is meant to be loaded on first use only (dialogs, the webserver, WebKit for headless mode).
+# The heaviest imports are listed so a regression can be traced to the module that caused it.
+#
+# Deferring imports from module level into the window constructor would not show up above,
+# so the time up to the main window being shown is checked as well, using bench-startup.py runs.
+# Use --shown-budget 0 to skip that part (it needs Qt's offscreen platform).
+
+import os
+import subprocess
+import sys
+
+CWD = sys.path[0]
+
+if not CWD:
+    CWD = os.path.dirname(sys.argv[0])
+
+CWD        = os.path.abspath(CWD)
+SOURCE_DIR = os.path.abspath(os.path.join(CWD, ".."))
+
+# Entry modules, with their budget in ms and the modules they must not import
+BUDGETS = {
+    'mod_host': (1500, (
+        "mod_settings",
+        "ui_mod_settings",
+        "mod_backendlog",
+        "mod.webserver",
+        "modtools.utils",
+        "mod_thumbnails",
+        "mod_pedalboard_open",
+        "mod_inprocess",
+    )),
+    'mod_headless': (1000, (
+        "PyQt4.QtGui",
+        "PyQt5.QtWidgets",
+        "PyQt5.QtWebKit",
+        "PyQt5.QtWebKitWidgets",
+        "mod.webserver",
+        "mod_host",
+    )),
+}
+
+# Time from process start up to the main window being shown, in ms
+SHOWN_BUDGET = 2500
+
+# ------------------------------------------------------------------------------------------------------------
+
+# Parse "-X importtime" output, returns a list of (depth, self, cumulative, name), times in ms
+def parseImportTime(output):
+    imports = []
+
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        fields = line[len("import time:"):].split("|")
+
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+
+        name  = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+
+        imports.append((depth, int(fields[0])/1000.0, int(fields[1])/1000.0, name.strip()))
+
+    return imports
+
+def importOnce(module):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import %s" % module],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, cwd=SOURCE_DIR,
+                          universal_newlines=True)
+
+    if proc.returncode != 0:
+        print(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "exit code %i" % proc.returncode)
+        return None
+
+    return parseImportTime(proc.stderr)
+
+def median(values):
+    values = sorted(values)
+    return values[len(values)//2]
+
+# ------------------------------------------------------------------------------------------------------------
+
+def checkModule(module, budget, lazyModules, runs, top):
+    totals  = []
+    imports = None
+
+    for i in range(runs):
+        imports = importOnce(module)
+
+        if imports is None:
+            print("%s: import failed" % module)
+            return False
+
+        totals.append(sum(cumulative for depth, own, cumulative, name in imports if name == module and depth == 0))
+
+    total = median(totals)
+    ok    = total <= budget
+
+    print("%-14s %8.1f ms  (budget %i ms)%s" % (module, total, budget, "" if ok else "  OVER BUDGET"))
+
+    names = set(name for depth, own, cumulative, name in imports)
+
+    for name in lazyModules:
+        if name in names:
+            print("  %s is imported eagerly" % name)
+            ok = False
+
+    # heaviest by own time, from the last run
+    for depth, own, cumulative, name in sorted(imports, key=lambda i: i[1], reverse=True)[:top]:
+        print("  %8.1f ms  %s" % (own, name))
+
+    return ok
+
+# Runs bench-startup.py children, their "shown" mark is taken from a fresh process start as well
+def checkShown(budget, runs):
+    from importlib.util import module_from_spec, spec_from_file_location
+
+    spec  = spec_from_file_location("bench_startup", os.path.join(CWD, "bench-startup.py"))
+    bench = module_from_spec(spec)
+    spec.loader.exec_module(bench)
+
+    totals = []
+
+    for i in range(runs):
+        result = bench.runOnce(60.0, 0, False)
+
+        if "shown" not in result:
+            print("window shown: run failed: %s" % result.get("error", "no mark"))
+            return False
+
+        totals.append(result["shown"]*1000)
+
+    total = median(totals)
+    ok    = total <= budget
+
+    print("%-14s %8.1f ms  (budget %i ms)%s" % ("window shown", total, budget, "" if ok else "  OVER BUDGET"))
+    return ok
+
+# ------------------------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Check mod-app import times against a budget")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of heaviest imports to list")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS")
+    parser.add_argument("--shown-budget", type=int, default=SHOWN_BUDGET, metavar="MS")
+    args = parser.parse_args()
+
+    budgets = dict((module, budget) for module, (budget, lazyModules) in BUDGETS.items())
+
+    for arg in args.budget:
+        module, budget = arg.split("=", 1)
+        budgets[module] = int(budget)
+
+    ok = True
+    for module in sorted(budgets):
+        lazyModules = BUDGETS[module][1] if module in BUDGETS else ()
+        ok = checkModule(module, budgets[module], lazyModules, args.runs, args.top) and ok
+
+    if args.shown_budget > 0:
+        ok = checkShown(args.shown_budget, args.runs) and ok
+
+    sys.exit(0 if ok else 1)
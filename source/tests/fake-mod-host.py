@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Stand-in for mod-host, used for benchmarks and testing without audio hardware
+#
+# usage: fake-mod-host.py -p PORT -f FEEDBACK_PORT [-v|-n] [--delay SECONDS]
+#
+# Listens on both ports like mod-host does, answers "resp 0" to every command
+# and prints "mod-host ready!" once the sockets are ready.
+
+import selectors
+import signal
+import socket
+import sys
+import time
+
+def parse_args(argv):
+    args = { 'port': 5555, 'feedback': 5556, 'verbose': False, 'delay': 0.0 }
+
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "-p":
+            i += 1
+            args['port'] = int(argv[i])
+        elif arg == "-f":
+            i += 1
+            args['feedback'] = int(argv[i])
+        elif arg == "-v":
+            args['verbose'] = True
+        elif arg == "--delay":
+            i += 1
+            args['delay'] = float(argv[i])
+        i += 1
+
+    return args
+
+def listen(port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", port))
+    sock.listen(4)
+    sock.setblocking(False)
+    return sock
+
+def main():
+    args = parse_args(sys.argv)
+
+    signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+
+    # simulate the time mod-host takes to start jack clients and such
+    if args['delay'] > 0:
+        time.sleep(args['delay'])
+
+    selector = selectors.DefaultSelector()
+    selector.register(listen(args['port']),     selectors.EVENT_READ, "accept")
+    selector.register(listen(args['feedback']), selectors.EVENT_READ, "accept-feedback")
+
+    print("mod-host ready!", flush=True)
+
+    buffers = {}
+
+    while True:
+        for key, mask in selector.select():
+            sock = key.fileobj
+
+            if key.data in ("accept", "accept-feedback"):
+                conn, addr = sock.accept()
+                conn.setblocking(False)
+                selector.register(conn, selectors.EVENT_READ, "client" if key.data == "accept" else "feedback")
+                buffers[conn] = b""
+                continue
+
+            data = sock.recv(4096)
+
+            if not data:
+                selector.unregister(sock)
+                buffers.pop(sock, None)
+                sock.close()
+                continue
+
+            if key.data == "feedback":
+                continue
+
+            buffers[sock] += data
+
+            while b"\0" in buffers[sock]:
+                msg, buffers[sock] = buffers[sock].split(b"\0", 1)
+                if args['verbose']:
+                    print("received command:", msg.decode("utf-8", errors="ignore"), flush=True)
+                sock.sendall(b"resp 0\0")
+
+if __name__ == '__main__':
+    main()
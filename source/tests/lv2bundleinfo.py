@@ -3,116 +3,341 @@
 
 # Simple script to get information from an lv2 bundle
 
-import os, lilv
+import os, re, lilv
 
-# Get info from an lv2 bundle
-# @a bundle is a string, consisting of a directory in the filesystem (absolute pathname).
-def get_info_from_lv2_bundle(bundle):
-    # lilv wants the last character as the separator
-    if not bundle.endswith(os.sep):
-        bundle += os.sep
+# Exception raised when a bundle is not a valid pedalboard
+class BundleInfoError(Exception):
+    pass
+
+# Subjects in a manifest (<uri> at the start of a statement), the pedalboard plugin is one of them
+MANIFEST_SUBJECT_RE = re.compile(r'^<([^>]*)>', re.MULTILINE)
+
+# handy class to get lilv nodes from. copied from lv2.py in mod-ui
+class NS(object):
+    def __init__(self, world, base):
+        self.world = world
+        self.base = base
+        self._cache = {}
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        if attr not in self._cache:
+            self._cache[attr] = lilv.Node(self.world.new_uri(self.base+attr))
+        return self._cache[attr]
+
+# Inspector for many lv2 bundles
+# Keeps a single warmed-up lilv world and its URI nodes around, bundles are loaded and unloaded on demand.
+# Plugin labels are only known if @a load_plugins is set, which loads all installed plugins once (slow).
+class BundleInspector(object):
+    def __init__(self, load_plugins=False):
+        self.world = lilv.World()
+
+        if load_plugins:
+            self.world.load_all()
+
+        # this is needed when loading specific bundles instead of load_all
+        # (these functions are not exposed via World yet)
+        lilv.lilv_world_load_specifications(self.world.me)
+        lilv.lilv_world_load_plugin_classes(self.world.me)
+
+        # define the needed stuff
+        NS_lv2core = NS(self.world, 'http://lv2plug.in/ns/lv2core#')
+        NS_modgui  = NS(self.world, 'http://moddevices.com/ns/modgui#')
+        NS_ingen   = NS(self.world, 'http://drobilla.net/ns/ingen#')
+        NS_mod     = NS(self.world, 'http://moddevices.com/ns/mod#')
+        NS_doap    = NS(self.world, 'http://usefulinc.com/ns/doap#')
+
+        self.lv2core_proto   = NS_lv2core.prototype
+        self.modgui_thumb    = NS_modgui.thumbnail
+        self.ingen_block     = NS_ingen.block
+        self.ingen_prototype = NS_ingen.prototype
+        self.mod_label       = NS_mod.label
+        self.doap_name       = NS_doap.name
+
+        # plugin URI -> label
+        self.labels = {}
+
+    # Get info from an lv2 bundle
+    # @a bundle is a string, consisting of a directory in the filesystem (absolute pathname).
+    def get_info(self, bundle):
+        # lilv wants the last character as the separator
+        if not bundle.endswith(os.sep):
+            bundle += os.sep
+
+        # convert bundle string into a lilv node
+        bundlenode = lilv.lilv_new_file_uri(self.world.me, None, bundle)
 
-    # Create our own unique lilv world
-    # We'll load a single bundle and get all plugins from it
-    world = lilv.World()
+        # load the bundle
+        self.world.load_bundle(bundlenode)
 
-    # this is needed when loading specific bundles instead of load_all
-    # (these functions are not exposed via World yet)
-    lilv.lilv_world_load_specifications(world.me)
-    lilv.lilv_world_load_plugin_classes(world.me)
+        try:
+            return self._get_info_from_loaded_bundle(bundle, lilv.lilv_node_as_uri(bundlenode))
 
-    # convert bundle string into a lilv node
-    bundlenode = lilv.lilv_new_file_uri(world.me, None, bundle)
+        finally:
+            # unload the bundle so the world doesn't keep growing
+            # (old lilv versions can't do this, plugins are filtered by bundle anyway)
+            if hasattr(lilv, "lilv_world_unload_bundle"):
+                lilv.lilv_world_unload_bundle(self.world.me, bundlenode)
 
-    # load the bundle
-    world.load_bundle(bundlenode)
+            # free bundlenode, no longer needed
+            lilv.lilv_node_free(bundlenode)
 
-    # free bundlenode, no longer needed
-    lilv.lilv_node_free(bundlenode)
+    # Get info from many lv2 bundles
+    # Yields (bundle, info, error) tuples, a failing bundle does not stop the others.
+    def get_info_many(self, bundles):
+        for bundle in bundles:
+            try:
+                yield (bundle, self.get_info(bundle), None)
+            except Exception as e:
+                yield (bundle, None, str(e))
 
-    # get all plugins in the bundle
-    plugins = world.get_all_plugins()
+    # Find the plugins in a loaded bundle, looked up by the subjects of its manifest.
+    # Going through all plugins is only needed if none of those is a plugin of the bundle.
+    def _get_bundle_plugins(self, bundle, bundleuri):
+        allplugins = self.world.get_all_plugins()
+        plugins    = []
 
-    # make sure the bundle includes 1 and only 1 plugin (the pedalboard)
-    if plugins.size() != 1:
-        raise Exception('get_info_from_lv2_bundle(%s) - bundle has 0 or > 1 plugin'.format(bundle))
+        try:
+            with open(os.path.join(bundle, "manifest.ttl"), 'r', encoding="utf-8", errors="ignore") as fh:
+                subjects = MANIFEST_SUBJECT_RE.findall(fh.read())
+        except OSError:
+            subjects = []
 
-    # no indexing in python-lilv yet, just get the first item
-    plugin = None
-    for p in plugins:
-        plugin = p
-        break
+        # relative subjects are relative to the bundle, each one is only looked up once
+        subjects = [subject if ":" in subject else bundleuri + subject for subject in subjects]
 
-    if plugin is None:
-        raise Exception('get_info_from_lv2_bundle(%s) - failed to get plugin, you are using an old lilv!'.format(bundle))
+        for subject in sorted(set(subjects), key=subjects.index):
+            urinode = lilv.lilv_new_uri(self.world.me, subject)
+            plugin  = allplugins.get_by_uri(urinode)
+            lilv.lilv_node_free(urinode)
 
-    # handy class to get lilv nodes from. copied from lv2.py in mod-ui
-    class NS(object):
-        def __init__(self, base):
-            self.base = base
-            self._cache = {}
+            if plugin.me is not None and plugin.get_bundle_uri().as_string() == bundleuri:
+                plugins.append(plugin)
 
-        def __getattr__(self, attr):
-            if attr not in self._cache:
-                self._cache[attr] = lilv.Node(world.new_uri(self.base+attr))
-            return self._cache[attr]
+        if plugins:
+            return plugins
 
-    # define the needed stuff
-    NS_lv2core       = NS('http://lv2plug.in/ns/lv2core#')
-    NS_lv2core_proto = NS_lv2core.prototype
+        return [p for p in allplugins if p.get_bundle_uri().as_string() == bundleuri]
 
-    NS_modgui       = NS('http://moddevices.com/ns/modgui#')
-    NS_modgui_thumb = NS_modgui.thumbnail
+    def _get_info_from_loaded_bundle(self, bundle, bundleuri):
+        world = self.world
 
-    NS_ingen           = NS('http://drobilla.net/ns/ingen#')
-    NS_ingen_block     = NS_ingen.block
-    NS_ingen_prototype = NS_ingen.prototype
+        # get all plugins in the bundle (the world might have others loaded)
+        plugins = self._get_bundle_plugins(bundle, bundleuri)
 
-    # check if the plugin has modgui:thumnail, if not it's probably not a real pedalboard
-    thumbnail_check = plugin.get_value(NS_modgui_thumb).get_first()
+        # make sure the bundle includes 1 and only 1 plugin (the pedalboard)
+        if len(plugins) != 1:
+            raise BundleInfoError('get_info_from_lv2_bundle(%s) - bundle has 0 or > 1 plugin' % bundle)
 
-    if thumbnail_check.me is None:
-        raise Exception('get_info_from_lv2_bundle(%s) - plugin has no modgui:thumbnail'.format(bundle))
+        plugin = plugins[0]
 
-    # let's get all the info now
-    ingenplugins = []
+        # check if the plugin has modgui:thumnail, if not it's probably not a real pedalboard
+        thumbnail_check = plugin.get_value(self.modgui_thumb).get_first()
 
-    info = {
-        'name':      plugin.get_name().as_string(),
-        #'author':    plugin.get_author_name().as_string() or '', # Might be empty
-        #'uri':       plugin.get_uri().as_string(),
-        'thumbnail': os.path.basename(thumbnail_check.as_string()),
-        'plugins':   [] # we save this info later
-    }
+        if thumbnail_check.me is None:
+            raise BundleInfoError('get_info_from_lv2_bundle(%s) - plugin has no modgui:thumbnail' % bundle)
 
-    blocks = plugin.get_value(NS_ingen_block)
+        # let's get all the info now
+        ingenplugins = []
+        author       = plugin.get_author_name()
 
-    it = blocks.begin()
-    while not blocks.is_end(it):
-        block = blocks.get(it)
-        it    = blocks.next(it)
+        info = {
+            'name':      plugin.get_name().as_string(),
+            'author':    author.as_string() if author.me is not None else '', # Might be empty
+            #'uri':       plugin.get_uri().as_string(),
+            'thumbnail': os.path.basename(thumbnail_check.as_string()),
+            'plugins':   [], # we save this info later
+            'labels':    [], # same order as plugins
+        }
 
-        if block.me is None:
-            continue
+        blocks = plugin.get_value(self.ingen_block)
 
-        protouri1 = lilv.lilv_world_get(world.me, block.me, NS_lv2core_proto.me, None)
-        protouri2 = lilv.lilv_world_get(world.me, block.me, NS_ingen_prototype.me, None)
+        it = blocks.begin()
+        while not blocks.is_end(it):
+            block = blocks.get(it)
+            it    = blocks.next(it)
 
-        if protouri1 is not None:
-            ingenplugins.append(lilv.lilv_node_as_uri(protouri1))
-        elif protouri2 is not None:
-            ingenplugins.append(lilv.lilv_node_as_uri(protouri2))
+            if block.me is None:
+                continue
 
-    info['plugins'] = ingenplugins
+            protouri1 = lilv.lilv_world_get(world.me, block.me, self.lv2core_proto.me, None)
+            protouri2 = lilv.lilv_world_get(world.me, block.me, self.ingen_prototype.me, None)
 
-    return info
+            if protouri1 is not None:
+                ingenplugins.append(lilv.lilv_node_as_uri(protouri1))
+            elif protouri2 is not None:
+                ingenplugins.append(lilv.lilv_node_as_uri(protouri2))
+
+            # lilv_world_get returns new nodes, the world is reused so they must not pile up
+            for protouri in (protouri1, protouri2):
+                if protouri is not None:
+                    lilv.lilv_node_free(protouri)
+
+        info['plugins'] = ingenplugins
+        info['labels']  = [self._get_plugin_label(uri) for uri in ingenplugins]
+
+        return info
+
+    # Get the label of an installed plugin (mod:label, or its name), empty if the plugin is unknown
+    def _get_plugin_label(self, uri):
+        label = self.labels.get(uri)
+
+        if label is not None:
+            return label
+
+        label   = ""
+        urinode = lilv.lilv_new_uri(self.world.me, uri)
+
+        for predicate in (self.mod_label, self.doap_name):
+            value = lilv.lilv_world_get(self.world.me, urinode, predicate.me, None)
+
+            if value is not None:
+                label = lilv.lilv_node_as_string(value)
+                lilv.lilv_node_free(value)
+                break
+
+        lilv.lilv_node_free(urinode)
+
+        self.labels[uri] = label
+        return label
+
+# Get info from an lv2 bundle
+# @a bundle is a string, consisting of a directory in the filesystem (absolute pathname).
+# This creates a new lilv world on each call, use BundleInspector for many bundles.
+def get_info_from_lv2_bundle(bundle, load_plugins=False):
+    return BundleInspector(load_plugins).get_info(bundle)
+
+# Find all lv2 bundles (directories with a manifest.ttl) in @a path, recursively
+def find_lv2_bundles(path):
+    for root, dirs, files in os.walk(path):
+        if "manifest.ttl" in files:
+            # bundles don't nest
+            dirs[:] = []
+            yield root
+        else:
+            dirs.sort()
+
+# Worker side of the multi-process mode, each worker process gets its own inspector (and lilv world)
+_worker_inspector = None
+
+def _worker_init(load_plugins):
+    global _worker_inspector
+    _worker_inspector = BundleInspector(load_plugins)
+
+def _worker_get_info(bundle):
+    try:
+        return (bundle, _worker_inspector.get_info(bundle), None)
+    except Exception as e:
+        return (bundle, None, "%s: %s" % (type(e).__name__, e))
+
+# Inspect the bundles in @a paths using @a jobs processes, or all bundles found inside them if @a recursive
+# With @a load_plugins, each worker loads the installed plugins first, so plugin labels are known.
+# Results are written to @a output as JSON Lines in completion order, throughput is reported to stderr.
+# A worker crashing takes down the bundles it had in flight, those are tried again one at a time,
+# so only the bundle that really crashes a worker is reported as failed.
+def inspect_lv2_bundles(paths, jobs, output, recursive=True, load_plugins=False):
+    import json, sys
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from concurrent.futures.process import BrokenProcessPool
+    from itertools import chain
+    from time import time
+
+    if recursive:
+        bundles = chain.from_iterable(find_lv2_bundles(os.path.abspath(path)) for path in paths)
+    else:
+        bundles = (os.path.abspath(path) for path in paths)
+
+    count   = 0
+    failed  = 0
+    start   = time()
+    pending = {} # future -> (bundle, retrying)
+    retries = []
+
+    executor = ProcessPoolExecutor(jobs, initializer=_worker_init, initargs=(load_plugins,))
+
+    try:
+        while True:
+            if retries:
+                # one at a time, so a crash can be blamed on the right bundle
+                if not pending:
+                    bundle = retries.pop(0)
+                    pending[executor.submit(_worker_get_info, bundle)] = (bundle, True)
+            else:
+                # a few bundles in flight per worker, without listing them all first
+                while len(pending) < jobs*4:
+                    bundle = next(bundles, None)
+                    if bundle is None:
+                        break
+                    pending[executor.submit(_worker_get_info, bundle)] = (bundle, False)
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            broken = False
+
+            for future in done:
+                bundle, retrying = pending.pop(future)
+
+                try:
+                    bundle, info, error = future.result()
+                except BrokenProcessPool:
+                    broken = True
+
+                    if not retrying:
+                        retries.append(bundle)
+                        continue
+
+                    info, error = None, "worker process crashed"
+
+                count += 1
+
+                if error is None:
+                    result = { 'bundle': bundle, 'info': info }
+                else:
+                    result = { 'bundle': bundle, 'error': error }
+                    failed += 1
+
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+
+            if broken:
+                # whatever was still in flight went down with the pool
+                retries.extend(bundle for bundle, retrying in pending.values())
+                pending = {}
+
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(jobs, initializer=_worker_init, initargs=(load_plugins,))
+    finally:
+        executor.shutdown(wait=False)
+
+    elapsed = time() - start
+    sys.stderr.write("%i bundles (%i failed) in %.2f s using %i processes, %.1f bundles/sec\n" % (
+                     count, failed, elapsed, jobs, count/elapsed if elapsed > 0 else 0.0))
+
+    return failed == 0
 
 # Test via command line
 if __name__ == '__main__':
     import sys
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Get information from lv2 bundles")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="look for bundles inside the given directories, results are printed as JSON Lines")
+    parser.add_argument("-l", "--labels", action="store_true",
+                        help="load the installed plugins first, so the labels of the plugins used are known")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes for several bundles (default: number of CPUs)")
+    parser.add_argument("path", nargs="+",
+                        help="bundle path, or directory to scan with --recursive. "
+                             "several bundles are inspected in parallel and printed as JSON Lines")
+    args = parser.parse_args()
 
-    if len(sys.argv) == 1:
-        print("usage %s /path/to/bundle" % sys.argv[0])
+    if not args.recursive and len(args.path) == 1:
+        print(get_info_from_lv2_bundle(args.path[0], args.labels))
         sys.exit(0)
 
-    print(get_info_from_lv2_bundle(sys.argv[1]))
+    ok = inspect_lv2_bundles(args.path, max(1, args.jobs), sys.stdout, args.recursive, args.labels)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Query the plugin users stored in the pedalboard index, without parsing any bundle
+#
+# usage: print-plugin-users.py [--instance NAME] [--index FILE] URI [URI ...]
+#        print-plugin-users.py [--instance NAME] [--index FILE] [--lv2-path PATH] --loadable | --missing
+#
+# With plugin URIs, prints the pedalboards that would break if those plugins were removed.
+# --loadable and --missing compare the index against the plugins lilv finds in the LV2 path
+# (defaults to the MOD plugin library plus LV2_PATH).
+# The index and plugin library are the ones of the mod-app instance given with --instance (see mod_common).
+
+import os
+import sys
+
+CWD = sys.path[0]
+
+if not CWD:
+    CWD = os.path.dirname(sys.argv[0])
+
+# make it work with cxfreeze
+if os.path.isfile(CWD):
+    CWD = os.path.dirname(CWD)
+
+sys.path = [os.path.join(CWD, "..")] + sys.path
+
+# takes "--instance NAME" out of the arguments
+from mod_common import DATA_DIR, INSTANCE, PEDALBOARD_INDEX_FILE
+from mod_pedalboards import PedalboardIndex
+
+# ------------------------------------------------------------------------------------------------------------
+
+def getInstalledPlugins(lv2path):
+    # lilv reads LV2_PATH when the world is created
+    os.environ['LV2_PATH'] = lv2path
+
+    import lilv
+
+    world = lilv.World()
+    world.load_all()
+
+    return set(plugin.get_uri().as_string() for plugin in world.get_all_plugins())
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    defaultPath = os.pathsep.join(path for path in (os.path.join(DATA_DIR, "lib"), os.getenv("LV2_PATH")) if path)
+
+    parser = ArgumentParser(description="Show which pedalboards use which plugins")
+    parser.add_argument("--instance", default=INSTANCE, help="mod-app instance name (handled by mod_common)")
+    parser.add_argument("--index", default=PEDALBOARD_INDEX_FILE)
+    parser.add_argument("--lv2-path", default=defaultPath)
+    parser.add_argument("--loadable", action="store_true", help="list pedalboards whose plugins are all installed")
+    parser.add_argument("--missing", action="store_true", help="list used plugins that are not installed")
+    parser.add_argument("uri", nargs="*", help="plugin URIs about to be removed")
+    args = parser.parse_args()
+
+    index = PedalboardIndex(args.index, [])
+
+    if not index.load():
+        print("failed to load index '%s'" % args.index)
+        sys.exit(1)
+
+    users = index.pluginUsers()
+
+    if args.uri:
+        for bundle in users.pedalboardsUsingAny(args.uri):
+            print(bundle)
+
+    elif args.loadable:
+        for bundle in users.loadablePedalboards(getInstalledPlugins(args.lv2_path)):
+            print(bundle)
+
+    elif args.missing:
+        for uri, bundles in sorted(users.missingPlugins(getInstalledPlugins(args.lv2_path)).items()):
+            print("%s (%i pedalboards)" % (uri, len(bundles)))
+            for bundle in bundles:
+                print("    " + bundle)
+
+    else:
+        for uri in users.plugins():
+            print("%s (%i pedalboards)" % (uri, len(users.pedalboardsUsing(uri))))